@@ -0,0 +1,150 @@
+"""
+App Radar Agent - 版本发布节奏分析
+基于 app_versions 表计算发布间隔、节奏分位数以及"发版加速/放缓"标记
+"""
+import json
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app_radar.storage.database import engine as default_engine
+
+
+# 一次查询取出应用的版本及与上一版本的间隔（依赖 (app_id, released_at) 索引）
+# scope: 应用 trackId（JSON 数组），为空时不限应用
+CADENCE_SQL = text("""
+    WITH scoped_apps AS (
+        SELECT id, app_identifier, name FROM apps
+        WHERE :scope IS NULL OR app_identifier IN (SELECT value FROM json_each(:scope))
+    )
+    SELECT v.app_id, a.app_identifier, a.name, v.version, v.released_at,
+           julianday(v.released_at)
+             - julianday(LAG(v.released_at) OVER (PARTITION BY v.app_id ORDER BY v.released_at))
+             AS interval_days
+    FROM scoped_apps a
+    JOIN app_versions v ON v.app_id = a.id
+    WHERE v.released_at IS NOT NULL
+    ORDER BY v.app_id, v.released_at
+""")
+
+# 最近一次间隔相对历史中位数的阈值
+FASTER_RATIO = 0.75
+SLOWER_RATIO = 1.5
+
+# 至少需要多少个历史间隔才给出加速/放缓判断
+MIN_INTERVALS_FOR_TREND = 3
+
+
+@dataclass
+class CadenceStats:
+    """单个应用的发布节奏统计"""
+    app_id: int
+    app_identifier: str
+    name: str
+    releases: int
+    latest_version: str
+    latest_release: datetime
+    last_interval_days: Optional[float]
+    median_days: Optional[float]
+    p25_days: Optional[float]
+    p75_days: Optional[float]
+    p90_days: Optional[float]
+    days_since_release: float
+    trend: str  # 'faster' / 'slower' / 'steady' / 'unknown'
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _classify(intervals: List[float], days_since_release: float) -> str:
+    """根据最近一次间隔与此前间隔的中位数比较，判断发版是否加速/放缓"""
+    if len(intervals) < MIN_INTERVALS_FOR_TREND:
+        return 'unknown'
+
+    baseline = float(np.median(intervals[:-1]))
+    if baseline <= 0:
+        return 'unknown'
+
+    # 距上次发版已远超常规节奏，也视为放缓
+    if days_since_release > SLOWER_RATIO * baseline or intervals[-1] > SLOWER_RATIO * baseline:
+        return 'slower'
+    if intervals[-1] < FASTER_RATIO * baseline:
+        return 'faster'
+    return 'steady'
+
+
+def _summarize(app_id: int, app_identifier: str, name: str, rows: List,
+               now: datetime) -> CadenceStats:
+    intervals = [r.interval_days for r in rows if r.interval_days is not None]
+    latest = rows[-1]
+    latest_release = latest.released_at
+    if isinstance(latest_release, str):
+        latest_release = datetime.fromisoformat(latest_release)
+    days_since = (now - latest_release).total_seconds() / 86400
+
+    if intervals:
+        p25, median, p75, p90 = (float(x) for x in np.percentile(intervals, [25, 50, 75, 90]))
+    else:
+        p25 = median = p75 = p90 = None
+
+    return CadenceStats(
+        app_id=app_id,
+        app_identifier=app_identifier,
+        name=name,
+        releases=len(rows),
+        latest_version=latest.version,
+        latest_release=latest_release,
+        last_interval_days=intervals[-1] if intervals else None,
+        median_days=median,
+        p25_days=p25,
+        p75_days=p75,
+        p90_days=p90,
+        days_since_release=days_since,
+        trend=_classify(intervals, days_since),
+    )
+
+
+def compute_cadence(engine: Engine = default_engine,
+                    now: Optional[datetime] = None,
+                    app_identifiers: Optional[List[str]] = None) -> Dict[int, CadenceStats]:
+    """
+    计算应用的发布节奏（单次查询 + 单次遍历）
+
+    Args:
+        engine: 数据库引擎
+        now: 计算"距上次发版天数"的参考时间，默认为当前 UTC 时间
+        app_identifiers: 只计算这些应用（trackId），默认所有应用
+
+    Returns:
+        Dict[int, CadenceStats]: app_id -> 节奏统计
+    """
+    now = now or datetime.utcnow()
+    results: Dict[int, CadenceStats] = {}
+
+    with engine.connect() as conn:
+        rows = conn.execute(CADENCE_SQL, {
+            'scope': None if app_identifiers is None
+            else json.dumps([str(i) for i in app_identifiers]),
+        }).all()
+
+    start = 0
+    for i in range(1, len(rows) + 1):
+        if i == len(rows) or rows[i].app_id != rows[start].app_id:
+            group = rows[start:i]
+            first = group[0]
+            results[first.app_id] = _summarize(first.app_id, first.app_identifier, first.name,
+                                               group, now)
+            start = i
+
+    return results
+
+
+def cadence_by_identifier(app_identifiers: Optional[List[str]] = None,
+                          engine: Engine = default_engine) -> Dict[str, CadenceStats]:
+    """按应用标识（trackId）索引的发布节奏，便于报告层查找（同名应用不会互相覆盖）"""
+    stats = compute_cadence(engine, app_identifiers=app_identifiers)
+    return {s.app_identifier: s for s in stats.values()}
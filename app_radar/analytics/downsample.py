@@ -0,0 +1,56 @@
+"""
+App Radar Agent - 时间序列降采样
+Largest-Triangle-Three-Buckets (LTTB) 算法，在固定点数预算下保留序列的视觉形状
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    LTTB 降采样
+
+    首尾点固定保留，中间点均分为 n_out - 2 个桶，每个桶选出与"上一个选中点"和
+    "下一个桶均值点"构成三角形面积最大的点。桶均值通过 np.add.reduceat 一次算出，
+    每个桶内的面积计算是向量化的；逐桶循环只有 n_out 次，与原始序列长度无关。
+
+    Args:
+        x: 横坐标（需单调递增，如 epoch 秒）
+        y: 纵坐标
+        n_out: 输出点数上限
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 降采样后的 (x, y)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # 中间 n - 2 个点划分为 n_out - 2 个桶，edges[i]:edges[i+1] 为第 i 个桶
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < n_out - 2:
+            cx, cy = mean_x[i + 1], mean_y[i + 1]
+        else:
+            cx, cy = x[-1], y[-1]
+
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return x[selected], y[selected]
@@ -0,0 +1,194 @@
+"""
+App Radar Agent - 公司信息补全
+按开发者分组去重，每个公司在 TTL 内只查询一次，批量写入 CompanyInfo 并关联应用
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, select, update
+
+from app_radar.config.settings import settings
+from app_radar.data_sources.base import BaseDataSource
+from app_radar.data_sources.company import (
+    CompanyNotFoundError, CrunchbaseCompanySource, FixtureCompanySource
+)
+from app_radar.storage.database import get_db_session, App, CompanyInfo
+from app_radar.utils import monitoring
+
+
+COMPANY_FIELDS = (
+    'employee_count_min', 'employee_count_max', 'funding_total', 'funding_stage',
+    'last_funding_date', 'headquarters', 'founded_year',
+)
+
+
+@dataclass
+class EnrichmentStats:
+    """公司补全统计"""
+    developers: int = 0
+    fresh: int = 0
+    looked_up: int = 0
+    found: int = 0
+    not_found: int = 0
+    failed: int = 0
+    apps_linked: int = 0
+
+    def summary(self) -> str:
+        return (f"{self.developers} 家公司, 缓存有效 {self.fresh}, 查询 {self.looked_up} "
+                f"(命中 {self.found}, 未找到 {self.not_found}, 失败 {self.failed}), "
+                f"关联应用 {self.apps_linked}")
+
+
+def default_company_source() -> Optional[BaseDataSource]:
+    """根据配置选择公司数据源：Crunchbase > 本地 fixture > 无"""
+    if settings.crunchbase_api_key:
+        return CrunchbaseCompanySource({'api_key': settings.crunchbase_api_key})
+    if settings.company_fixture_path.is_file():
+        return FixtureCompanySource({'path': settings.company_fixture_path})
+    return None
+
+
+def _lookup(source: BaseDataSource, name: str):
+    """查询单个公司，返回 (状态, 数据)"""
+    try:
+        return 'found', source.fetch(name)
+    except CompanyNotFoundError:
+        return 'not_found', None
+    except Exception as e:
+        print(f"⚠️  公司信息查询失败 {name}: {e}")
+        return 'failed', None
+
+
+def enrich_companies(source: BaseDataSource, app_identifiers: Optional[List[str]] = None,
+                     ttl_hours: Optional[int] = None,
+                     max_workers: Optional[int] = None) -> EnrichmentStats:
+    """
+    补全应用的开发者公司信息
+
+    Args:
+        source: 公司数据源
+        app_identifiers: 只补全这些应用（trackId），默认所有已跟踪应用
+        ttl_hours: 公司信息有效期（小时），过期才会重新查询
+        max_workers: 并发查询数
+
+    Returns:
+        EnrichmentStats: 补全统计
+    """
+    ttl_hours = settings.company_ttl_hours if ttl_hours is None else ttl_hours
+    max_workers = max_workers or settings.company_lookup_workers
+    stats = EnrichmentStats()
+    scope = App.developer.isnot(None)
+    if app_identifiers is not None:
+        scope = scope & App.app_identifier.in_([str(i) for i in app_identifiers])
+    db = get_db_session()
+
+    try:
+        # 1. 按开发者去重
+        developers = sorted({
+            dev for (dev,) in db.execute(select(App.developer).where(scope)) if dev
+        })
+        stats.developers = len(developers)
+        if not developers:
+            return stats
+
+        # 2. 一次查询取出已有公司记录，筛出需要刷新的
+        existing = {
+            row.company_name: row
+            for row in db.execute(
+                select(CompanyInfo.id, CompanyInfo.company_name, CompanyInfo.updated_at)
+                .where(CompanyInfo.company_name.in_(developers))
+            )
+        }
+        cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+        stale = [
+            name for name in developers
+            if name not in existing or (existing[name].updated_at or datetime.min) < cutoff
+        ]
+        stats.fresh = len(developers) - len(stale)
+        monitoring.inc('app_radar_cache_total', stats.fresh, cache='company', result='hit')
+        monitoring.inc('app_radar_cache_total', len(stale), cache='company', result='miss')
+
+        # 3. 每个公司只查询一次
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(lambda name: (name, *_lookup(source, name)), stale))
+        stats.looked_up = len(results)
+
+        # 4. 批量写入（未找到的公司写入空记录，作为 TTL 内的负缓存）
+        now = datetime.utcnow()
+        inserts: List[Dict] = []
+        updates: List[Dict] = []
+        for name, status, result in results:
+            if status == 'failed':
+                stats.failed += 1
+                continue
+            if status == 'found':
+                stats.found += 1
+                row = {field: result.data.get(field) for field in COMPANY_FIELDS}
+                row['source'] = result.source
+            else:
+                stats.not_found += 1
+                row = {field: None for field in COMPANY_FIELDS}
+                row['source'] = None
+            row['updated_at'] = now
+
+            if name in existing:
+                updates.append({'id': existing[name].id, **row})
+            else:
+                inserts.append({'company_name': name, **row})
+
+        if inserts:
+            db.execute(insert(CompanyInfo), inserts)
+        if updates:
+            db.execute(update(CompanyInfo), updates)
+
+        # 5. 单条语句关联应用和公司
+        company_id = (
+            select(CompanyInfo.id)
+            .where(CompanyInfo.company_name == App.developer)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            update(App)
+            .where(scope)
+            .where((App.company_id.is_(None)) | (App.company_id != company_id))
+            .values(company_id=company_id)
+            .execution_options(synchronize_session=False)
+        )
+        stats.apps_linked = result.rowcount
+        db.commit()
+    finally:
+        db.close()
+
+    return stats
+
+
+def load_company_profiles(app_identifiers: List[str]) -> Dict[str, Dict]:
+    """
+    通过 apps JOIN company_info 取出应用对应的公司信息（报告层使用，不触发外部查询）
+
+    Args:
+        app_identifiers: 应用标识（trackId）列表
+
+    Returns:
+        Dict[str, Dict]: 应用标识 -> 公司信息
+    """
+    app_identifiers = [str(identifier) for identifier in app_identifiers]
+    if not app_identifiers:
+        return {}
+
+    db = get_db_session()
+    try:
+        rows = db.execute(
+            select(App.app_identifier, CompanyInfo)
+            .join(CompanyInfo, App.company_id == CompanyInfo.id)
+            .where(App.app_identifier.in_(app_identifiers))
+            .where(CompanyInfo.source.isnot(None))
+        ).all()
+        return {
+            identifier: {field: getattr(company, field) for field in COMPANY_FIELDS}
+            for identifier, company in rows
+        }
+    finally:
+        db.close()
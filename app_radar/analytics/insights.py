@@ -0,0 +1,303 @@
+"""
+App Radar Agent - LLM 洞察生成
+按应用并发调用 LLM 生成竞争洞察，结果按输入快照的内容哈希缓存
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from app_radar.config.settings import settings
+from app_radar.storage.database import get_db_session, InsightCache
+
+
+# 提示词版本号 - 修改 PROMPT_TEMPLATE 时递增，使旧缓存失效
+PROMPT_VERSION = 1
+
+PROMPT_TEMPLATE = """你是一名移动应用行业分析师。请根据以下 App Store 数据，用一到两句中文给出该应用最值得关注的竞争洞察（护城河、增长信号或风险），不要复述数据本身。
+
+应用名称: {name}
+开发者: {developer}
+类别: {category}
+评分: {rating} ({rating_count} 评论)
+版本: {version}
+描述: {description}
+"""
+
+
+@dataclass
+class InsightResponse:
+    """LLM 客户端的返回结果"""
+    text: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+class InsightClient(ABC):
+    """LLM 客户端抽象基类 - 可替换为本地桩实现用于测试和基准"""
+
+    model: str = "unknown"
+
+    @abstractmethod
+    def complete(self, prompt: str) -> InsightResponse:
+        """
+        发送单个提示词
+
+        Args:
+            prompt: 提示词
+
+        Returns:
+            InsightResponse: 生成文本及 token 用量
+        """
+        pass
+
+
+class AnthropicInsightClient(InsightClient):
+    """Anthropic Messages API 客户端（需要安装 anthropic 包）"""
+
+    def __init__(self, api_key: str, model: Optional[str] = None, max_tokens: int = 300):
+        try:
+            from anthropic import Anthropic
+        except ImportError as e:
+            raise ImportError("LLM 洞察需要安装 anthropic: pip install anthropic") from e
+
+        self.client = Anthropic(api_key=api_key)
+        self.model = model or settings.insight_model
+        self.max_tokens = max_tokens
+
+    def complete(self, prompt: str) -> InsightResponse:
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return InsightResponse(
+            text=response.content[0].text.strip(),
+            input_tokens=response.usage.input_tokens,
+            output_tokens=response.usage.output_tokens,
+        )
+
+
+class StubInsightClient(InsightClient):
+    """本地桩客户端 - 不访问网络，按提示词生成确定性结果，可模拟延迟"""
+
+    model = "stub"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt: str) -> InsightResponse:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        name = prompt.split("应用名称: ", 1)[-1].split("\n", 1)[0]
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        return InsightResponse(
+            text=f"{name} 的桩洞察 ({digest})",
+            input_tokens=len(prompt) // 4,
+            output_tokens=20,
+        )
+
+
+def default_insight_client() -> Optional[InsightClient]:
+    """
+    根据配置选择洞察客户端：Anthropic API 或本地桩
+
+    Returns:
+        Optional[InsightClient]: 客户端；使用 Anthropic 但未配置 API Key 时为 None
+
+    Raises:
+        ImportError: 未安装 anthropic 包
+    """
+    if settings.insight_client == 'stub':
+        return StubInsightClient(latency=settings.insight_stub_latency)
+    if not settings.anthropic_api_key:
+        return None
+    return AnthropicInsightClient(settings.anthropic_api_key)
+
+
+@dataclass
+class InsightStats:
+    """洞察生成的调用/成本/延迟统计"""
+    requested: int = 0
+    cache_hits: int = 0
+    calls: int = 0
+    failures: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    wall_time: float = 0.0
+    latencies: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def cost_usd(self) -> float:
+        """按每百万 token 单价估算的费用"""
+        return (self.input_tokens * settings.insight_input_cost_per_mtok
+                + self.output_tokens * settings.insight_output_cost_per_mtok) / 1_000_000
+
+    @property
+    def latency_avg(self) -> float:
+        return self.latency_total / self.calls if self.calls else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.requested} 款应用, 缓存命中 {self.cache_hits}, 调用 {self.calls}, "
+                f"失败 {self.failures}, tokens {self.input_tokens}/{self.output_tokens}, "
+                f"约 ${self.cost_usd:.4f}, 平均延迟 {self.latency_avg:.2f}s, "
+                f"最大延迟 {self.latency_max:.2f}s, 总耗时 {self.wall_time:.2f}s")
+
+
+def _round_significant(value: Optional[float], digits: int = 2) -> Optional[float]:
+    """保留有效数字，避免评论数的微小波动导致缓存失效"""
+    if not value:
+        return value
+    magnitude = int(math.floor(math.log10(abs(value))))
+    return round(value, digits - 1 - magnitude)
+
+
+def snapshot_for_prompt(app: Dict) -> Dict:
+    """提取参与提示词的字段（即缓存键的输入快照）"""
+    rating = app.get('rating')
+    return {
+        'name': app.get('name', ''),
+        'developer': app.get('developer', ''),
+        'category': app.get('category', ''),
+        'rating': round(rating, 1) if rating else None,
+        'rating_count': _round_significant(app.get('rating_count') or 0),
+        'version': app.get('version', ''),
+        'description': (app.get('description') or '')[:1500],
+    }
+
+
+def insight_key(app: Dict) -> str:
+    """洞察结果的键：应用标识（trackId，同名应用不会互相覆盖），缺失时退回名称"""
+    return str(app.get('trackId') or app.get('name', ''))
+
+
+def snapshot_hash(snapshot: Dict, model: str) -> str:
+    """输入快照 + 模型 + 提示词版本的内容哈希"""
+    payload = json.dumps([PROMPT_VERSION, model, snapshot], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class InsightGenerator:
+    """
+    并发洞察生成器
+
+    - 有界线程池并发调用 LLM
+    - 以输入快照哈希为键缓存到数据库，快照不变的应用不会重复调用
+    - 统计调用次数、token 用量、费用和延迟
+    """
+
+    def __init__(self, client: InsightClient, max_workers: Optional[int] = None):
+        self.client = client
+        self.max_workers = max_workers or settings.insight_max_workers
+        self.stats = InsightStats()
+
+    def _load_cached(self, hashes: List[str]) -> Dict[str, str]:
+        db = get_db_session()
+        try:
+            rows = db.execute(
+                select(InsightCache.snapshot_hash, InsightCache.content)
+                .where(InsightCache.snapshot_hash.in_(hashes))
+            ).all()
+            return {h: content for h, content in rows}
+        finally:
+            db.close()
+
+    def _store(self, entries: List[InsightCache]):
+        if not entries:
+            return
+        db = get_db_session()
+        try:
+            for entry in entries:
+                db.merge(entry)
+            db.commit()
+        finally:
+            db.close()
+
+    def _call(self, prompt: str) -> InsightResponse:
+        started = time.perf_counter()
+        response = self.client.complete(prompt)
+        elapsed = time.perf_counter() - started
+        self.stats.latencies.append(elapsed)
+        return response
+
+    def generate(self, apps: List[Dict]) -> Dict[str, str]:
+        """
+        为一批应用生成洞察
+
+        Args:
+            apps: 应用数据列表
+
+        Returns:
+            Dict[str, str]: 应用标识（见 insight_key）-> 洞察文本（失败的应用不包含在内）
+        """
+        started = time.perf_counter()
+        self.stats.requested += len(apps)
+
+        keyed = {}
+        # 输入快照相同的应用只调用一次，结果分给每个应用
+        apps_by_hash: Dict[str, List[Dict]] = {}
+        for app in apps:
+            snapshot = snapshot_for_prompt(app)
+            h = snapshot_hash(snapshot, self.client.model)
+            keyed.setdefault(h, (app, snapshot))
+            apps_by_hash.setdefault(h, []).append(app)
+
+        cached = self._load_cached(list(keyed))
+        insights = {insight_key(app): text
+                    for h, text in cached.items() for app in apps_by_hash[h]}
+        self.stats.cache_hits += len(cached)
+
+        pending = {h: v for h, v in keyed.items() if h not in cached}
+        new_entries = []
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(self._call, PROMPT_TEMPLATE.format(**snapshot)): h
+                    for h, (_, snapshot) in pending.items()
+                }
+                for future in as_completed(futures):
+                    h = futures[future]
+                    app = pending[h][0]
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        self.stats.failures += 1
+                        print(f"⚠️  洞察生成失败 {app['name']}: {e}")
+                        continue
+
+                    self.stats.calls += 1
+                    self.stats.input_tokens += response.input_tokens
+                    self.stats.output_tokens += response.output_tokens
+                    for same in apps_by_hash[h]:
+                        insights[insight_key(same)] = response.text
+                    new_entries.append(InsightCache(
+                        snapshot_hash=h,
+                        app_identifier=str(app.get('trackId') or app['name']),
+                        model=self.client.model,
+                        content=response.text,
+                        input_tokens=response.input_tokens,
+                        output_tokens=response.output_tokens,
+                        created_at=datetime.utcnow(),
+                    ))
+
+        self._store(new_entries)
+
+        self.stats.latency_total = sum(self.stats.latencies)
+        self.stats.latency_max = max(self.stats.latencies, default=0.0)
+        self.stats.wall_time += time.perf_counter() - started
+        return insights
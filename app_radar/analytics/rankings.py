@@ -0,0 +1,212 @@
+"""
+App Radar Agent - 榜单排名采集
+并发抓取所有配置的国家 / 榜单 / 类别，按快照批量写入排名，新上榜的应用自动加入关注列表，
+采集到的指标再按快照回填 rank_overall / rank_category
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, select, update
+
+from app_radar.config.settings import settings
+from app_radar.data_sources.base import BaseDataSource
+from app_radar.data_sources.top_charts import (
+    GENRE_ALL, FixtureChartsSource, ITunesChartsSource, configured_chart_keys
+)
+from app_radar.storage.database import get_db_session, App, ChartRank, Metric
+from app_radar.storage.watchlist import add_watchlist_entries
+from app_radar.utils import monitoring
+
+
+# IN 查询每批的参数个数
+CHUNK_SIZE = 500
+
+
+@dataclass
+class ChartIngestStats:
+    """榜单采集统计"""
+    charts: int = 0
+    failed: int = 0
+    entries: int = 0
+    apps_added: int = 0
+    ranks: int = 0
+    discovered: int = 0
+    snapshot_at: Optional[datetime] = None
+
+    def summary(self) -> str:
+        return (f"{self.charts} 个榜单 (失败 {self.failed}), {self.entries} 个条目, "
+                f"新应用 {self.apps_added}, 写入排名 {self.ranks}, 自动关注 {self.discovered}")
+
+
+def default_chart_source() -> BaseDataSource:
+    """根据配置选择榜单数据源：iTunes RSS 或本地 fixture"""
+    if settings.top_chart_source == 'fixture':
+        return FixtureChartsSource({'path': settings.top_chart_fixture_path})
+    return ITunesChartsSource()
+
+
+def _fetch_chart(source: BaseDataSource, key: str):
+    try:
+        return source.fetch_with_retry(key)
+    except Exception as e:
+        print(f"⚠️  榜单获取失败 {key}: {e}")
+        return None
+
+
+def _chunks(items: List, size: int = CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _app_ids(db, identifiers: List[str]) -> Dict[str, int]:
+    ids: Dict[str, int] = {}
+    for chunk in _chunks(identifiers):
+        ids.update(db.execute(
+            select(App.app_identifier, App.id).where(App.app_identifier.in_(chunk))
+        ).all())
+    return ids
+
+
+def ingest_top_charts(source: BaseDataSource, keys: Optional[List[str]] = None,
+                      max_workers: Optional[int] = None, discover_top: Optional[int] = None,
+                      snapshot_at: Optional[datetime] = None) -> ChartIngestStats:
+    """
+    抓取榜单并写入一个排名快照
+
+    Args:
+        source: 榜单数据源
+        keys: 榜单标识列表，默认为配置中的所有国家 × 榜单 × 类别
+        max_workers: 并发请求数
+        discover_top: 进入任一榜单前 N 名、且尚未采集过的应用加入关注列表（0 关闭）
+        snapshot_at: 快照时间，默认当前时间
+
+    Returns:
+        ChartIngestStats: 采集统计（snapshot_at 为本次快照时间）
+    """
+    keys = keys if keys is not None else configured_chart_keys()
+    max_workers = max_workers or settings.top_chart_workers
+    discover_top = settings.watchlist_discover_top if discover_top is None else discover_top
+    stats = ChartIngestStats(snapshot_at=snapshot_at or datetime.utcnow())
+
+    # 1. 并发抓取所有榜单
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lambda key: _fetch_chart(source, key), keys))
+    charts = [result.data for result in results if result is not None]
+    stats.charts = len(charts)
+    stats.failed = len(keys) - len(charts)
+    stats.entries = sum(len(chart['entries']) for chart in charts)
+    if not stats.entries:
+        return stats
+
+    db = get_db_session()
+    try:
+        with monitoring.timed('app_radar_db_write_seconds', op='chart_ranks'):
+            # 2. 榜单中的应用：按 trackId 去重，不存在的批量创建
+            entries = {}
+            for chart in charts:
+                for entry in chart['entries']:
+                    entries.setdefault(str(entry['track_id']), entry)
+
+            ids = _app_ids(db, list(entries))
+            now = datetime.utcnow()
+            new_apps = [
+                {
+                    'app_identifier': identifier,
+                    'name': entry['name'] or identifier,
+                    'platform': 'ios',
+                    'developer': entry['developer'] or None,
+                    'category': entry['category'] or None,
+                    'url': entry['url'] or None,
+                    'first_tracked_at': now,
+                    'last_updated_at': now,
+                }
+                for identifier, entry in entries.items() if identifier not in ids
+            ]
+            if new_apps:
+                db.execute(insert(App), new_apps)
+                ids.update(_app_ids(db, [app['app_identifier'] for app in new_apps]))
+            stats.apps_added = len(new_apps)
+
+            # 3. 排名快照
+            ranks = [
+                {
+                    'snapshot_at': stats.snapshot_at,
+                    'country': chart['country'],
+                    'chart': chart['chart'],
+                    'genre': chart['genre'],
+                    'rank': entry['rank'],
+                    'app_id': ids[str(entry['track_id'])],
+                }
+                for chart in charts for entry in chart['entries']
+            ]
+            db.execute(insert(ChartRank), ranks)
+            stats.ranks = len(ranks)
+
+            # 4. 新上榜（还没有任何指标）的应用加入关注列表，记录最好的名次
+            if discover_top > 0:
+                best: Dict[int, tuple] = {}
+                for chart in charts:
+                    key = f"{chart['country']}/{chart['chart']}/{chart['genre']}"
+                    for entry in chart['entries'][:discover_top]:
+                        app_id = ids[str(entry['track_id'])]
+                        if app_id not in best or entry['rank'] < best[app_id][0]:
+                            best[app_id] = (entry['rank'], key)
+
+                tracked = set()
+                for chunk in _chunks(list(best)):
+                    tracked.update(db.scalars(
+                        select(Metric.app_id).where(Metric.app_id.in_(chunk)).distinct()
+                    ))
+                stats.discovered = add_watchlist_entries(db, [
+                    {'app_id': app_id, 'source': 'charts', 'reason': f"{key} #{rank}"}
+                    for app_id, (rank, key) in sorted(best.items(), key=lambda kv: kv[1])
+                    if app_id not in tracked
+                ])
+
+            db.commit()
+    finally:
+        db.close()
+
+    return stats
+
+
+def apply_chart_ranks(snapshot_at: datetime, since: Optional[datetime] = None) -> int:
+    """
+    用排名快照回填指标的 rank_overall / rank_category
+
+    总榜名次取第一个国家、第一个榜单（默认美区免费榜）；类别名次取同一榜单中
+    应用所属类别（apps.category）的类别榜。快照中没有的应用写入 NULL。
+
+    Args:
+        snapshot_at: 排名快照时间（ingest_top_charts 返回的 snapshot_at）
+        since: 只更新该时间之后的指标，默认与快照时间相同
+
+    Returns:
+        int: 更新的指标行数
+    """
+    country, chart = settings.top_chart_countries[0], settings.top_chart_feeds[0]
+    ranks = select(ChartRank.rank).where(
+        ChartRank.snapshot_at == snapshot_at,
+        ChartRank.country == country,
+        ChartRank.chart == chart,
+        ChartRank.app_id == Metric.app_id,
+    )
+    category = select(App.category).where(App.id == ChartRank.app_id).scalar_subquery()
+
+    db = get_db_session()
+    try:
+        result = db.execute(
+            update(Metric)
+            .where(Metric.timestamp >= (since or snapshot_at))
+            .values(
+                rank_overall=ranks.where(ChartRank.genre == GENRE_ALL).limit(1).scalar_subquery(),
+                rank_category=ranks.where(ChartRank.genre == category).limit(1).scalar_subquery(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
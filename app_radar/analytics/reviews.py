@@ -0,0 +1,226 @@
+"""
+App Radar Agent - 用户评论增量采集
+按应用 / 国家从最新一页往后翻：同一应用的页并发请求，遇到不晚于游标 (时间, 评论 ID) 的评论即停止翻页，
+新评论批量写入；游标只在翻到已见评论（或最后一页）时前移，中途失败的下一轮重新抓取
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app_radar.config.settings import settings
+from app_radar.data_sources.base import BaseDataSource
+from app_radar.data_sources.reviews import (
+    PAGE_SIZE, FixtureReviewsSource, ITunesReviewsSource, review_page_key
+)
+from app_radar.storage.database import get_db_session, App, Metric, Review, ReviewCursor
+from app_radar.utils import monitoring
+
+
+REVIEW_FIELDS = ('rating', 'title', 'content', 'author', 'version', 'vote_count', 'updated_at')
+
+
+@dataclass
+class ReviewIngestStats:
+    """评论采集统计"""
+    apps: int = 0
+    pages: int = 0
+    interrupted: int = 0  # 翻页中途失败（游标不前移）的应用 / 国家
+    reviews: int = 0
+    backfilled: int = 0  # 首次抓取（没有游标）的应用 / 国家
+
+    def summary(self) -> str:
+        return (f"{self.apps} 款应用, 请求 {self.pages} 页 (中断 {self.interrupted}), "
+                f"写入评论 {self.reviews}, 首次回填 {self.backfilled}")
+
+
+@dataclass
+class _Collected:
+    """单个应用 / 国家的翻页结果"""
+    app_id: int
+    country: str
+    reviews: List[Dict]
+    pages: int
+    complete: bool
+
+
+def default_review_source() -> BaseDataSource:
+    """根据配置选择评论数据源：iTunes RSS 或本地 fixture"""
+    if settings.review_source == 'fixture':
+        return FixtureReviewsSource({'path': settings.review_fixture_path})
+    return ITunesReviewsSource()
+
+
+def _fetch_page(source: BaseDataSource, key: str) -> Optional[List[Dict]]:
+    try:
+        return source.fetch_with_retry(key).data['reviews']
+    except Exception as e:
+        print(f"⚠️  评论获取失败 {key}: {e}")
+        return None
+
+
+def collect_new_reviews(source: BaseDataSource, pool: ThreadPoolExecutor, country: str,
+                        track_id: str, since: Optional[Tuple[datetime, int]], max_pages: int,
+                        page_workers: int) -> Tuple[List[Dict], int, bool]:
+    """
+    翻页抓取晚于游标的评论
+
+    有游标时先只请求第一页（通常只有少量新评论），需要继续翻页时每批页数翻倍，
+    最多 page_workers 页并发；没有游标时直接按 page_workers 并发回填。
+
+    Args:
+        source: 评论数据源
+        pool: 请求页使用的线程池
+        country: 国家代码
+        track_id: 应用 trackId
+        since: 游标（已写入的最新评论的时间和 ID，同一时间的评论按 ID 区分），None 表示首次抓取
+        max_pages: 最多翻页数
+        page_workers: 每批最多并发请求的页数
+
+    Returns:
+        Tuple[List[Dict], int, bool]: (新评论, 请求的页数, 是否完整翻到已见评论或最后一页)
+    """
+    new_reviews: List[Dict] = []
+    requested = 0
+    page = 1
+    batch = page_workers if since is None else 1
+
+    while page <= max_pages:
+        numbers = range(page, min(page + batch, max_pages + 1))
+        pages = list(pool.map(
+            lambda number: _fetch_page(source, review_page_key(country, track_id, number)), numbers
+        ))
+        requested += len(numbers)
+
+        for reviews in pages:
+            if reviews is None:
+                return new_reviews, requested, False
+            fresh = [
+                review for review in reviews
+                if since is None
+                or ((review['updated_at'] or datetime.min), review['review_id']) > since
+            ]
+            new_reviews.extend(fresh)
+            if len(fresh) < len(reviews) or len(reviews) < PAGE_SIZE:
+                return new_reviews, requested, True
+
+        page += len(numbers)
+        batch = min(batch * 2, page_workers)
+
+    return new_reviews, requested, True
+
+
+def _save_reviews(db, collected: _Collected) -> int:
+    """批量写入一个应用 / 国家的新评论并前移游标（调用方负责 commit）"""
+    rows = {
+        review['review_id']: {
+            'id': review['review_id'],
+            'app_id': collected.app_id,
+            'country': collected.country,
+            'fetched_at': datetime.utcnow(),
+            **{field: review[field] for field in REVIEW_FIELDS},
+        }
+        for review in collected.reviews
+    }
+    if rows:
+        stmt = sqlite_insert(Review)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=['id'],
+            set_={field: stmt.excluded[field] for field in (*REVIEW_FIELDS, 'fetched_at')},
+        ), list(rows.values()))
+
+    dated = [row for row in rows.values() if row['updated_at'] is not None]
+    if collected.complete and dated:
+        latest = max(dated, key=lambda row: (row['updated_at'], row['id']))
+        stmt = sqlite_insert(ReviewCursor).values(
+            app_id=collected.app_id, country=collected.country,
+            last_review_at=latest['updated_at'], last_review_id=latest['id'],
+            updated_at=datetime.utcnow(),
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=['app_id', 'country'],
+            set_={
+                'last_review_at': stmt.excluded.last_review_at,
+                'last_review_id': stmt.excluded.last_review_id,
+                'updated_at': stmt.excluded.updated_at,
+            },
+        ))
+    return len(rows)
+
+
+def ingest_reviews(source: BaseDataSource, app_identifiers: Optional[List[str]] = None,
+                   countries: Optional[List[str]] = None, max_pages: Optional[int] = None,
+                   page_workers: Optional[int] = None,
+                   app_workers: Optional[int] = None) -> ReviewIngestStats:
+    """
+    增量抓取应用的新评论
+
+    Args:
+        source: 评论数据源
+        app_identifiers: 应用 trackId 列表，默认为所有已采集过指标的应用
+        countries: 国家代码列表，默认 review_countries
+        max_pages: 每个应用 / 国家最多翻页数
+        page_workers: 每个应用同时请求的页数
+        app_workers: 同时抓取的应用数
+
+    Returns:
+        ReviewIngestStats: 采集统计
+    """
+    countries = countries or settings.review_countries
+    max_pages = max_pages or settings.review_max_pages
+    page_workers = page_workers or settings.review_page_workers
+    app_workers = app_workers or settings.review_app_workers
+    stats = ReviewIngestStats()
+
+    db = get_db_session()
+    try:
+        # 1. 目标应用及其游标
+        query = select(App.id, App.app_identifier)
+        if app_identifiers is None:
+            query = query.where(select(Metric.id).where(Metric.app_id == App.id).exists())
+        else:
+            query = query.where(App.app_identifier.in_([str(i) for i in app_identifiers]))
+        apps = [(app_id, identifier) for app_id, identifier in db.execute(query)
+                if identifier.isdigit()]
+        stats.apps = len(apps)
+        if not apps:
+            return stats
+
+        # 游标表每个应用 / 国家一行，整表读出（没有 ID 的旧游标重新抓取同一时间的评论，按主键覆盖）
+        cursors: Dict[Tuple[int, str], Tuple[datetime, int]] = {
+            (app_id, country): (last_review_at, last_review_id or 0)
+            for app_id, country, last_review_at, last_review_id in db.execute(
+                select(ReviewCursor.app_id, ReviewCursor.country, ReviewCursor.last_review_at,
+                       ReviewCursor.last_review_id)
+                .where(ReviewCursor.last_review_at.isnot(None))
+            )
+        }
+        tasks = [(app_id, identifier, country) for app_id, identifier in apps for country in countries]
+        stats.backfilled = sum((app_id, country) not in cursors for app_id, _, country in tasks)
+
+        def collect(task) -> _Collected:
+            app_id, identifier, country = task
+            reviews, pages, complete = collect_new_reviews(
+                source, page_pool, country, identifier, cursors.get((app_id, country)),
+                max_pages, page_workers
+            )
+            return _Collected(app_id, country, reviews, pages, complete)
+
+        # 2. 应用之间并发，每个应用的页再并发；结果在主线程按完成顺序写入
+        with ThreadPoolExecutor(max_workers=app_workers * page_workers) as page_pool, \
+                ThreadPoolExecutor(max_workers=app_workers) as app_pool:
+            futures = [app_pool.submit(collect, task) for task in tasks]
+            for future in as_completed(futures):
+                collected = future.result()
+                stats.pages += collected.pages
+                stats.interrupted += not collected.complete
+                with monitoring.timed('app_radar_db_write_seconds', op='reviews'):
+                    stats.reviews += _save_reviews(db, collected)
+                    db.commit()
+    finally:
+        db.close()
+
+    return stats
@@ -0,0 +1,361 @@
+"""
+App Radar Agent - 竞品相似度索引
+基于描述文本的哈希 TF-IDF 向量 + 类别/开发者 one-hot，支持 top-k 余弦相似度查询
+"""
+import hashlib
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# 常见英文停用词（描述文本以英文为主）
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this
+to with you your we our us will can all more new app apps get use just now
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-']+|[一-鿿]")
+
+
+def tokenize(text: str) -> List[str]:
+    """小写分词并去除停用词"""
+    return [t for t in TOKEN_PATTERN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def _bucket(token: str, n_features: int) -> Tuple[int, float]:
+    """将 token 哈希到特征桶，返回 (桶下标, 符号)，符号用于抵消哈希冲突"""
+    h = zlib.crc32(token.encode("utf-8"))
+    return h % n_features, (1.0 if (h >> 31) & 1 == 0 else -1.0)
+
+
+class SimilarityIndex:
+    """
+    竞品相似度索引
+
+    文本部分使用哈希技巧（无需维护词表）得到词频向量，按行稀疏存放（非零桶下标 + 值，
+    内存与描述词数成正比而不是 n × n_features），查询时拼成 CSR 数组并乘以 IDF 权重；
+    类别作为 one-hot 列单独存放，开发者以整数编码存放（等价于 one-hot 的点积，
+    但不占用稠密列）。单个应用的更新只重写一行，名称/描述等未变化时不做任何计算。
+    """
+
+    def __init__(self, n_features: int = 1024, text_weight: float = 0.7,
+                 genre_weight: float = 0.2, developer_weight: float = 0.1):
+        self.n_features = n_features
+        self.text_weight = text_weight
+        self.genre_weight = genre_weight
+        self.developer_weight = developer_weight
+
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._hashes: Dict[str, str] = {}
+
+        # 每行的稀疏词频向量：(桶下标 int32, 值 float32)
+        self._tf: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._df = np.zeros(n_features, dtype=np.float32)
+
+        self._vocab: Dict[str, int] = {}  # 类别 -> 列号
+        self._cat = np.zeros((0, 0), dtype=np.float32)
+        self._developers: Dict[str, int] = {}  # 开发者 -> 编码
+        self._dev = np.zeros(0, dtype=np.int32)
+
+        # 归一化后的查询矩阵缓存（文本为 CSR 三元组），有更新时失效
+        self._normed: Optional[Tuple[Tuple[np.ndarray, ...], np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, app_id: str) -> bool:
+        return app_id in self._row_of
+
+    # === 更新 ===
+
+    @staticmethod
+    def content_hash(name: str, description: str, genres: Iterable[str], developer: str) -> str:
+        """计算名称/描述/类别/开发者的内容哈希，用于判断是否需要重建向量"""
+        payload = json.dumps([name or "", description or "", sorted(genres or []), developer or ""],
+                             ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= self._cat.shape[0]:
+            return
+        capacity = max(rows, self._cat.shape[0] * 2, 64)
+        cat = np.zeros((capacity, self._cat.shape[1]), dtype=np.float32)
+        cat[:len(self._ids)] = self._cat[:len(self._ids)]
+        self._cat = cat
+        dev = np.full(capacity, -1, dtype=np.int32)
+        dev[:len(self._ids)] = self._dev[:len(self._ids)]
+        self._dev = dev
+
+    def _category_column(self, key: str) -> int:
+        col = self._vocab.get(key)
+        if col is None:
+            col = len(self._vocab)
+            self._vocab[key] = col
+            if col >= self._cat.shape[1]:
+                grow = max(16, self._cat.shape[1])
+                self._cat = np.hstack([
+                    self._cat, np.zeros((self._cat.shape[0], grow), dtype=np.float32)
+                ])
+        return col
+
+    def _vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """文本 -> 稀疏词频向量 (桶下标, 值)，桶下标升序且不含零值"""
+        buckets = [_bucket(token, self.n_features) for token in tokenize(text)]
+        if not buckets:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        idx, signs = zip(*buckets)
+        indices, inverse = np.unique(np.array(idx, dtype=np.int32), return_inverse=True)
+        counts = np.bincount(inverse, weights=signs)
+        keep = counts != 0
+        # 次线性词频缩放，保留符号
+        values = np.sign(counts[keep]) * np.log1p(np.abs(counts[keep]))
+        return indices[keep].astype(np.int32), values.astype(np.float32)
+
+    def upsert(self, app_id: str, name: str, description: str,
+               genres: Optional[Iterable[str]] = None, developer: str = "") -> bool:
+        """
+        新增或更新一个应用
+
+        Args:
+            app_id: 应用标识符（trackId）
+            name: 应用名称
+            description: 应用描述
+            genres: 类别列表
+            developer: 开发者名称
+
+        Returns:
+            bool: 是否真的发生了更新（内容未变化时返回 False）
+        """
+        genres = list(genres or [])
+        digest = self.content_hash(name, description, genres, developer)
+        if self._hashes.get(app_id) == digest:
+            return False
+
+        row = self._row_of.get(app_id)
+        if row is None:
+            row = len(self._ids)
+            self._ensure_capacity(row + 1)
+            self._ids.append(app_id)
+            self._names.append(name)
+            self._tf.append(self._vectorize(f"{name} {description}"))
+            self._row_of[app_id] = row
+        else:
+            self._names[row] = name
+            self._df[self._tf[row][0]] -= 1
+            self._cat[row] = 0
+            self._tf[row] = self._vectorize(f"{name} {description}")
+
+        self._df[self._tf[row][0]] += 1
+
+        for genre in genres:
+            col = self._category_column(genre)
+            self._cat[row, col] = 1.0
+        self._dev[row] = (self._developers.setdefault(developer.lower(), len(self._developers))
+                          if developer else -1)
+
+        self._hashes[app_id] = digest
+        self._normed = None
+        return True
+
+    def update_from_apps(self, apps: Iterable[Dict]) -> int:
+        """
+        批量更新（输入为 fetch_all_apps 返回的应用数据）
+
+        Returns:
+            int: 实际更新的应用数量
+        """
+        changed = 0
+        for app in apps:
+            app_id = str(app.get('trackId') or app.get('app_identifier') or app.get('name'))
+            if self.upsert(app_id, app.get('name', ''), app.get('description', ''),
+                           app.get('genres') or [app.get('category', '')],
+                           app.get('developer', '')):
+                changed += 1
+        return changed
+
+    def remove(self, app_id: str) -> bool:
+        """删除一个应用（与最后一行交换，O(1)）"""
+        row = self._row_of.pop(app_id, None)
+        if row is None:
+            return False
+        self._df[self._tf[row][0]] -= 1
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._tf[row] = self._tf[last]
+            self._cat[row] = self._cat[last]
+            self._dev[row] = self._dev[last]
+            self._ids[row] = moved
+            self._names[row] = self._names[last]
+            self._row_of[moved] = row
+        self._cat[last] = 0
+        self._dev[last] = -1
+        self._tf.pop()
+        self._ids.pop()
+        self._names.pop()
+        self._hashes.pop(app_id, None)
+        self._normed = None
+        return True
+
+    # === 查询 ===
+
+    def _idf(self) -> np.ndarray:
+        n = max(len(self._ids), 1)
+        return np.log((1.0 + n) / (1.0 + self._df)).astype(np.float32) + 1.0
+
+    @staticmethod
+    def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """所有行拼成 CSR 数组 (indptr, indices, data)"""
+        lengths = np.fromiter((len(indices) for indices, _ in self._tf), dtype=np.int64,
+                              count=len(self._tf))
+        indptr = np.zeros(len(self._tf) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        if not self._tf:
+            return indptr, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        indices = np.concatenate([indices for indices, _ in self._tf])
+        data = np.concatenate([values for _, values in self._tf])
+        return indptr, indices, data
+
+    def _matrices(self) -> Tuple[Tuple[np.ndarray, ...], np.ndarray]:
+        if self._normed is None:
+            n = len(self._ids)
+            indptr, indices, data = self._csr()
+            # 每个非零值所在的行，便于用 bincount 按行求和
+            rows = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+            data = data * self._idf()[indices]
+            norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=n))
+            norms[norms == 0] = 1.0
+            text = (indptr, rows, indices, (data / norms[rows]).astype(np.float32))
+            genre = self._l2_normalize(self._cat[:n, :len(self._vocab)])
+            self._normed = (text, genre)
+        return self._normed
+
+    def similar(self, app_id: str, k: int = 10) -> List[Tuple[str, str, float]]:
+        """
+        查询与指定应用最相似的 k 个应用
+
+        Args:
+            app_id: 应用标识符
+            k: 返回数量
+
+        Returns:
+            List[Tuple[str, str, float]]: (app_id, 应用名称, 相似度) 列表，按相似度降序
+        """
+        row = self._row_of.get(app_id)
+        if row is None:
+            raise KeyError(f"App not in index: {app_id}")
+
+        (indptr, rows, indices, data), genre = self._matrices()
+        n = len(self._ids)
+        # 稀疏矩阵乘以该应用的（稠密展开的）向量
+        query = np.zeros(self.n_features, dtype=np.float32)
+        own = slice(indptr[row], indptr[row + 1])
+        query[indices[own]] = data[own]
+        text = np.bincount(rows, weights=data * query[indices], minlength=n)
+        scores = self.text_weight * text + self.genre_weight * (genre @ genre[row])
+        dev = self._dev[:len(self._ids)]
+        if dev[row] >= 0:
+            scores += self.developer_weight * (dev == dev[row])
+        scores[row] = -np.inf
+
+        k = min(k, len(self._ids) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[i], self._names[i], float(scores[i])) for i in top]
+
+    def find(self, name: str) -> Optional[str]:
+        """按名称查找应用标识符（忽略大小写，优先完全匹配）"""
+        lowered = name.lower()
+        partial = None
+        for app_id, app_name in zip(self._ids, self._names):
+            if app_name.lower() == lowered:
+                return app_id
+            if partial is None and lowered in app_name.lower():
+                partial = app_id
+        return partial
+
+    # === 持久化 ===
+
+    def save(self, path: Path):
+        """保存索引到 .npz 文件"""
+        n = len(self._ids)
+        indptr, indices, data = self._csr()
+        meta = {
+            'n_features': self.n_features,
+            'ids': self._ids,
+            'names': self._names,
+            'hashes': [self._hashes[i] for i in self._ids],
+            'vocab': self._vocab,
+            'developers': self._developers,
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                tf_indptr=indptr,
+                tf_indices=indices,
+                tf_data=data,
+                cat=self._cat[:n, :len(self._vocab)],
+                dev=self._dev[:n],
+                meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"),
+                                   dtype=np.uint8),
+            )
+
+    @classmethod
+    def load(cls, path: Path, n_features: Optional[int] = None, **kwargs) -> "SimilarityIndex":
+        """
+        从 .npz 文件加载索引
+
+        Args:
+            path: 索引文件
+            n_features: 哈希向量维度；与文件中的维度不同时向量无法混用，返回该维度的空索引
+                （之后采集到的应用重新加入）。默认沿用文件中的维度
+            **kwargs: 其他构造参数（权重）
+
+        Returns:
+            SimilarityIndex: 加载的索引；文件不存在时返回空索引
+        """
+        path = Path(path)
+        empty = {'n_features': n_features} if n_features else {}
+        if not path.exists():
+            return cls(**empty, **kwargs)
+
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes().decode("utf-8"))
+            if n_features and n_features != meta['n_features']:
+                return cls(**empty, **kwargs)
+            index = cls(n_features=meta['n_features'], **kwargs)
+            if 'tf' in data:
+                # 旧版稠密格式
+                index._tf = [(np.flatnonzero(vec).astype(np.int32), vec[vec != 0].astype(np.float32))
+                             for vec in data['tf']]
+            else:
+                indptr, indices, values = data['tf_indptr'], data['tf_indices'], data['tf_data']
+                index._tf = [(indices[a:b].astype(np.int32), values[a:b].astype(np.float32))
+                             for a, b in zip(indptr[:-1], indptr[1:])]
+            index._cat = data['cat'].astype(np.float32)
+            index._dev = data['dev'].astype(np.int32)
+
+        index._ids = meta['ids']
+        index._names = meta['names']
+        index._row_of = {app_id: i for i, app_id in enumerate(index._ids)}
+        index._hashes = dict(zip(index._ids, meta['hashes']))
+        index._vocab = meta['vocab']
+        index._developers = meta['developers']
+        for indices, _ in index._tf:
+            index._df[indices] += 1
+        return index
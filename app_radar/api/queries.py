@@ -0,0 +1,260 @@
+"""
+App Radar Agent - 查询 API 的数据查询
+每个查询接收数据库连接和已解析的参数，返回可直接 JSON 序列化的结果；
+历史序列按批次流式返回，不一次性载入
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import aliased
+
+from app_radar.storage.database import App, AppDescription, AppVersion, CompanyInfo, Metric
+from app_radar.storage.search import search_apps
+
+
+LEADERBOARDS = ('reviews', 'rating', 'growth')
+HISTORY_COLUMNS = ('timestamp', 'rating', 'rating_count', 'version', 'estimated_dau', 'estimated_mau')
+
+APP_FIELDS = (App.id, App.app_identifier, App.name, App.developer, App.category, App.url)
+METRIC_FIELDS = (Metric.timestamp, Metric.rating, Metric.rating_count, Metric.version)
+
+
+class NotFound(LookupError):
+    """请求的资源不存在"""
+
+
+def isoformat(value: Optional[datetime]) -> Optional[str]:
+    """数据库中的 UTC 时间 -> ISO 8601 字符串"""
+    return value.isoformat(timespec='seconds') + 'Z' if value is not None else None
+
+
+def data_version(conn: Connection) -> str:
+    """
+    数据版本：指标、应用或公司信息有写入时变化（主键与 updated_at 的最大值，均走索引或小表）
+
+    Returns:
+        str: 版本字符串，用于缓存失效和 ETag
+    """
+    metric_id, app_id, company_at = conn.execute(select(
+        select(func.max(Metric.id)).scalar_subquery(),
+        select(func.max(App.id)).scalar_subquery(),
+        select(func.max(CompanyInfo.updated_at)).scalar_subquery(),
+    )).one()
+    return f"{metric_id or 0}.{app_id or 0}.{company_at or ''}"
+
+
+def _latest_metric_id():
+    """每个应用最新一条指标的 ID（相关子查询，走 (app_id, timestamp) 索引）"""
+    latest = aliased(Metric)
+    return (
+        select(latest.id)
+        .where(latest.app_id == App.id)
+        .order_by(latest.timestamp.desc(), latest.id.desc())
+        .limit(1)
+        .correlate(App)
+        .scalar_subquery()
+    )
+
+
+def _app_row(row) -> Dict[str, Any]:
+    return {
+        'id': row.id,
+        'app_identifier': row.app_identifier,
+        'name': row.name,
+        'developer': row.developer,
+        'category': row.category,
+        'url': row.url,
+        'rating': row.rating,
+        'rating_count': row.rating_count,
+        'version': row.version,
+        'updated_at': isoformat(row.timestamp),
+    }
+
+
+def list_apps(conn: Connection, limit: int = 50, offset: int = 0,
+              category: Optional[str] = None) -> Dict[str, Any]:
+    """
+    应用列表及最新指标，按评论数降序
+
+    Args:
+        conn: 数据库连接
+        limit: 返回数量
+        offset: 偏移量
+        category: 只返回该类别
+
+    Returns:
+        Dict: total / items
+    """
+    stmt = select(*APP_FIELDS, *METRIC_FIELDS).join(Metric, Metric.id == _latest_metric_id())
+    # 与 items 一致：只统计有指标的应用（榜单新发现、尚未采集的应用不计入）
+    count = select(func.count(App.id)).where(select(Metric.id).where(Metric.app_id == App.id).exists())
+    if category:
+        stmt = stmt.where(App.category == category)
+        count = count.where(App.category == category)
+    stmt = stmt.order_by(Metric.rating_count.desc(), App.id).limit(limit).offset(offset)
+
+    return {
+        'total': conn.execute(count).scalar(),
+        'limit': limit,
+        'offset': offset,
+        'items': [_app_row(row) for row in conn.execute(stmt)],
+    }
+
+
+def get_app(conn: Connection, app_id: int, versions: int = 20) -> Dict[str, Any]:
+    """
+    单个应用：基本信息、最新指标、描述、公司信息和最近的版本
+
+    Raises:
+        NotFound: 应用不存在
+    """
+    row = conn.execute(
+        select(*APP_FIELDS, *METRIC_FIELDS, App.first_tracked_at, App.company_id,
+               AppDescription.description)
+        .select_from(App)
+        .outerjoin(Metric, Metric.id == _latest_metric_id())
+        .outerjoin(AppDescription, AppDescription.app_id == App.id)
+        .where(App.id == app_id)
+    ).first()
+    if row is None:
+        raise NotFound(f"App {app_id} not found")
+
+    app = _app_row(row)
+    app['first_tracked_at'] = isoformat(row.first_tracked_at)
+    app['description'] = row.description or ''
+
+    company = None
+    if row.company_id is not None:
+        info = conn.execute(select(CompanyInfo).where(CompanyInfo.id == row.company_id)).first()
+        if info is not None and info.source is not None:
+            company = {
+                'name': info.company_name,
+                'employee_count_min': info.employee_count_min,
+                'employee_count_max': info.employee_count_max,
+                'funding_total': info.funding_total,
+                'funding_stage': info.funding_stage,
+                'last_funding_date': isoformat(info.last_funding_date),
+                'headquarters': info.headquarters,
+                'founded_year': info.founded_year,
+            }
+    app['company'] = company
+
+    app['versions'] = [
+        {'version': version, 'released_at': isoformat(released_at or first_seen_at)}
+        for version, released_at, first_seen_at in conn.execute(
+            select(AppVersion.version, AppVersion.released_at, AppVersion.first_seen_at)
+            .where(AppVersion.app_id == app_id)
+            .order_by(AppVersion.released_at.desc(), AppVersion.id.desc())
+            .limit(versions)
+        )
+    ]
+    return app
+
+
+def leaderboard(conn: Connection, by: str = 'reviews', limit: int = 20,
+                category: Optional[str] = None, days: int = 7,
+                min_reviews: int = 100) -> Dict[str, Any]:
+    """
+    排行榜
+
+    Args:
+        conn: 数据库连接
+        by: reviews（评论数）/ rating（评分，至少 min_reviews 条评论）/ growth（days 天内评论增量）
+        limit: 返回数量
+        category: 只统计该类别
+        days: growth 的时间窗口，以最新一条指标的时间为终点
+        min_reviews: rating 榜的最少评论数
+
+    Returns:
+        Dict: 榜单参数和 items
+    """
+    if by not in LEADERBOARDS:
+        raise ValueError(f"Unknown leaderboard: {by} (available: {', '.join(LEADERBOARDS)})")
+
+    stmt = select(*APP_FIELDS, *METRIC_FIELDS).join(Metric, Metric.id == _latest_metric_id())
+    if category:
+        stmt = stmt.where(App.category == category)
+    result: Dict[str, Any] = {'by': by, 'category': category}
+
+    if by == 'reviews':
+        stmt = stmt.order_by(Metric.rating_count.desc(), App.id)
+    elif by == 'rating':
+        stmt = (stmt.where(Metric.rating_count >= min_reviews)
+                .order_by(Metric.rating.desc(), Metric.rating_count.desc(), App.id))
+        result['min_reviews'] = min_reviews
+    else:
+        latest_at = conn.execute(select(func.max(Metric.timestamp))).scalar()
+        since = (latest_at or datetime.utcnow()) - timedelta(days=days)
+        # 窗口起点之前的最后一条；窗口内才开始采集的应用取窗口内的第一条
+        past = aliased(Metric)
+        before = (
+            select(past.rating_count)
+            .where(past.app_id == App.id, past.timestamp <= since)
+            .order_by(past.timestamp.desc()).limit(1).correlate(App).scalar_subquery()
+        )
+        first = (
+            select(past.rating_count)
+            .where(past.app_id == App.id, past.timestamp > since)
+            .order_by(past.timestamp).limit(1).correlate(App).scalar_subquery()
+        )
+        growth = (Metric.rating_count - func.coalesce(before, first)).label('growth')
+        stmt = stmt.add_columns(growth).order_by(growth.desc(), App.id)
+        result.update({'days': days, 'since': isoformat(since)})
+
+    items = []
+    for rank, row in enumerate(conn.execute(stmt.limit(limit)), 1):
+        item = {'rank': rank, **_app_row(row)}
+        if by == 'growth':
+            item['growth'] = row.growth
+        items.append(item)
+    result['items'] = items
+    return result
+
+
+def categories(conn: Connection) -> Dict[str, Any]:
+    """各类别的应用数量"""
+    rows = conn.execute(
+        select(App.category, func.count(App.id).label('apps'))
+        .group_by(App.category)
+        .order_by(func.count(App.id).desc())
+    )
+    return {'items': [{'category': category, 'apps': count} for category, count in rows]}
+
+
+def search(conn: Connection, query: str, limit: int = 20) -> Dict[str, Any]:
+    """全文检索（见 storage.search）"""
+    return {'query': query, 'items': search_apps(query, limit=limit, engine=conn.engine)}
+
+
+def app_exists(conn: Connection, app_id: int) -> bool:
+    return conn.execute(select(App.id).where(App.id == app_id)).first() is not None
+
+
+def iter_history(conn: Connection, app_id: int, start: datetime, end: Optional[datetime] = None,
+                 batch_size: int = 1000) -> Iterator[List[list]]:
+    """
+    按时间升序流式读取应用的指标历史
+
+    Args:
+        conn: 数据库连接（迭代期间保持打开）
+        app_id: 应用 ID
+        start: 起始时间（含）
+        end: 结束时间（含），默认不限
+        batch_size: 每批行数
+
+    Yields:
+        List[list]: 一批数据点，列顺序见 HISTORY_COLUMNS
+    """
+    stmt = (
+        select(*(getattr(Metric, column) for column in HISTORY_COLUMNS))
+        .where(Metric.app_id == app_id, Metric.timestamp >= start)
+        .order_by(Metric.timestamp, Metric.id)
+    )
+    if end is not None:
+        stmt = stmt.where(Metric.timestamp <= end)
+
+    result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+    for partition in result.partitions():
+        yield [[isoformat(row[0]), *row[1:]] for row in partition]
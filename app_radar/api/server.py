@@ -0,0 +1,375 @@
+"""
+App Radar Agent - 只读查询 API
+本地 JSON HTTP 服务：应用列表、最新指标、历史区间、排行榜和全文检索，供看板轮询
+
+- 数据版本（指标 / 应用 / 公司信息的写入）最多每 api_version_interval 秒查询一次
+- 同一数据版本下的响应缓存在内存中（LRU），重复请求不访问 SQLite
+- ETag 由数据版本和请求决定，If-None-Match 命中时直接返回 304
+- 历史区间查询以 chunked 编码边读边写，不在内存中拼出完整响应
+
+端点：
+    GET /health
+    GET /apps?limit=&offset=&category=
+    GET /apps/<id>
+    GET /apps/<id>/history?start=&end=     （ISO 8601，默认最近 30 天）
+    GET /leaderboards/<reviews|rating|growth>?limit=&category=&days=&min_reviews=
+    GET /categories
+    GET /search?q=&limit=
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit, urlencode
+
+from sqlalchemy.engine import Engine
+
+from app_radar.api import queries
+from app_radar.config.settings import settings
+from app_radar.storage.database import engine as default_engine
+from app_radar.utils import monitoring
+
+
+MAX_LIMIT = 500
+DEFAULT_HISTORY_DAYS = 30
+
+
+class BadRequest(ValueError):
+    """请求参数无效"""
+
+
+def _int_param(params: Dict[str, str], name: str, default: int,
+               low: int = 0, high: Optional[int] = None) -> int:
+    value = params.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if number < low or (high is not None and number > high):
+        raise BadRequest(f"{name} must be between {low} and {high}" if high is not None
+                         else f"{name} must be >= {low}")
+    return number
+
+
+def _time_param(params: Dict[str, str], name: str) -> Optional[datetime]:
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise BadRequest(f"{name} must be an ISO 8601 time, e.g. 2025-01-31 or 2025-01-31T08:00:00Z")
+    if parsed.tzinfo is not None:
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return parsed
+
+
+class DataVersion:
+    """最多每 interval 秒查询一次的数据版本"""
+
+    def __init__(self, bind: Engine, interval: float):
+        self.bind = bind
+        self.interval = interval
+        self._value: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> str:
+        with self._lock:
+            now = time.monotonic()
+            if self._value is None or now - self._checked_at >= self.interval:
+                with self.bind.connect() as conn:
+                    self._value = queries.data_version(conn)
+                self._checked_at = now
+            return self._value
+
+
+class ResponseCache:
+    """按请求缓存序列化后的响应体（LRU，条目带 ETag，数据版本变化后自然失效）"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[str, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                self.misses += 1
+                monitoring.inc('app_radar_cache_total', cache='api', result='miss')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        monitoring.inc('app_radar_cache_total', cache='api', result='hit')
+        return entry[1]
+
+    def put(self, key: str, etag: str, body: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ApiServer:
+    """
+    只读查询 API 服务
+
+    用法：
+        with ApiServer(port=8765) as api:
+            print(api.url)
+        # 或前台运行
+        ApiServer(port=8765).serve_forever()
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, bind: Engine = default_engine,
+                 cache_entries: Optional[int] = None, version_interval: Optional[float] = None):
+        self.bind = bind
+        self.version = DataVersion(bind, settings.api_version_interval
+                                   if version_interval is None else version_interval)
+        self.cache = ResponseCache(settings.api_cache_entries
+                                   if cache_entries is None else cache_entries)
+        # (路径正则, 端点名, 处理函数, 是否流式)
+        self.routes = [
+            (re.compile(r'/health'), 'health', self._health, False),
+            (re.compile(r'/apps'), 'apps', self._apps, False),
+            (re.compile(r'/apps/(\d+)'), 'app', self._app, False),
+            (re.compile(r'/apps/(\d+)/history'), 'history', self._history, True),
+            (re.compile(r'/leaderboards/(\w+)'), 'leaderboard', self._leaderboard, False),
+            (re.compile(r'/categories'), 'categories', self._categories, False),
+            (re.compile(r'/search'), 'search', self._search, False),
+        ]
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # === 端点 ===
+
+    def _health(self, conn, params, version):
+        return {'status': 'ok', 'data_version': version}
+
+    def _apps(self, conn, params, version):
+        return queries.list_apps(
+            conn,
+            limit=_int_param(params, 'limit', 50, 1, MAX_LIMIT),
+            offset=_int_param(params, 'offset', 0),
+            category=params.get('category') or None,
+        )
+
+    def _app(self, conn, params, version, app_id):
+        return queries.get_app(conn, int(app_id))
+
+    def _leaderboard(self, conn, params, version, by):
+        if by not in queries.LEADERBOARDS:
+            raise queries.NotFound(f"Unknown leaderboard: {by} "
+                                   f"(available: {', '.join(queries.LEADERBOARDS)})")
+        return queries.leaderboard(
+            conn, by=by,
+            limit=_int_param(params, 'limit', 20, 1, MAX_LIMIT),
+            category=params.get('category') or None,
+            days=_int_param(params, 'days', 7, 1, 3650),
+            min_reviews=_int_param(params, 'min_reviews', 100),
+        )
+
+    def _categories(self, conn, params, version):
+        return queries.categories(conn)
+
+    def _search(self, conn, params, version):
+        query = params.get('q', '').strip()
+        if not query:
+            raise BadRequest("q is required")
+        return queries.search(conn, query, limit=_int_param(params, 'limit', 20, 1, MAX_LIMIT))
+
+    def _history(self, conn, params, version, app_id) -> Iterator[bytes]:
+        """流式输出：先写头部，再按批写数据点"""
+        app_id = int(app_id)
+        end = _time_param(params, 'end')
+        start = _time_param(params, 'start') or (end or datetime.utcnow()) - timedelta(days=DEFAULT_HISTORY_DAYS)
+        if not queries.app_exists(conn, app_id):
+            raise queries.NotFound(f"App {app_id} not found")
+
+        def stream():
+            header = {'app_id': app_id, 'start': queries.isoformat(start),
+                      'end': queries.isoformat(end), 'columns': list(queries.HISTORY_COLUMNS)}
+            yield json.dumps(header)[:-1].encode('utf-8') + b', "points": ['
+            first = True
+            for batch in queries.iter_history(conn, app_id, start, end):
+                chunk = ','.join(json.dumps(point, separators=(',', ':')) for point in batch)
+                yield (chunk if first else ',' + chunk).encode('utf-8')
+                first = False
+            yield b']}'
+        return stream()
+
+    # === 请求处理 ===
+
+    def _route(self, path: str) -> Optional[Tuple[str, Callable, bool, tuple]]:
+        for pattern, name, handler, streamed in self.routes:
+            match = pattern.fullmatch(path)
+            if match:
+                return name, handler, streamed, match.groups()
+        return None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _headers(self, status: int, etag: Optional[str] = None,
+                         length: Optional[int] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                if etag:
+                    self.send_header('ETag', etag)
+                if length is None:
+                    self.send_header('Transfer-Encoding', 'chunked')
+                else:
+                    self.send_header('Content-Length', str(length))
+                self.end_headers()
+
+            def _send(self, status: int, body: bytes = b'', etag: Optional[str] = None):
+                self._headers(status, etag, len(body))
+                if body and self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def _error(self, status: int, message: str):
+                self._send(status, json.dumps({'error': message}).encode('utf-8'))
+
+            def _stream(self, chunks: Iterator[bytes], etag: str):
+                self._headers(200, etag)
+                if self.command == 'HEAD':
+                    self.wfile.write(b'0\r\n\r\n')
+                    return
+                for chunk in chunks:
+                    if chunk:
+                        self.wfile.write(f"{len(chunk):X}\r\n".encode('ascii') + chunk + b'\r\n')
+                self.wfile.write(b'0\r\n\r\n')
+
+            def do_GET(self):
+                started = time.perf_counter()
+                endpoint, status = 'unknown', 200
+                try:
+                    endpoint, status = self._handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+                finally:
+                    monitoring.inc('app_radar_api_requests_total', endpoint=endpoint, status=status)
+                    monitoring.observe('app_radar_api_request_seconds',
+                                       time.perf_counter() - started, endpoint=endpoint)
+
+            do_HEAD = do_GET
+
+            def _handle(self) -> Tuple[str, int]:
+                url = urlsplit(self.path)
+                route = server._route(url.path.rstrip('/') or '/')
+                if route is None:
+                    self._error(404, f"Unknown endpoint: {url.path}")
+                    return 'unknown', 404
+                name, handler, streamed, args = route
+                params = dict(parse_qsl(url.query))
+
+                # 同一数据版本下，相同的路径和参数得到相同的响应
+                version = server.version.current()
+                key = f"{url.path}?{urlencode(sorted(params.items()))}"
+                etag = '"' + hashlib.sha1(f"{version}|{key}".encode('utf-8')).hexdigest()[:24] + '"'
+                if _etag_matches(self.headers.get('If-None-Match'), etag):
+                    self._send(304, etag=etag)
+                    return name, 304
+
+                if not streamed:
+                    body = server.cache.get(key, etag)
+                    if body is not None:
+                        self._send(200, body, etag)
+                        return name, 200
+
+                try:
+                    with server.bind.connect() as conn:
+                        result = handler(conn, params, version, *args)
+                        if streamed:
+                            # 连接在流式写出期间保持打开；头部发出后出错只能断开连接
+                            try:
+                                self._stream(result, etag)
+                            except (BrokenPipeError, ConnectionResetError):
+                                raise
+                            except Exception as e:
+                                print(f"❌ API {url.path}: {e}")
+                                self.close_connection = True
+                                return name, 500
+                            return name, 200
+                except queries.NotFound as e:
+                    self._error(404, str(e))
+                    return name, 404
+                except (BadRequest, ValueError) as e:
+                    self._error(400, str(e))
+                    return name, 400
+                except (BrokenPipeError, ConnectionResetError):
+                    raise
+                except Exception as e:
+                    print(f"❌ API {url.path}: {e}")
+                    self._error(500, 'Internal error')
+                    return name, 500
+
+                body = json.dumps(result, ensure_ascii=False, default=str).encode('utf-8')
+                server.cache.put(key, etag, body)
+                self._send(200, body, etag)
+                return name, 200
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'ApiServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='api-server',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """前台运行直到中断"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'ApiServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -2,17 +2,69 @@
 App Radar Agent - CLI 入口
 命令行界面，支持数据采集、分析、报告生成
 """
+import json
+import signal
 import sys
 import time
-from typing import List, Optional
-from datetime import datetime
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
 
 # 本地导入
 from app_radar.config.settings import settings, ensure_directories
-from app_radar.storage.database import init_db, get_db_session, App, Metric
+from app_radar.config.watchlists import DEFAULT_WATCHLIST, Watchlist, WatchlistConfigError
+from app_radar.storage.database import App, init_db, get_db_session, save_app_snapshot
+from app_radar.models.snapshot import AppSnapshot
+from app_radar.storage.search import search_apps
+from app_radar.data_sources.base import BaseDataSource
 from app_radar.data_sources.itunes import ITunesDataSource
+from app_radar.data_sources.reviews import FixtureReviewsSource
+from app_radar.data_sources.top_charts import FixtureChartsSource, configured_chart_keys
+from app_radar.storage.outbox import (
+    STATUS_DEAD, STATUS_PENDING, enqueue, outbox_counts, requeue_dead
+)
 from app_radar.reporting.slack import SlackReporter
-from app_radar.reporting.charts import ChartGenerator
+from app_radar.reporting.renderers import render_report, rows_from_apps, rows_from_db
+from app_radar.reporting.delta import compute_delta, latest_metric_time, record_report_snapshot
+from app_radar.integrations.slack_webhook import chunk_message
+from app_radar.integrations.outbox_deliverer import OutboxDeliverer
+from app_radar.reporting.charts import build_chart_jobs, downsample_history, render_charts, slugify
+from app_radar.reporting.chart_cache import ChartCache
+from app_radar.scheduler.daemon import Daemon, RunLock, RunLockBusy
+from app_radar.scheduler.planner import FetchPlan, build_fetch_plan, unique_snapshots
+from app_radar.scheduler.worker import FetchWorker
+from app_radar.storage.jobs import (
+    STATUS_FAILED, STATUS_LEASED, STATUS_QUEUED, cycle_counts, cycle_results, enqueue_cycle
+)
+from app_radar.storage.history import load_metric_history
+from app_radar.storage.synthetic import generate_dataset
+from app_radar.storage.watchlist import tracked_app_terms, watchlist_terms
+from app_radar.storage.checkpoints import (
+    PIPELINE_STAGES, RUN_COMPLETED, RUN_FAILED, RUN_INTERRUPTED, RUN_KEY, STAGE_CHARTED,
+    STAGE_FETCHED, STAGE_RANKED, STAGE_REPORTED, STAGE_WRITTEN, find_resumable_run, finish_run,
+    load_checkpoints, reopen_run, save_checkpoint, start_run
+)
+from app_radar.analytics.similarity import SimilarityIndex
+from app_radar.analytics.insights import InsightGenerator, default_insight_client
+from app_radar.analytics.cadence import cadence_by_identifier
+from app_radar.analytics.enrichment import (
+    default_company_source, enrich_companies, load_company_profiles
+)
+from app_radar.analytics.rankings import apply_chart_ranks, default_chart_source, ingest_top_charts
+from app_radar.analytics.reviews import default_review_source, ingest_reviews
+from app_radar.api.server import ApiServer
+from app_radar.utils import monitoring, profiling
+
+
+@contextmanager
+def pipeline_stage(name: str):
+    """流程阶段：记录耗时指标，--profile 时同时剖析"""
+    with monitoring.stage(name), profiling.stage(name):
+        yield
 
 
 def print_banner():
@@ -26,72 +78,92 @@ def print_banner():
     print(banner)
 
 
-def fetch_all_apps(target_apps: Optional[List[str]] = None) -> List[dict]:
+def default_target_apps() -> List[str]:
+    """默认采集列表：配置中的 target_apps + 关注列表（榜单自动发现的应用按 trackId 采集）"""
+    db = get_db_session()
+    try:
+        return tracked_app_terms(db)
+    finally:
+        db.close()
+
+
+def fetch_all_apps(target_apps: Optional[List[str]] = None,
+                   source: Optional[ITunesDataSource] = None,
+                   run_id: Optional[str] = None) -> Dict[str, AppSnapshot]:
     """
     采集所有目标应用数据
 
     Args:
-        target_apps: 目标应用列表，如果为 None 则使用配置文件中的列表
+        target_apps: 目标应用列表，如果为 None 则使用配置中的列表和关注列表
+        source: 复用的数据源（常驻模式下保持 HTTP 连接），默认新建
+        run_id: 运行 ID；提供时按应用记录检查点，继续运行时跳过已完成的应用
 
     Returns:
-        List[dict]: 应用数据列表
+        Dict[str, AppSnapshot]: 采集标识 -> 应用数据（只包含采集成功的应用）
     """
     if target_apps is None:
-        target_apps = settings.target_apps
+        target_apps = default_target_apps()
 
     print(f"\n🔍 开始采集 {len(target_apps)} 款应用数据...\n")
 
-    itunes = ITunesDataSource()
+    itunes = source or ITunesDataSource()
     db = get_db_session()
-    apps_data = []
+    apps_data: Dict[str, AppSnapshot] = {}
+
+    fetched: Dict[str, dict] = {}
+    written: Dict[str, dict] = {}
+    if run_id:
+        fetched = load_checkpoints(db, run_id, STAGE_FETCHED)
+        written = load_checkpoints(db, run_id, STAGE_WRITTEN)
+        if fetched:
+            print(f"♻️  检查点: 已采集 {len(fetched)} 款, 已写入 {len(written)} 款\n")
 
     for i, app_name in enumerate(target_apps, 1):
         print(f"[{i}/{len(target_apps)}] Fetching {app_name}...", end=" ")
 
+        if app_name in written:
+            apps_data[app_name] = AppSnapshot.from_dict(fetched[app_name]['data'])
+            print("↩️  已完成 (检查点)")
+            continue
+
         try:
-            # 从 iTunes 获取数据
-            result = itunes.fetch_with_retry(app_name)
-            data = result.data
-
-            # 保存到数据库
-            app_record = db.query(App).filter_by(
-                app_identifier=result.app_identifier
-            ).first()
-
-            if not app_record:
-                # 创建新记录
-                app_record = App(
-                    app_identifier=result.app_identifier,
-                    name=data['name'],
-                    platform='ios',
-                    developer=data['developer'],
-                    category=data['category'],
-                    url=data['url']
-                )
-                db.add(app_record)
+            checkpoint = fetched.get(app_name)
+            if checkpoint is None:
+                # 从 iTunes 获取数据
+                result = itunes.fetch_with_retry(app_name)
+                app_identifier, source_name, data = result.app_identifier, result.source, result.data
+                if run_id:
+                    save_checkpoint(db, run_id, STAGE_FETCHED, app_name, {
+                        'app_identifier': app_identifier,
+                        'source': source_name,
+                        'data': data.to_dict(),
+                    })
+                    db.commit()
+                fetched_now = True
+            else:
+                app_identifier, source_name = checkpoint['app_identifier'], checkpoint['source']
+                data = AppSnapshot.from_dict(checkpoint['data'])
+                fetched_now = False
+
+            # 保存到数据库（与 written 检查点同一事务，继续运行时不会重复写入）
+            save_app_snapshot(db, app_identifier, data, source=source_name)
+            if run_id:
+                save_checkpoint(db, run_id, STAGE_WRITTEN, app_name)
+            with monitoring.timed('app_radar_db_write_seconds', op='commit'):
                 db.commit()
-                db.refresh(app_record)
-
-            # 添加指标记录
-            metric = Metric(
-                app_id=app_record.id,
-                rating=data['rating'],
-                rating_count=data['rating_count'],
-                version=data['version'],
-                source='itunes'
-            )
-            db.add(metric)
-            db.commit()
 
             # 添加到结果列表
-            apps_data.append(data)
+            apps_data[app_name] = data
 
-            print(f"✅ {data['rating']:.1f}⭐ ({data['rating_count']:,} reviews)")
+            print(f"✅ {data.rating:.1f}⭐ ({data.rating_count:,} reviews)"
+                  + ("" if fetched_now else " (复用检查点)"))
 
             # 遵守 API 限流
-            time.sleep(0.5)
+            if fetched_now:
+                time.sleep(settings.fetch_interval)
 
         except Exception as e:
+            db.rollback()
             print(f"❌ Error: {e}")
             continue
 
@@ -101,35 +173,178 @@ def fetch_all_apps(target_apps: Optional[List[str]] = None) -> List[dict]:
     return apps_data
 
 
-def generate_charts(apps_data: List[dict]) -> List[str]:
+def fetch_apps_via_queue(target_apps: Optional[List[str]] = None,
+                         source: Optional[ITunesDataSource] = None,
+                         run_id: Optional[str] = None) -> Dict[str, AppSnapshot]:
+    """
+    通过任务队列采集：入队本轮任务，本进程作为一个 worker 参与，
+    再等待其他 worker 手上的任务完成或租约过期后被接手
+
+    Args:
+        target_apps: 目标应用列表，如果为 None 则使用配置中的列表和关注列表
+        source: 本进程 worker 使用的数据源
+        run_id: 运行 ID；继续运行时复用同一采集轮次，已完成的任务不会重新采集
+
+    Returns:
+        Dict[str, AppSnapshot]: 采集标识 -> 本轮成功采集的应用数据
+    """
+    if target_apps is None:
+        target_apps = default_target_apps()
+
+    db = get_db_session()
+    try:
+        previous = load_checkpoints(db, run_id, STAGE_FETCHED).get(RUN_KEY) if run_id else None
+        cycle_id, created = enqueue_cycle(db, target_apps,
+                                          cycle_id=previous['cycle_id'] if previous else None)
+        if run_id:
+            save_checkpoint(db, run_id, STAGE_FETCHED, RUN_KEY, {'cycle_id': cycle_id})
+        db.commit()
+    finally:
+        db.close()
+    print(f"\n📋 采集轮次 {cycle_id}: 入队 {created} 个任务\n")
+
+    worker = FetchWorker(source=source, cycle_id=cycle_id)
+    deadline = time.monotonic() + settings.cycle_wait_timeout
+    while True:
+        worker.run(until_idle=True)
+
+        db = get_db_session()
+        try:
+            counts = cycle_counts(db, cycle_id)
+        finally:
+            db.close()
+        outstanding = counts.get(STATUS_QUEUED, 0) + counts.get(STATUS_LEASED, 0)
+        if not outstanding:
+            break
+        if time.monotonic() > deadline:
+            print(f"⚠️  等待超时，仍有 {outstanding} 个任务未完成")
+            break
+        time.sleep(settings.worker_poll_interval)
+
+    db = get_db_session()
+    try:
+        apps_data = cycle_results(db, cycle_id)
+    finally:
+        db.close()
+
+    print(f"\n✅ 成功采集 {len(apps_data)}/{len(set(target_apps))} 款应用 "
+          f"(本进程 {worker.completed}, 失败 {counts.get(STATUS_FAILED, 0)})\n")
+    return apps_data
+
+
+def enqueue_fetch_cycle(target_apps: Optional[List[str]] = None):
+    """只入队一轮采集任务（所有关注列表去重后的应用），由独立的 worker 进程执行"""
+    init_db()
+    db = get_db_session()
+    try:
+        cycle_id, created = enqueue_cycle(db, build_fetch_plan(db, target_apps).terms)
+        db.commit()
+    finally:
+        db.close()
+    print(f"📋 采集轮次 {cycle_id}: 入队 {created} 个任务")
+
+
+def run_worker(until_idle: bool = False, cycle_id: Optional[str] = None,
+               lease_seconds: Optional[int] = None):
+    """
+    运行采集 worker（SIGTERM / SIGINT 时处理完当前任务后退出）
+
+    Args:
+        until_idle: 队列为空时退出
+        cycle_id: 只处理指定轮次
+        lease_seconds: 租约时长
+    """
+    init_db()
+    worker = FetchWorker(cycle_id=cycle_id, lease_seconds=lease_seconds)
+
+    def handle_signal(signum, frame):
+        print(f"\n🛑 收到 {signal.Signals(signum).name}，处理完当前任务后退出")
+        worker.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    print(f"👷 Worker {worker.worker_id} 启动")
+    worker.run(until_idle=until_idle)
+    print(f"👋 Worker 退出: 完成 {worker.completed}, 失败 {worker.failed}, 租约丢失 {worker.lost}")
+
+
+def attach_release_cadence(apps_data: List[AppSnapshot]):
+    """
+    为应用数据附加版本发布节奏（中位间隔天数和加速/放缓标记）
+
+    Args:
+        apps_data: 应用数据列表（原地更新）
+    """
+    cadence = cadence_by_identifier([str(app.track_id) for app in apps_data])
+    for app in apps_data:
+        stats = cadence.get(str(app.track_id))
+        if stats and stats.median_days is not None:
+            app.cadence_median_days = stats.median_days
+            app.cadence_trend = stats.trend
+
+
+def enrich_company_info(apps_data: List[AppSnapshot]):
+    """
+    补全开发者公司信息并附加到应用数据（未配置数据源时跳过）
+
+    Args:
+        apps_data: 应用数据列表（原地更新）
+    """
+    identifiers = [str(app.track_id) for app in apps_data]
+    source = default_company_source()
+    if source is not None:
+        stats = enrich_companies(source, app_identifiers=identifiers)
+        print(f"🏢 公司信息: {stats.summary()}\n")
+
+    profiles = load_company_profiles(identifiers)
+    for app in apps_data:
+        profile = profiles.get(str(app.track_id))
+        if profile:
+            app.company = profile
+
+
+def generate_charts(apps_data: List[AppSnapshot], cache: Optional[ChartCache] = None,
+                    output_dir: Optional[Path] = None) -> List[str]:
     """
     生成数据可视化图表
 
     Args:
         apps_data: 应用数据列表
+        cache: 复用的图表缓存，默认按配置新建
+        output_dir: 输出目录，默认 charts_dir
 
     Returns:
         List[str]: 生成的图表文件路径列表
     """
+    output_dir = output_dir or settings.charts_dir
     print("📊 生成数据可视化图表...\n")
 
-    generator = ChartGenerator(settings.charts_dir)
     chart_paths = []
 
     try:
-        # 评分散点图
-        path1 = generator.create_rating_scatter(apps_data)
-        chart_paths.append(str(path1))
+        # 评论数 TOP N 应用的真实历史（按 trackId 查询，LTTB 降采样到固定点数）
+        top_apps = sorted(apps_data, key=lambda x: x.rating_count, reverse=True
+                          )[:settings.chart_history_series]
+        names = [app.name for app in top_apps]
+        labels = {
+            str(app.track_id): app.name if names.count(app.name) == 1
+            else f"{app.name} ({app.developer})"
+            for app in top_apps
+        }
+        history = downsample_history(load_metric_history(
+            list(labels), start=datetime.utcnow() - timedelta(days=settings.chart_history_days)
+        ), labels)
 
-        # 增长趋势图
-        path2 = generator.create_growth_trend(apps_data)
-        chart_paths.append(str(path2))
+        jobs = build_chart_jobs(
+            apps_data,
+            per_category=settings.chart_per_category,
+            per_app=settings.chart_per_app,
+            history=history
+        )
+        chart_paths = [str(p) for p in render_charts(jobs, output_dir, cache=cache)]
 
-        # 类别分布图
-        path3 = generator.create_category_distribution(apps_data)
-        chart_paths.append(str(path3))
-
-        print(f"\n✅ 生成 {len(chart_paths)} 张图表\n")
+        print(f"✅ 生成 {len(chart_paths)} 张图表 → {output_dir}\n")
 
     except Exception as e:
         print(f"⚠️  图表生成失败: {e}\n")
@@ -137,69 +352,793 @@ def generate_charts(apps_data: List[dict]) -> List[str]:
     return chart_paths
 
 
-def send_to_slack(apps_data: List[dict], top_n: int = 10):
+def load_similarity_index() -> SimilarityIndex:
+    """加载相似度索引（新建或维度配置变化时使用 SIMILARITY_FEATURES）"""
+    return SimilarityIndex.load(settings.similarity_index_path,
+                                n_features=settings.similarity_features)
+
+
+def update_similarity_index(apps_data: List[AppSnapshot],
+                            index: Optional[SimilarityIndex] = None) -> SimilarityIndex:
     """
-    发送报告到 Slack
+    增量更新竞品相似度索引（仅重建描述发生变化的应用）
 
     Args:
         apps_data: 应用数据列表
-        top_n: 展示前 N 个应用
+        index: 已加载的索引（常驻模式下保留在内存中），默认从文件加载
+
+    Returns:
+        SimilarityIndex: 更新后的索引
     """
-    if not settings.slack_webhook_url:
-        print("⚠️  Slack Webhook URL 未配置，跳过推送")
-        print("   请在 .env 文件中设置 SLACK_WEBHOOK_URL\n")
+    if index is None:
+        index = load_similarity_index()
+    changed = index.update_from_apps(apps_data)
+    if changed:
+        index.save(settings.similarity_index_path)
+    print(f"🧭 相似度索引: {len(index)} 款应用, 本次更新 {changed} 款\n")
+    return index
+
+
+def show_similar_apps(app_name: str, k: int = 10):
+    """
+    打印与指定应用最相似的竞品
+
+    Args:
+        app_name: 应用名称
+        k: 返回数量
+    """
+    index = load_similarity_index()
+    app_id = index.find(app_name)
+    if app_id is None:
+        print(f"❌ 索引中没有找到应用: {app_name}（请先运行一次采集）")
         return
 
-    print(f"📤 发送报告到 Slack (TOP {top_n})...\n")
+    print(f"\n🧭 与 {app_name} 最相似的 {k} 款应用:\n")
+    for i, (_, name, score) in enumerate(index.similar(app_id, k=k), 1):
+        print(f"{i:>3}. {name:<40} {score:.3f}")
+    print()
+
+
+def search_catalogue(query: str, limit: int = 20):
+    """
+    全文检索已采集的应用并打印结果
+
+    Args:
+        query: 检索词
+        limit: 返回数量
+    """
+    init_db()
+    started = time.perf_counter()
+    results = search_apps(query, limit=limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"\n🔎 \"{query}\": {len(results)} 条结果 ({elapsed_ms:.1f} ms)\n")
+    for i, row in enumerate(results, 1):
+        print(f"{i:>3}. {row['name']} — {row['developer'] or 'Unknown'} [{row['category'] or '-'}]")
+        if row['snippet']:
+            print(f"     {row['snippet']}")
+    print()
+
 
-    reporter = SlackReporter(settings.slack_webhook_url)
+def generate_insights(apps_data: List[AppSnapshot], top_n: int = 10) -> Dict[str, str]:
+    """
+    为报告中的 TOP N 应用生成 LLM 洞察（未配置 API Key 时跳过，INSIGHT_CLIENT=stub 时使用本地桩）
+
+    Args:
+        apps_data: 应用数据列表
+        top_n: 需要生成洞察的应用数量
 
+    Returns:
+        Dict[str, str]: 应用 trackId -> 洞察文本
+    """
     try:
-        success = reporter.send_report(apps_data, top_n=top_n)
-        if success:
-            print("✅ Slack 报告发送成功\n")
+        client = default_insight_client()
+    except ImportError as e:
+        print(f"⚠️  {e}\n")
+        return {}
+    if client is None:
+        return {}
+
+    print(f"🤖 生成 AI 洞察 (TOP {top_n}, {client.model})...\n")
+
+    generator = InsightGenerator(client)
+
+    top_apps = sorted(apps_data, key=lambda x: x.rating_count, reverse=True)[:top_n]
+    insights = generator.generate(top_apps)
+    print(f"✅ AI 洞察: {generator.stats.summary()}\n")
+    return insights
+
+
+def send_to_slack(apps_data: List[AppSnapshot], top_n: int = 10,
+                  app_insights: Optional[Dict[str, str]] = None,
+                  deliverer: Optional[OutboxDeliverer] = None,
+                  delta: bool = False,
+                  chart_paths: Optional[List[str]] = None,
+                  watchlist: Optional[Watchlist] = None):
+    """
+    渲染 Slack 报告并写入投递队列
+
+    报告先持久化到 outbox 表，由后台投递器发送；投递失败时保留在队列中，
+    下次运行（或 outbox 子命令）继续重试，无需重新采集。
+
+    Args:
+        apps_data: 应用数据列表
+        top_n: 展示前 N 个应用
+        app_insights: LLM 生成的单应用洞察
+        deliverer: 运行中的后台投递器，入队后立即唤醒
+        delta: 只发送相对上一次报告的变化
+        chart_paths: 要上传并嵌入报告的图表（需要 Bot Token）
+        watchlist: 命名关注列表：报告发往该列表的 Webhook，增量报告只对比列表中的应用；
+            默认发往 SLACK_WEBHOOK_URL
+
+    Returns:
+        Optional[int]: 入队的 outbox 记录 ID，未入队时为 None
+    """
+    name = watchlist.name if watchlist else None
+    webhook_url = watchlist.slack_webhook_url if watchlist else settings.slack_webhook_url
+    if not webhook_url:
+        if watchlist:
+            print(f"⚠️  关注列表 {name} 未配置 slack_webhook_url，跳过推送\n")
         else:
-            print("❌ Slack 报告发送失败\n")
+            print("⚠️  Slack Webhook URL 未配置，跳过推送")
+            print("   请在 .env 文件中设置 SLACK_WEBHOOK_URL\n")
+        return None
+
+    print(f"📤 发送报告到 Slack{f' [{name}]' if name else ''} (TOP {top_n})...\n")
+
+    reporter = SlackReporter(webhook_url)
+
+    db = get_db_session()
+    try:
+        if delta:
+            scope = [str(app.track_id) for app in apps_data] if watchlist else None
+            report = compute_delta(db, top_n=top_n, app_identifiers=scope, watchlist=name)
+            if report is None:
+                print("⚠️  没有可对比的指标数据，跳过推送\n")
+                return None
+            message = reporter.create_delta_message(report, watchlist=name)
+            snapshot_at, change_count = report.snapshot_at, len(report.changes)
+            print(f"🔍 相对上次报告有 {change_count} 个应用发生变化")
+        else:
+            chart_files = reporter.upload_charts(chart_paths) if chart_paths else None
+            message = reporter.create_message(apps_data, top_n=top_n, app_insights=app_insights,
+                                              chart_files=chart_files, watchlist=name)
+            snapshot_at, change_count = latest_metric_time(db), None
+
+        messages = chunk_message(message)
+        entry = enqueue(db, webhook_url, messages)
+        if snapshot_at is not None:
+            record_report_snapshot(db, 'delta' if delta else 'full', snapshot_at, top_n,
+                                   change_count=change_count, outbox_id=entry.id, watchlist=name)
+        db.commit()
+        print(f"📮 报告已入队 (#{entry.id}, {len(messages)} 条消息)\n")
     except Exception as e:
-        print(f"❌ 发送失败: {e}\n")
+        db.rollback()
+        print(f"❌ 入队失败: {e}\n")
+        return None
+    finally:
+        db.close()
+
+    if deliverer:
+        deliverer.wake()
+    return entry.id
+
+
+def write_reports(apps_data: Optional[List[AppSnapshot]], formats: List[str]):
+    """
+    单次遍历写出多种格式的文件报告
+
+    Args:
+        apps_data: 应用数据；为 None 时从数据库流式读取全部应用的最新快照
+        formats: 输出格式列表
+    """
+    if not formats:
+        return
+
+    print(f"📝 生成文件报告 ({', '.join(formats)})...")
+    rows = rows_from_apps(apps_data) if apps_data is not None else rows_from_db()
+    try:
+        paths = render_report(rows, formats)
+    except ValueError as e:
+        print(f"❌ {e}\n")
+        return
+    for path in paths.values():
+        print(f"   ✓ {path}")
+    print()
+
+
+def finish_deliveries(deliverer: OutboxDeliverer, stop: bool = True):
+    """
+    等待本次运行的投递完成（有上限），未完成的留在队列中
+
+    Args:
+        deliverer: 后台投递器
+        stop: 是否停止投递线程（常驻模式下保持运行）
+    """
+    drained = deliverer.drain(settings.outbox_drain_timeout)
+    if stop:
+        deliverer.stop()
+
+    db = get_db_session()
+    try:
+        counts = outbox_counts(db)
+    finally:
+        db.close()
+
+    if deliverer.delivered:
+        print(f"✅ Slack 报告发送成功 ({deliverer.delivered} 份)")
+    if not drained or counts.get(STATUS_PENDING):
+        print(f"⏳ {counts.get(STATUS_PENDING, 0)} 份报告待重试，将在下次运行时继续投递")
+    if counts.get(STATUS_DEAD):
+        print(f"❌ {counts[STATUS_DEAD]} 份报告投递失败，"
+              f"可用 `python -m app_radar.cli outbox --requeue-dead` 重新投递")
+    print()
+
 
+def show_outbox(requeue: bool = False):
+    """
+    查看投递队列并投递到期记录
+
+    Args:
+        requeue: 是否将 dead 记录重新置为待投递
+    """
+    init_db()
+
+    db = get_db_session()
+    try:
+        if requeue:
+            print(f"🔁 重新入队 {requeue_dead(db)} 条记录")
+            db.commit()
+        counts = outbox_counts(db)
+    finally:
+        db.close()
+
+    summary = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+    print(f"📮 Outbox: {summary or 'empty'}")
+
+    if counts.get(STATUS_PENDING):
+        deliverer = OutboxDeliverer()
+        deliverer.start()
+        finish_deliveries(deliverer)
 
-def run_full_pipeline(top_n: int = 10, target_apps: Optional[List[str]] = None):
+
+def generate_synthetic_dataset(apps: int, days: int, interval_hours: int, seed: int,
+                               batch_size: int, force: bool = False):
+    """
+    生成合成数据集（压测用）
+
+    Args:
+        apps: 应用数量
+        days: 指标历史天数
+        interval_hours: 采集间隔（小时）
+        seed: 随机种子
+        batch_size: 每批应用数
+        force: 数据库中已有应用时仍然写入
+    """
+    ensure_directories()
+    init_db()
+
+    db = get_db_session()
+    try:
+        existing = db.scalar(select(func.count(App.id)))
+    finally:
+        db.close()
+    if existing and not force:
+        print(f"❌ 数据库中已有 {existing:,} 款应用: {settings.database_url}")
+        print("   请用 DATABASE_URL 指定单独的数据库, 或加 --force 追加写入")
+        sys.exit(2)
+
+    steps = days * 24 // interval_hours
+    print(f"🧪 生成合成数据: {apps:,} 款应用 × {steps:,} 个时间点 → {settings.database_url}")
+
+    def report(stats):
+        rate = stats.metrics / stats.elapsed if stats.elapsed else 0
+        print(f"   {stats.apps:>9,}/{apps:,} 款应用, {stats.metrics:>12,} 条指标, "
+              f"{rate:,.0f} 条/秒", flush=True)
+
+    stats = generate_dataset(apps=apps, days=days, interval_hours=interval_hours, seed=seed,
+                             batch_size=batch_size, progress=report)
+    print(f"\n✅ {stats.summary()}")
+
+
+def ingest_charts(source: BaseDataSource, discover_top: Optional[int] = None) -> Optional[datetime]:
+    """
+    抓取配置中的所有榜单，写入排名快照并自动发现新上榜的应用
+
+    Args:
+        source: 榜单数据源
+        discover_top: 自动关注的名次上限，默认 watchlist_discover_top
+
+    Returns:
+        Optional[datetime]: 排名快照时间，没有抓到任何条目时为 None
+    """
+    keys = configured_chart_keys()
+    print(f"🏆 抓取 {len(keys)} 个榜单 ({', '.join(settings.top_chart_countries)})...")
+    stats = ingest_top_charts(source, keys, discover_top=discover_top)
+    print(f"🏆 榜单: {stats.summary()}\n")
+    return stats.snapshot_at if stats.ranks else None
+
+
+def update_top_charts(fixture: Optional[str] = None, discover_top: Optional[int] = None):
+    """
+    单独抓取一次榜单（不采集应用数据），新上榜的应用在下一轮流程中开始采集
+
+    Args:
+        fixture: 从本地 fixture 读取榜单，默认按 TOP_CHART_SOURCE 选择
+        discover_top: 自动关注的名次上限
+    """
+    ensure_directories()
+    init_db()
+    source = FixtureChartsSource({'path': fixture}) if fixture else default_chart_source()
+    ingest_charts(source, discover_top=discover_top)
+
+    db = get_db_session()
+    try:
+        watchlist = watchlist_terms(db, exclude_names=settings.target_apps)
+    finally:
+        db.close()
+    print(f"👀 关注列表: {len(watchlist)} 款应用 (与配置中的 {len(settings.target_apps)} 款一起采集)")
+
+
+def update_reviews(fixture: Optional[str] = None, max_pages: Optional[int] = None):
+    """
+    单独增量抓取一次所有已采集应用的新评论
+
+    Args:
+        fixture: 从本地 fixture 读取评论，默认按 REVIEW_SOURCE 选择
+        max_pages: 每个应用 / 国家最多翻页数，默认 REVIEW_MAX_PAGES
+    """
+    ensure_directories()
+    init_db()
+    source = FixtureReviewsSource({'path': fixture}) if fixture else default_review_source()
+    stats = ingest_reviews(source, max_pages=max_pages)
+    print(f"💬 评论: {stats.summary()}")
+
+
+def show_watchlists(target_apps: Optional[List[str]] = None):
+    """打印各关注列表和本轮的去重采集计划"""
+    init_db()
+    db = get_db_session()
+    try:
+        plan = build_fetch_plan(db, target_apps)
+    finally:
+        db.close()
+
+    print(f"\n🗂️  {plan.summary()}\n")
+    for watchlist in plan.lists:
+        target = "SLACK_WEBHOOK_URL" if watchlist.name == DEFAULT_WATCHLIST else (
+            "webhook" if watchlist.slack_webhook_url else "⚠️  未配置 webhook")
+        top = f", TOP {watchlist.top_n}" if watchlist.top_n else ""
+        print(f"  {watchlist.name}: {len(watchlist.apps)} 款应用 → {target}{top}")
+        if watchlist.apps:
+            print(f"     {', '.join(watchlist.apps)}")
+    print()
+
+
+def serve_api(host: Optional[str] = None, port: Optional[int] = None):
+    """
+    前台运行只读查询 API，Ctrl-C 退出
+
+    Args:
+        host: 监听地址，默认 API_HOST
+        port: 端口，默认 API_PORT
+    """
+    init_db()
+    server = ApiServer(host=host or settings.api_host,
+                       port=settings.api_port if port is None else port)
+    print(f"🌐 查询 API: {server.url}  (/apps, /apps/<id>/history, /leaderboards/<reviews|rating|growth>)")
+    print("   Ctrl-C 退出\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 已停止")
+
+
+@dataclass
+class PipelineResources:
+    """
+    流程运行所需的长生命周期资源
+
+    单次运行时随流程创建和释放；常驻模式下跨轮次复用（HTTP 连接、内存中的
+    相似度索引、图表缓存索引、后台投递线程），数据库引擎本身为模块级单例。
+    """
+    source: ITunesDataSource
+    deliverer: OutboxDeliverer
+    chart_source: Optional[BaseDataSource] = None  # 开启榜单采集时创建
+    review_source: Optional[BaseDataSource] = None  # 开启评论采集时创建
+    similarity_index: Optional[SimilarityIndex] = None
+    chart_cache: Optional[ChartCache] = None
+    metrics_server: Optional[monitoring.MetricsServer] = None
+    persistent: bool = False
+
+    @classmethod
+    def create(cls, persistent: bool = False) -> 'PipelineResources':
+        """初始化目录和数据库，并启动后台投递器"""
+        ensure_directories()
+        print("🗄️  初始化数据库...")
+        init_db()
+        print()
+
+        # 后台投递器：先补发上次未送达的报告，不阻塞采集
+        deliverer = OutboxDeliverer()
+        deliverer.start()
+
+        metrics_server = None
+        if monitoring.enabled() and settings.metrics_port is not None:
+            metrics_server = monitoring.MetricsServer(port=settings.metrics_port).start()
+            print(f"📈 指标端点: {metrics_server.url}\n")
+
+        return cls(
+            source=ITunesDataSource(),
+            deliverer=deliverer,
+            chart_source=default_chart_source() if settings.top_charts_enabled else None,
+            review_source=default_review_source() if settings.reviews_enabled else None,
+            metrics_server=metrics_server,
+            similarity_index=load_similarity_index() if persistent else None,
+            chart_cache=ChartCache() if persistent and settings.chart_cache_enabled else None,
+            persistent=persistent,
+        )
+
+    def finish_cycle(self):
+        """一轮结束：等待投递；非常驻时停止投递线程和指标端点"""
+        with pipeline_stage('deliver'):
+            finish_deliveries(self.deliverer, stop=not self.persistent)
+        if not self.persistent:
+            self._stop_metrics_server()
+
+    def _stop_metrics_server(self):
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+    def close(self):
+        """停止投递线程和指标端点（常驻模式退出时调用）"""
+        if self.deliverer.is_alive():
+            self.deliverer.stop()
+        self._stop_metrics_server()
+
+
+def start_pipeline_run(params: dict, resume: Optional[str] = None):
+    """
+    创建或继续一次运行
+
+    Args:
+        params: 本次运行参数（新建运行时记录）
+        resume: 要继续的 run id，'latest' 表示最近一次未完成的运行
+
+    Returns:
+        Tuple[str, dict]: (run id, 运行参数)；继续运行时返回记录中的参数
+    """
+    db = get_db_session()
+    try:
+        if resume is None:
+            run = start_run(db, params)
+            print(f"🆔 运行 {run.id}\n")
+            return run.id, params
+
+        run = find_resumable_run(db, None if resume == 'latest' else resume)
+        if run is None:
+            raise ValueError(f"No unfinished run to resume: {resume}")
+        reopen_run(db, run)
+        stages = [stage for stage in PIPELINE_STAGES if load_checkpoints(db, run.id, stage)]
+        print(f"♻️  继续运行 {run.id} (已完成阶段: {', '.join(stages) or '无'})\n")
+        return run.id, json.loads(run.params or '{}')
+    finally:
+        db.close()
+
+
+def run_full_pipeline(top_n: int = 10, target_apps: Optional[List[str]] = None,
+                      delta: bool = False, formats: Optional[List[str]] = None,
+                      resources: Optional[PipelineResources] = None,
+                      distributed: bool = False, resume: Optional[str] = None):
     """
     运行完整流程：采集 -> 分析 -> 图表 -> Slack
 
+    每次运行分配 run id，并按应用 / 阶段记录检查点；中断后用 resume 继续时
+    跳过已完成的部分，复用已采集的数据。
+
     Args:
         top_n: Slack 报告中展示的应用数量
         target_apps: 自定义目标应用列表
+        delta: 只报告相对上一次报告的变化
+        formats: 文件报告格式，默认使用配置中的 report_formats
+        resources: 复用的资源（常驻模式），默认为本次运行新建
+        distributed: 通过任务队列采集（可由多个 worker 进程分担）
+        resume: 继续指定的运行（run id 或 'latest'），参数沿用该运行的记录
     """
     print_banner()
 
-    # 确保目录存在
-    ensure_directories()
+    if resources is None:
+        resources = PipelineResources.create()
 
-    # 初始化数据库
-    print("🗄️  初始化数据库...")
-    init_db()
-    print()
+    run_id, params = start_pipeline_run({
+        'top_n': top_n,
+        'target_apps': target_apps,  # None: 配置中的列表 + 关注列表（在榜单阶段之后解析）
+        'delta': delta,
+        'formats': formats,
+        'distributed': distributed,
+    }, resume=resume)
+
+    started, baseline = time.time(), monitoring.REGISTRY.mark()
+    status = RUN_FAILED
+    try:
+        _run_stages(run_id, resources, **params)
+        status = RUN_COMPLETED
+    except KeyboardInterrupt:
+        status = RUN_INTERRUPTED
+        _finish_pipeline_run(run_id, status)
+        print(f"\n💾 进度已保存，继续运行: python3 -m app_radar --resume {run_id}")
+        raise
+    except Exception as e:
+        _finish_pipeline_run(run_id, status, str(e))
+        print(f"\n💾 进度已保存，继续运行: python3 -m app_radar --resume {run_id}")
+        raise
+    finally:
+        export_metrics(run_id, status, started, baseline)
+    _finish_pipeline_run(run_id, status)
+
+
+def export_metrics(run_id: str, status: str, started: float, baseline):
+    """写出本轮的 JSON 运行摘要和 Prometheus textfile，并打印各阶段耗时（未启用指标时跳过）"""
+    if not monitoring.enabled():
+        return
+    try:
+        summary_path = monitoring.write_run_summary(run_id, status, started, since=baseline)
+        textfile_path = monitoring.write_textfile()
+    except OSError as e:
+        print(f"⚠️  指标写出失败: {e}")
+        return
+
+    stages = monitoring.REGISTRY.snapshot(since=baseline)['histograms'].get(
+        'app_radar_stage_seconds', {}
+    )
+    if stages:
+        print("⏱️  阶段耗时: " + ", ".join(
+            f"{series.split('=', 1)[-1]} {values['sum']:.1f}s" for series, values in stages.items()
+        ))
+    print(f"📈 运行摘要 → {summary_path}, 指标 → {textfile_path}\n")
+
+
+def _finish_pipeline_run(run_id: str, status: str, error: Optional[str] = None):
+    db = get_db_session()
+    try:
+        finish_run(db, run_id, status, error)
+    finally:
+        db.close()
+
+
+def _save_stage(run_id: str, stage: str, data=None, key: str = RUN_KEY):
+    db = get_db_session()
+    try:
+        save_checkpoint(db, run_id, stage, key, data=data)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _report_key(watchlist: Watchlist) -> str:
+    """报告检查点的键：默认列表沿用整轮的 RUN_KEY"""
+    return RUN_KEY if watchlist.name == DEFAULT_WATCHLIST else watchlist.name
+
+
+def _chart_dir(watchlist: Watchlist) -> Path:
+    """图表输出目录：默认列表为 charts_dir，命名列表各自一个子目录（文件名相同，不能共用）"""
+    if watchlist.name == DEFAULT_WATCHLIST:
+        return settings.charts_dir
+    return settings.charts_dir / 'watchlists' / slugify(watchlist.name)
+
+
+def generate_watchlist_charts(run_id: str, resources: PipelineResources, plan: FetchPlan,
+                              fetched: Dict[str, AppSnapshot],
+                              charted: Dict[str, dict]) -> Dict[str, List[str]]:
+    """
+    为每个关注列表只用该列表的应用生成图表（图表缓存按内容复用，列表间重复的图表不会重新渲染）
+
+    Args:
+        run_id: 运行 ID
+        resources: 流程资源
+        plan: 本轮采集计划
+        fetched: 采集标识 -> 应用数据
+        charted: 已生成图表的检查点（列表 -> 图表路径），继续运行时复用仍存在的文件
+
+    Returns:
+        Dict[str, List[str]]: 报告检查点的键 -> 图表路径
+    """
+    chart_paths: Dict[str, List[str]] = {}
+    for watchlist in plan.lists:
+        key = _report_key(watchlist)
+        label = '' if watchlist.name == DEFAULT_WATCHLIST else f" [{watchlist.name}]"
+        done = charted.get(key)
+        if done and all(Path(p).exists() for p in done['paths']):
+            chart_paths[key] = done['paths']
+            print(f"↩️  复用已生成的{label} {len(done['paths'])} 张图表 (检查点)\n")
+            continue
+
+        apps = plan.snapshots_for(watchlist, fetched)
+        if not apps:
+            continue
+        if label:
+            print(f"🗂️  关注列表{label}")
+        chart_paths[key] = generate_charts(apps, cache=resources.chart_cache,
+                                           output_dir=_chart_dir(watchlist))
+        _save_stage(run_id, STAGE_CHARTED, {'paths': chart_paths[key]}, key=key)
+    return chart_paths
+
+
+def send_reports(run_id: str, resources: PipelineResources, plan: FetchPlan,
+                 fetched: Dict[str, AppSnapshot], reported: Dict[str, dict], top_n: int = 10,
+                 delta: bool = False, chart_paths: Optional[Dict[str, List[str]]] = None):
+    """
+    把本轮共享的采集结果分发到各关注列表的报告
+
+    AI 洞察对所有列表的 TOP 应用合并生成一次；图表按列表分别生成，文件报告各列表共用。
+
+    Args:
+        run_id: 运行 ID
+        resources: 流程资源
+        plan: 本轮采集计划
+        fetched: 采集标识 -> 应用数据
+        reported: 已入队报告的检查点（列表 -> outbox 记录）
+        top_n: 默认展示的应用数量（列表未配置 top 时）
+        delta: 只报告变化
+        chart_paths: 报告检查点的键 -> 要嵌入该列表报告的图表
+    """
+    chart_paths = chart_paths or {}
+    pending = []
+    for watchlist in plan.lists:
+        done = reported.get(_report_key(watchlist))
+        label = '' if watchlist.name == DEFAULT_WATCHLIST else f" [{watchlist.name}]"
+        if done:
+            print(f"↩️  报告{label}已入队 (#{done['outbox_id']}, 检查点)，跳过推送\n")
+            continue
+        apps = plan.snapshots_for(watchlist, fetched)
+        if not apps:
+            print(f"⚠️  关注列表{label}没有采集到数据，跳过推送\n")
+            continue
+        pending.append((watchlist, apps, watchlist.top_n or top_n))
+    if not pending:
+        return
+
+    # 生成 AI 洞察（增量报告不包含洞察）
+    with pipeline_stage('insights'):
+        app_insights = None
+        if not delta:
+            top_apps = unique_snapshots(
+                app for _, apps, n in pending
+                for app in sorted(apps, key=lambda x: x.rating_count, reverse=True)[:n]
+            )
+            app_insights = generate_insights(top_apps, top_n=len(top_apps))
+
+    with pipeline_stage('slack_report'):
+        for watchlist, apps, n in pending:
+            outbox_id = send_to_slack(
+                apps, top_n=n, app_insights=app_insights, deliverer=resources.deliverer,
+                delta=delta, chart_paths=chart_paths.get(_report_key(watchlist)),
+                watchlist=None if watchlist.name == DEFAULT_WATCHLIST else watchlist,
+            )
+            if outbox_id is not None:
+                _save_stage(run_id, STAGE_REPORTED, {'outbox_id': outbox_id},
+                            key=_report_key(watchlist))
+
+
+def _run_stages(run_id: str, resources: PipelineResources, top_n: int = 10,
+                target_apps: Optional[List[str]] = None, delta: bool = False,
+                formats: Optional[List[str]] = None, distributed: bool = False):
+    """按阶段执行流程，已有检查点的阶段直接跳过"""
+    db = get_db_session()
+    try:
+        ranked = load_checkpoints(db, run_id, STAGE_RANKED).get(RUN_KEY)
+        charted = load_checkpoints(db, run_id, STAGE_CHARTED)
+        reported = load_checkpoints(db, run_id, STAGE_REPORTED)
+    finally:
+        db.close()
+
+    # 榜单排名（新上榜的应用加入关注列表，本轮即开始采集）
+    snapshot_at = None
+    if ranked:
+        snapshot_at = datetime.fromisoformat(ranked['snapshot_at'])
+        print(f"↩️  复用榜单快照 {ranked['snapshot_at']} (检查点)\n")
+    elif resources.chart_source is not None:
+        with pipeline_stage('rankings'):
+            snapshot_at = ingest_charts(resources.chart_source)
+        if snapshot_at is not None:
+            _save_stage(run_id, STAGE_RANKED, {'snapshot_at': snapshot_at.isoformat()})
+
+    # 采集计划：所有关注列表的应用去重，每款只采集一次
+    db = get_db_session()
+    try:
+        plan = build_fetch_plan(db, target_apps)
+    finally:
+        db.close()
+    if len(plan.lists) > 1:
+        print(f"🗂️  采集计划: {plan.summary()}\n")
 
     # 采集数据
-    apps_data = fetch_all_apps(target_apps)
+    with pipeline_stage('fetch'):
+        if distributed:
+            fetched = fetch_apps_via_queue(plan.terms, source=resources.source, run_id=run_id)
+        else:
+            fetched = fetch_all_apps(plan.terms, source=resources.source, run_id=run_id)
+    apps_data = unique_snapshots(fetched.values())
 
     if not apps_data:
         print("❌ 没有采集到任何数据，退出")
+        resources.finish_cycle()
         return
 
-    # 生成图表
-    generate_charts(apps_data)
+    # 本轮采集到的应用的新评论（按游标增量抓取）
+    if resources.review_source is not None:
+        with pipeline_stage('reviews'):
+            stats = ingest_reviews(resources.review_source,
+                                   app_identifiers=[str(app.track_id) for app in apps_data])
+        print(f"💬 评论: {stats.summary()}\n")
+
+    with pipeline_stage('analyze'):
+        # 回填本轮指标的榜单名次
+        if snapshot_at is not None:
+            apply_chart_ranks(snapshot_at)
 
-    # 发送到 Slack
-    send_to_slack(apps_data, top_n=top_n)
+        # 更新相似度索引
+        resources.similarity_index = update_similarity_index(apps_data, resources.similarity_index)
+
+        # 版本发布节奏
+        attach_release_cadence(apps_data)
+
+        # 公司信息补全
+        enrich_company_info(apps_data)
+
+    # 生成图表：每个关注列表只包含自己的应用（继续运行时复用仍存在的图表文件）
+    with pipeline_stage('charts'):
+        chart_paths = generate_watchlist_charts(run_id, resources, plan, fetched, charted)
+
+    # 文件报告
+    with pipeline_stage('file_reports'):
+        write_reports(apps_data, formats if formats is not None else settings.report_formats)
+
+    # 发送到 Slack：每个关注列表一份报告（已入队的报告不再重复生成）
+    send_reports(run_id, resources, plan, fetched, reported, top_n=top_n, delta=delta,
+                 chart_paths=chart_paths)
+    resources.finish_cycle()
 
     print("=" * 50)
     print("🎉 全部完成！")
     print("=" * 50)
 
 
+def run_daemon(top_n: int = 10, target_apps: Optional[List[str]] = None,
+               delta: bool = False, formats: Optional[List[str]] = None,
+               distributed: bool = False,
+               interval_hours: Optional[float] = None, cron: Optional[str] = None,
+               jitter_seconds: Optional[float] = None, run_immediately: bool = True):
+    """
+    常驻模式：按间隔或 Cron 表达式周期运行完整流程
+
+    Args:
+        top_n / target_apps / delta / formats / distributed: 同 run_full_pipeline
+        interval_hours: 运行间隔，默认 schedule_interval_hours
+        cron: Cron 表达式，默认 schedule_cron；设置后优先于间隔
+        jitter_seconds: 每轮随机延迟上限，默认 schedule_jitter_seconds
+        run_immediately: 间隔模式下启动后立即运行一轮
+    """
+    # 先解析调度参数，表达式有误时不启动任何资源
+    daemon = Daemon(
+        lambda: run_full_pipeline(top_n=top_n, target_apps=target_apps, delta=delta,
+                                  formats=formats, resources=resources,
+                                  distributed=distributed),
+        interval_hours=interval_hours,
+        cron=cron or settings.schedule_cron,
+        jitter_seconds=jitter_seconds,
+    )
+    resources = PipelineResources.create(persistent=True)
+
+    daemon.install_signal_handlers()
+    try:
+        daemon.run(run_immediately=run_immediately)
+    finally:
+        finish_deliveries(resources.deliverer)
+        resources.close()
+
+
 def main():
     """主函数 - CLI 入口"""
     import argparse
@@ -227,14 +1166,277 @@ def main():
         help='Skip sending report to Slack'
     )
 
+    parser.add_argument(
+        '--delta',
+        action='store_true',
+        help='Only report what changed since the previous report'
+    )
+
+    parser.add_argument(
+        '--formats',
+        type=str,
+        help='Comma-separated file report formats to write, e.g. "md,csv,json,html"'
+    )
+
+    parser.add_argument(
+        '--distributed',
+        action='store_true',
+        help='Fetch through the job queue so worker processes can share the load'
+    )
+
+    parser.add_argument(
+        '--metrics',
+        action='store_true',
+        help='Record timings and counters; write a Prometheus textfile and a JSON run summary'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Profile each pipeline stage (cProfile + tracemalloc) and print the hot spots'
+    )
+
+    parser.add_argument(
+        '--charts',
+        action='store_true',
+        help='Ingest top charts first: record ranks and auto-discover new entrants (TOP_CHARTS_ENABLED)'
+    )
+
+    parser.add_argument(
+        '--reviews',
+        action='store_true',
+        help='Fetch new customer reviews of the collected apps after fetching (REVIEWS_ENABLED)'
+    )
+
+    parser.add_argument(
+        '--resume',
+        nargs='?',
+        const='latest',
+        metavar='RUN_ID',
+        help='Continue an interrupted run (default: the most recent unfinished one)'
+    )
+
     parser.add_argument(
         '--test',
         action='store_true',
         help='Test mode: only fetch 3 apps'
     )
 
+    subparsers = parser.add_subparsers(dest='command')
+
+    similar_parser = subparsers.add_parser(
+        'similar',
+        help='Show apps most similar to the given app'
+    )
+    similar_parser.add_argument('app', type=str, help='App name, e.g. "Lemon8"')
+    similar_parser.add_argument(
+        '-k',
+        type=int,
+        default=10,
+        help='Number of similar apps to show (default: 10)'
+    )
+
+    search_parser = subparsers.add_parser(
+        'search',
+        help='Full-text search over collected app names and descriptions'
+    )
+    search_parser.add_argument('query', type=str, help='Search terms, e.g. "AI journaling"')
+    search_parser.add_argument(
+        '--limit',
+        type=int,
+        default=20,
+        help='Maximum number of results (default: 20)'
+    )
+
+    report_parser = subparsers.add_parser(
+        'report',
+        help='Write file reports for every tracked app from the database'
+    )
+    report_parser.add_argument(
+        '--formats',
+        type=str,
+        default='md',
+        help='Comma-separated formats: md, csv, json, html (default: md)'
+    )
+
+    outbox_parser = subparsers.add_parser(
+        'outbox',
+        help='Show queued report deliveries and retry pending ones'
+    )
+    outbox_parser.add_argument(
+        '--requeue-dead',
+        action='store_true',
+        help='Move permanently failed deliveries back to pending'
+    )
+
+    daemon_parser = subparsers.add_parser(
+        'daemon',
+        help='Run the pipeline on a schedule in a long-running process'
+    )
+    daemon_parser.add_argument(
+        '--interval',
+        type=float,
+        help='Hours between runs (default: SCHEDULE_INTERVAL_HOURS)'
+    )
+    daemon_parser.add_argument(
+        '--cron',
+        type=str,
+        help='Cron expression, e.g. "0 */8 * * *" (overrides --interval)'
+    )
+    daemon_parser.add_argument(
+        '--jitter',
+        type=float,
+        help='Maximum random delay per run in seconds (default: SCHEDULE_JITTER_SECONDS)'
+    )
+    daemon_parser.add_argument(
+        '--no-immediate',
+        action='store_true',
+        help='Wait for the first scheduled time instead of running at startup'
+    )
+
+    subparsers.add_parser(
+        'watchlists',
+        help='Show the named watchlists and the deduplicated fetch plan (uses --apps / --test)'
+    )
+
+    subparsers.add_parser(
+        'enqueue',
+        help='Enqueue one fetch cycle for worker processes (uses --apps / --test)'
+    )
+
+    worker_parser = subparsers.add_parser(
+        'worker',
+        help='Run a fetch worker that claims jobs from the shared queue'
+    )
+    worker_parser.add_argument(
+        '--until-idle',
+        action='store_true',
+        help='Exit when no jobs are left instead of polling'
+    )
+    worker_parser.add_argument('--cycle', type=str, help='Only process jobs of this cycle')
+    worker_parser.add_argument(
+        '--lease',
+        type=int,
+        help='Lease duration in seconds (default: JOB_LEASE_SECONDS)'
+    )
+
+    generate_parser = subparsers.add_parser(
+        'generate',
+        help='Fill the database with a synthetic dataset for load testing'
+    )
+    generate_parser.add_argument(
+        '--apps',
+        dest='synthetic_apps',
+        type=int,
+        default=100_000,
+        help='Number of apps (default: 100000)'
+    )
+    generate_parser.add_argument(
+        '--days',
+        type=int,
+        default=365,
+        help='Days of metric history (default: 365)'
+    )
+    generate_parser.add_argument(
+        '--interval-hours',
+        type=int,
+        default=8,
+        help='Hours between metric samples (default: 8)'
+    )
+    generate_parser.add_argument('--seed', type=int, default=7, help='Random seed (default: 7)')
+    generate_parser.add_argument(
+        '--batch',
+        type=int,
+        default=500,
+        help='Apps generated and committed per batch (default: 500)'
+    )
+    generate_parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Write even if the database already contains apps'
+    )
+
+    serve_parser = subparsers.add_parser(
+        'serve',
+        help='Serve a read-only JSON API over the database'
+    )
+    serve_parser.add_argument('--host', type=str, help='Bind address (default: API_HOST)')
+    serve_parser.add_argument('--port', type=int, help='Port (default: API_PORT)')
+
+    charts_parser = subparsers.add_parser(
+        'charts',
+        help='Fetch top charts once: record ranks and add new entrants to the watchlist'
+    )
+    charts_parser.add_argument(
+        '--fixture',
+        type=str,
+        help='Read charts from a local JSON fixture instead of the iTunes RSS feeds'
+    )
+    charts_parser.add_argument(
+        '--discover-top',
+        type=int,
+        help='Watch apps that enter the top N of any chart (default: WATCHLIST_DISCOVER_TOP, 0 disables)'
+    )
+
+    reviews_parser = subparsers.add_parser(
+        'reviews',
+        help='Fetch new customer reviews of every tracked app once'
+    )
+    reviews_parser.add_argument(
+        '--fixture',
+        type=str,
+        help='Read reviews from a local JSON fixture instead of the iTunes RSS feeds'
+    )
+    reviews_parser.add_argument(
+        '--max-pages',
+        type=int,
+        help='Maximum pages per app and country (default: REVIEW_MAX_PAGES)'
+    )
+
     args = parser.parse_args()
 
+    if args.metrics:
+        monitoring.enable()
+
+    if args.charts:
+        settings.top_charts_enabled = True
+    if args.reviews:
+        settings.reviews_enabled = True
+
+    if args.command == 'similar':
+        show_similar_apps(args.app, k=args.k)
+        return
+
+    if args.command == 'search':
+        search_catalogue(args.query, limit=args.limit)
+        return
+
+    if args.command == 'report':
+        init_db()
+        write_reports(None, [f.strip() for f in args.formats.split(',') if f.strip()])
+        return
+
+    if args.command == 'outbox':
+        show_outbox(requeue=args.requeue_dead)
+        return
+
+    if args.command == 'serve':
+        serve_api(args.host, args.port)
+        return
+
+    if args.command == 'charts':
+        update_top_charts(args.fixture, discover_top=args.discover_top)
+        return
+
+    if args.command == 'reviews':
+        update_reviews(args.fixture, max_pages=args.max_pages)
+        return
+
+    if args.command == 'generate':
+        generate_synthetic_dataset(args.synthetic_apps, args.days, args.interval_hours, args.seed,
+                                   args.batch, force=args.force)
+        return
+
     # 解析自定义应用列表
     target_apps = None
     if args.apps:
@@ -242,9 +1444,56 @@ def main():
     elif args.test:
         target_apps = ["Lemon8", "CapCut", "Notion"]  # 测试模式只采集 3 个
 
+    formats = None
+    if args.formats:
+        formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+
+    if args.command == 'watchlists':
+        try:
+            show_watchlists(target_apps)
+        except WatchlistConfigError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        return
+
+    if args.command == 'enqueue':
+        enqueue_fetch_cycle(target_apps)
+        return
+
+    if args.command == 'worker':
+        run_worker(until_idle=args.until_idle, cycle_id=args.cycle, lease_seconds=args.lease)
+        return
+
+    if args.command == 'daemon':
+        if args.profile:
+            print("⚠️  --profile 只用于单次运行，常驻模式下忽略")
+        try:
+            run_daemon(top_n=args.top, target_apps=target_apps, delta=args.delta, formats=formats,
+                       distributed=args.distributed,
+                       interval_hours=args.interval, cron=args.cron, jitter_seconds=args.jitter,
+                       run_immediately=not args.no_immediate)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(2)
+        except KeyboardInterrupt:
+            print("\n\n⚠️  强制中断，退出")
+            sys.exit(1)
+        return
+
+    if args.profile:
+        # 图表在主进程中串行渲染，matplotlib 的耗时才会出现在剖析结果中
+        settings.chart_workers = 1
+        profiler = profiling.enable()
+        print(f"🔬 性能剖析已开启 → {profiler.output_dir}")
+
     # 运行完整流程
     try:
-        run_full_pipeline(top_n=args.top, target_apps=target_apps)
+        with RunLock():
+            run_full_pipeline(top_n=args.top, target_apps=target_apps, delta=args.delta,
+                              formats=formats, distributed=args.distributed, resume=args.resume)
+    except RunLockBusy as e:
+        print(f"⏭️  {e}")
+        sys.exit(1)
     except KeyboardInterrupt:
         print("\n\n⚠️  用户中断，退出")
         sys.exit(1)
@@ -253,6 +1502,10 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        summary = profiling.finish()
+        if summary:
+            print(f"\n{summary}\n")
 
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@ App Radar Agent - Configuration Management
 使用 pydantic-settings 实现类型安全的配置
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pathlib import Path
 
 
@@ -22,6 +22,12 @@ class Settings(BaseSettings):
 
     # === Slack 配置 ===
     slack_webhook_url: Optional[str] = None
+    slack_min_interval: float = 1.0  # Incoming Webhook 约每秒 1 条
+    slack_max_retries: int = 3
+    slack_bot_token: Optional[str] = None  # 上传图表需要 files:write 权限
+    slack_chart_channel: Optional[str] = None  # 图表同时分享到的频道 ID（可选）
+    slack_api_base: str = "https://slack.com/api"
+    slack_upload_workers: int = 4
 
     # === API Keys ===
     anthropic_api_key: Optional[str] = None
@@ -31,6 +37,8 @@ class Settings(BaseSettings):
     # === 数据源配置 ===
     enable_cache: bool = True
     cache_ttl: int = 3600  # 1 hour
+    itunes_api_base: str = "https://itunes.apple.com"  # 基准测试时指向本地模拟服务
+    fetch_interval: float = 0.5  # 顺序采集时两次请求的间隔（秒），遵守 API 限流
 
     # === 目标应用列表 (新兴应用 - 1-2年内，DAU 50万-200万) ===
     target_apps: List[str] = [
@@ -89,14 +97,108 @@ class Settings(BaseSettings):
         "Damus": "https://techcrunch.com/2023/02/01/twitter-alternative-nostr/"
     }
 
+    # === LLM 洞察配置 ===
+    insight_client: str = "anthropic"  # anthropic / stub（本地桩，不访问网络，用于测试和基准）
+    insight_stub_latency: float = 0.0  # 桩客户端每次调用的模拟延迟（秒）
+    insight_model: str = "claude-3-5-sonnet-20241022"
+    insight_max_workers: int = 4  # 并发请求上限
+    insight_input_cost_per_mtok: float = 3.0  # 美元 / 百万输入 token
+    insight_output_cost_per_mtok: float = 15.0  # 美元 / 百万输出 token
+
+    # === 公司信息补全配置 ===
+    company_ttl_hours: int = 24 * 7  # 同一公司两次查询的最小间隔
+    company_lookup_workers: int = 4
+
+    # === 榜单采集配置 ===
+    top_charts_enabled: bool = False  # 每轮采集前抓取榜单、写入排名并发现新应用
+    top_chart_source: str = "itunes"  # itunes（RSS）或 fixture（top_chart_fixture_path）
+    top_chart_countries: List[str] = ["us"]
+    top_chart_feeds: List[str] = [
+        "topfreeapplications", "toppaidapplications", "topgrossingapplications"
+    ]
+    # 类别榜：primaryGenreName -> iTunes genre id（总榜总是采集）
+    top_chart_genres: Dict[str, int] = {
+        "Business": 6000, "Weather": 6001, "Utilities": 6002, "Travel": 6003,
+        "Sports": 6004, "Social Networking": 6005, "Reference": 6006, "Productivity": 6007,
+        "Photo & Video": 6008, "News": 6009, "Navigation": 6010, "Music": 6011,
+        "Lifestyle": 6012, "Health & Fitness": 6013, "Games": 6014, "Finance": 6015,
+        "Entertainment": 6016, "Education": 6017, "Books": 6018, "Medical": 6020,
+        "Food & Drink": 6023, "Shopping": 6024, "Developer Tools": 6026,
+        "Graphics & Design": 6027,
+    }
+    top_chart_limit: int = 100  # 每个榜单的条目数（RSS 上限 200）
+    top_chart_workers: int = 8
+    watchlist_discover_top: int = 10  # 进入任一榜单前 N 名的新应用自动加入关注列表，0 关闭
+
+    # === 用户评论采集配置 ===
+    reviews_enabled: bool = False  # 每轮采集后增量抓取已采集应用的新评论
+    review_source: str = "itunes"  # itunes（RSS）或 fixture（review_fixture_path）
+    review_countries: List[str] = ["us"]
+    review_max_pages: int = 10  # 每个应用每个国家最多翻页数（RSS 上限 10 页 × 50 条）
+    review_page_workers: int = 4  # 每个应用同时请求的页数
+    review_app_workers: int = 4  # 同时抓取的应用数
+
+    # === 图表配置 ===
+    chart_dpi: int = 150
+    chart_workers: Optional[int] = None  # 渲染进程数，默认使用 CPU 核数
+    chart_per_category: bool = False  # 为每个类别生成散点图
+    chart_per_app: bool = False  # 为每个应用生成同类对比图
+    chart_history_days: int = 30  # 趋势图的历史范围
+    chart_history_points: int = 200  # 每条序列降采样后的点数
+    chart_history_series: int = 5  # 趋势图中的应用数量
+    chart_cache_enabled: bool = True  # 输入未变化时复用已渲染的 PNG
+    chart_cache_max_mb: int = 200
+
+    # === 文件报告配置 ===
+    report_formats: List[str] = []  # 流程结束时写出的格式，如 ["md", "csv", "json", "html"]
+
+    # === 投递队列 (outbox) 配置 ===
+    outbox_max_attempts: int = 8  # 超过后标记为 dead
+    outbox_backoff_base: float = 30.0  # 秒，第 n 次失败后等待 base * 2^(n-1)
+    outbox_backoff_max: float = 3600.0
+    outbox_poll_interval: float = 2.0
+    outbox_drain_timeout: float = 60.0  # 流程结束时最多等待投递的时间
+    outbox_lease_seconds: int = 300  # 投递器领取记录的租约时长，超时未完成的记录可被其他投递器接手
+
+    # === 相似度索引配置 ===
+    similarity_features: int = 1024  # 描述文本哈希向量维度
+
+    # === 分布式采集配置 ===
+    job_lease_seconds: int = 120  # worker 领取任务的租约时长，心跳每 1/3 租约续约一次
+    job_max_attempts: int = 3
+    worker_poll_interval: float = 2.0
+    cycle_wait_timeout: float = 1800.0  # 发起方等待一轮任务完成的上限
+    job_retention_cycles: int = 3  # 保留最近几轮已结束的任务（含采集结果 JSON），更早的在新一轮入队时删除
+
     # === 调度配置 ===
     schedule_interval_hours: int = 8
+    schedule_cron: Optional[str] = None  # 设置后优先于间隔，如 "0 */8 * * *"
+    schedule_jitter_seconds: int = 300  # 每轮随机延迟上限
+    run_checkpoint_retention_days: int = 7  # 未完成运行的检查点保留天数，过期后清理且不能再继续
+
+    # === 运行指标配置 ===
+    metrics_enabled: bool = False  # 关闭时埋点近乎零开销
+    metrics_port: Optional[int] = None  # 设置后在本地开启 /metrics HTTP 端点
+
+    # === 查询 API 配置 ===
+    api_host: str = "127.0.0.1"
+    api_port: int = 8765
+    api_cache_entries: int = 512  # 内存中缓存的响应数（同一数据版本内有效）
+    api_version_interval: float = 2.0  # 两次检查数据版本的最小间隔（秒）
 
     # === 项目路径 ===
     project_root: Path = Path(__file__).parent.parent.parent
     data_dir: Path = project_root / "data"
     results_dir: Path = data_dir / "results"
     charts_dir: Path = data_dir / "charts"
+    similarity_index_path: Path = data_dir / "similarity_index.npz"
+    company_fixture_path: Path = data_dir / "fixtures" / "companies.json"
+    top_chart_fixture_path: Path = data_dir / "fixtures" / "top_charts.json"
+    review_fixture_path: Path = data_dir / "fixtures" / "reviews.json"
+    watchlists_path: Path = project_root / "watchlists.yaml"  # 命名关注列表（见 watchlists.example.yaml）
+    lock_path: Path = data_dir / "app_radar.lock"
+    metrics_dir: Path = data_dir / "metrics"  # Prometheus textfile 和 JSON 运行摘要
+    profiles_dir: Path = data_dir / "profiles"  # --profile 的 .prof 文件和内存分配报告
 
 
 # 全局配置实例
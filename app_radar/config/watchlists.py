@@ -0,0 +1,95 @@
+"""
+App Radar Agent - 命名关注列表
+从 YAML 读取各团队的应用列表和报告目标；默认列表（target_apps + 榜单自动发现，
+报告发往 SLACK_WEBHOOK_URL）不在文件中配置
+"""
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import yaml
+
+from app_radar.config.settings import settings
+
+
+DEFAULT_WATCHLIST = 'default'
+
+
+class WatchlistConfigError(ValueError):
+    """关注列表文件格式错误"""
+
+
+@dataclass
+class Watchlist:
+    """一个关注列表：应用（名称或 id<trackId>）和报告目标"""
+    name: str
+    apps: List[str]
+    slack_webhook_url: Optional[str] = None
+    top_n: Optional[int] = None  # 报告展示的应用数，默认使用 --top
+
+
+def _webhook(value, name: str) -> Optional[str]:
+    """展开 ${ENV} 引用（Webhook 不必写进文件），未设置的变量视为未配置"""
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise WatchlistConfigError(f"Watchlist {name!r}: slack_webhook_url must be a string")
+    expanded = os.path.expandvars(value).strip()
+    return expanded if expanded and '$' not in expanded else None
+
+
+def load_watchlists(path: Optional[Path] = None) -> List[Watchlist]:
+    """
+    读取关注列表文件，文件不存在时返回空列表
+
+    文件格式:
+        watchlists:
+          ai-team:
+            apps: [Poe, Perplexity, "Character.AI"]
+            slack_webhook_url: ${AI_TEAM_SLACK_WEBHOOK}
+            top: 5
+
+    Args:
+        path: 文件路径，默认 WATCHLISTS_PATH
+
+    Returns:
+        List[Watchlist]: 按文件中的顺序
+
+    Raises:
+        WatchlistConfigError: 格式错误
+    """
+    path = Path(path or settings.watchlists_path)
+    if not path.is_file():
+        return []
+
+    try:
+        data = yaml.safe_load(path.read_text(encoding='utf-8')) or {}
+    except yaml.YAMLError as e:
+        raise WatchlistConfigError(f"Invalid watchlists file {path}: {e}")
+    lists = data.get('watchlists') if isinstance(data, dict) else None
+    if not isinstance(lists, dict):
+        raise WatchlistConfigError(f"{path}: expected a 'watchlists' mapping")
+
+    watchlists = []
+    for name, config in lists.items():
+        name = str(name)
+        if name == DEFAULT_WATCHLIST:
+            raise WatchlistConfigError(
+                f"{path}: '{DEFAULT_WATCHLIST}' is reserved (configure it with TARGET_APPS)"
+            )
+        config = config or {}
+        apps = config.get('apps') if isinstance(config, dict) else None
+        if not isinstance(apps, list) or not all(isinstance(app, str) and app.strip() for app in apps):
+            raise WatchlistConfigError(f"Watchlist {name!r}: 'apps' must be a list of app names")
+        top_n = config.get('top')
+        if top_n is not None and (not isinstance(top_n, int) or top_n <= 0):
+            raise WatchlistConfigError(f"Watchlist {name!r}: 'top' must be a positive integer")
+
+        watchlists.append(Watchlist(
+            name=name,
+            apps=[app.strip() for app in apps],
+            slack_webhook_url=_webhook(config.get('slack_webhook_url'), name),
+            top_n=top_n,
+        ))
+    return watchlists
@@ -3,17 +3,22 @@ App Radar Agent - 数据源基类
 定义统一的数据源接口
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-from pydantic import BaseModel
+from typing import Dict, Any, Optional, Union
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
+from app_radar.models.snapshot import AppSnapshot
+from app_radar.utils import monitoring
+
 
 class DataSourceResult(BaseModel):
-    """统一的数据源返回格式"""
+    """统一的数据源返回格式（应用数据源返回已校验的 AppSnapshot，原样保留不再复制）"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     source: str
     app_identifier: str
     timestamp: datetime
-    data: Dict[str, Any]
+    data: Union[AppSnapshot, Dict[str, Any]]
     metadata: Optional[Dict[str, Any]] = None
 
 
@@ -49,15 +54,21 @@ class BaseDataSource(ABC):
         """
         import time
 
+        source = type(self).__name__
         last_error = None
         for attempt in range(max_retries):
             try:
-                return self.fetch(app_identifier)
+                with monitoring.timed('app_radar_fetch_seconds', source=source):
+                    result = self.fetch(app_identifier)
+                monitoring.inc('app_radar_fetch_total', source=source, outcome='ok')
+                return result
             except Exception as e:
                 last_error = e
                 if attempt < max_retries - 1:
+                    monitoring.inc('app_radar_fetch_retries_total', source=source)
                     wait_time = 2 ** attempt  # 指数退避
                     print(f"⚠️  Attempt {attempt + 1} failed: {e}. Retrying in {wait_time}s...")
                     time.sleep(wait_time)
 
+        monitoring.inc('app_radar_fetch_total', source=source, outcome='error')
         raise last_error if last_error else Exception("Unknown error")
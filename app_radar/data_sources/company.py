@@ -0,0 +1,125 @@
+"""
+App Radar Agent - 公司信息数据源
+按公司名称查询融资、规模等信息（Crunchbase 或本地 fixture）
+"""
+import json
+import requests
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+from .base import BaseDataSource, DataSourceResult
+
+
+# Crunchbase num_employees_enum -> (min, max)
+EMPLOYEE_RANGES = {
+    "c_00001_00010": (1, 10),
+    "c_00011_00050": (11, 50),
+    "c_00051_00100": (51, 100),
+    "c_00101_00250": (101, 250),
+    "c_00251_00500": (251, 500),
+    "c_00501_01000": (501, 1000),
+    "c_01001_05000": (1001, 5000),
+    "c_05001_10000": (5001, 10000),
+    "c_10001_max": (10001, None),
+}
+
+
+class CompanyNotFoundError(ValueError):
+    """数据源中不存在该公司"""
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+class FixtureCompanySource(BaseDataSource):
+    """
+    本地 fixture 公司数据源 - 用于测试、基准和没有 API Key 的环境
+
+    fixture 为 JSON 对象，键为公司名称（不区分大小写），值为 CompanyInfo 字段:
+        {"Bytedance Ltd.": {"funding_stage": "Private", "employee_count_min": 10001, ...}}
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        super().__init__(config)
+        path = Path(self.config.get('path', ''))
+        records = json.loads(path.read_text(encoding='utf-8')) if path.is_file() else {}
+        self.records = {name.lower(): data for name, data in records.items()}
+        self.lookups = 0
+
+    def fetch(self, company_name: str) -> DataSourceResult:
+        self.lookups += 1
+        record = self.records.get(company_name.lower())
+        if record is None:
+            raise CompanyNotFoundError(f"Company not found: {company_name}")
+
+        data = dict(record)
+        data['last_funding_date'] = _parse_date(data.get('last_funding_date'))
+        return DataSourceResult(
+            source="fixture",
+            app_identifier=company_name,
+            timestamp=datetime.utcnow(),
+            data=data
+        )
+
+
+class CrunchbaseCompanySource(BaseDataSource):
+    """Crunchbase API v4 公司数据源（需要 CRUNCHBASE_API_KEY）"""
+
+    API_URL = "https://api.crunchbase.com/api/v4"
+    FIELDS = [
+        "num_employees_enum", "funding_total", "last_funding_type",
+        "last_funding_at", "location_identifiers", "founded_on",
+    ]
+
+    def __init__(self, config: Optional[Dict] = None):
+        super().__init__(config)
+        self.session = requests.Session()
+        self.session.headers["X-cb-user-key"] = self.config['api_key']
+
+    def _get(self, path: str, params: Dict[str, Any]) -> Dict:
+        response = self.session.get(f"{self.API_URL}{path}", params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def fetch(self, company_name: str) -> DataSourceResult:
+        try:
+            matches = self._get("/autocompletes", {
+                "query": company_name,
+                "collection_ids": "organizations",
+                "limit": 1,
+            }).get('entities', [])
+            if not matches:
+                raise CompanyNotFoundError(f"Company not found: {company_name}")
+
+            permalink = matches[0]['identifier']['permalink']
+            props = self._get(f"/entities/organizations/{permalink}", {
+                "field_ids": ",".join(self.FIELDS),
+            }).get('properties', {})
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Crunchbase API request failed: {e}")
+
+        employees = EMPLOYEE_RANGES.get(props.get('num_employees_enum'), (None, None))
+        founded = _parse_date((props.get('founded_on') or {}).get('value'))
+        locations = props.get('location_identifiers') or []
+
+        return DataSourceResult(
+            source="crunchbase",
+            app_identifier=company_name,
+            timestamp=datetime.utcnow(),
+            data={
+                'employee_count_min': employees[0],
+                'employee_count_max': employees[1],
+                'funding_total': (props.get('funding_total') or {}).get('value_usd'),
+                'funding_stage': props.get('last_funding_type'),
+                'last_funding_date': _parse_date(props.get('last_funding_at')),
+                'headquarters': ", ".join(loc.get('value', '') for loc in locations[:2]) or None,
+                'founded_year': founded.year if founded else None,
+            },
+            metadata={'permalink': permalink}
+        )
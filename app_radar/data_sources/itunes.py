@@ -2,66 +2,89 @@
 App Radar Agent - iTunes Search API 数据源
 官方 API: https://developer.apple.com/library/archive/documentation/AudioVideo/Conceptual/iTuneSearchAPI/
 """
+import re
 import requests
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base import BaseDataSource, DataSourceResult
+from app_radar.config.settings import settings
+from app_radar.models.snapshot import AppSnapshot
+from app_radar.utils import monitoring
+
+
+# "id<trackId>" 形式的标识按 trackId 精确查询（与 App Store 链接中的写法一致）
+LOOKUP_TERM = re.compile(r'^id(\d+)$')
+
+
+def lookup_term(track_id) -> str:
+    """按 trackId 精确采集时使用的标识，如 id1436991227"""
+    return f"id{track_id}"
 
 
 class ITunesDataSource(BaseDataSource):
     """iTunes Search API 数据源实现"""
 
-    API_URL = "https://itunes.apple.com/search"
+    SEARCH_PATH = "/search"
+    LOOKUP_PATH = "/lookup"
+
+    def __init__(self, config: Optional[Dict] = None):
+        super().__init__(config)
+        api_base = self.config.get('api_base') or settings.itunes_api_base
+        self.api_url = api_base.rstrip('/') + self.SEARCH_PATH
+        self.lookup_url = api_base.rstrip('/') + self.LOOKUP_PATH
+        # 复用连接（常驻模式下跨轮次保持 keep-alive）
+        self.session = requests.Session()
+
+    @staticmethod
+    def parse_result(app: Dict[str, Any]) -> AppSnapshot:
+        """
+        将 iTunes 返回的单个结果校验并转换为应用快照
+
+        Args:
+            app: results 中的一项
+
+        Returns:
+            AppSnapshot: 应用快照
+        """
+        return AppSnapshot.from_itunes(app)
 
     def fetch(self, app_name: str) -> DataSourceResult:
         """
         从 iTunes Search API 获取应用数据
 
         Args:
-            app_name: 应用名称
+            app_name: 应用名称，或 "id<trackId>"（按 trackId 精确查询）
 
         Returns:
             DataSourceResult: 包含应用数据的结果对象
         """
-        params = {
-            "term": app_name,
-            "entity": "software",
-            "limit": 1,  # 只获取最相关的结果
-            "country": "US"
-        }
+        lookup = LOOKUP_TERM.match(app_name)
+        if lookup:
+            url, params = self.lookup_url, {"id": lookup.group(1), "country": "US"}
+        else:
+            url, params = self.api_url, {
+                "term": app_name,
+                "entity": "software",
+                "limit": 1,  # 只获取最相关的结果
+                "country": "US"
+            }
 
         try:
-            response = requests.get(self.API_URL, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
+            monitoring.inc('app_radar_http_responses_total', api='itunes', code=response.status_code)
             response.raise_for_status()
             data = response.json()
 
             if not data.get('results') or len(data['results']) == 0:
                 raise ValueError(f"App not found: {app_name}")
 
-            app = data['results'][0]
+            snapshot = self.parse_result(data['results'][0])
 
             return DataSourceResult(
                 source="itunes",
-                app_identifier=str(app.get('trackId', '')),
+                app_identifier=str(snapshot.track_id),
                 timestamp=datetime.utcnow(),
-                data={
-                    'trackId': app.get('trackId'),
-                    'name': app.get('trackName', ''),
-                    'developer': app.get('sellerName', app.get('artistName', '')),
-                    'rating': app.get('averageUserRating'),
-                    'rating_count': app.get('userRatingCount', 0),
-                    'version': app.get('version', ''),
-                    'genres': app.get('genres', []),
-                    'category': app.get('primaryGenreName', ''),
-                    'url': app.get('trackViewUrl', ''),
-                    'description': app.get('description', ''),
-                    'price': app.get('price', 0),
-                    'currency': app.get('currency', 'USD'),
-                    'releaseDate': app.get('releaseDate', ''),
-                    'currentVersionReleaseDate': app.get('currentVersionReleaseDate', ''),
-                    'fileSizeBytes': app.get('fileSizeBytes'),
-                    'contentAdvisoryRating': app.get('contentAdvisoryRating', ''),
-                },
+                data=snapshot,
                 metadata={
                     'search_term': app_name,
                     'result_count': data.get('resultCount', 0)
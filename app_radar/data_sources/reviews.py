@@ -0,0 +1,163 @@
+"""
+App Radar Agent - App Store 用户评论数据源
+iTunes RSS 评论（按最新排序，每页 50 条，最多 10 页），以及用于测试的本地 fixture
+"""
+import json
+import requests
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from .base import BaseDataSource, DataSourceResult
+from app_radar.config.settings import settings
+from app_radar.utils import monitoring
+
+
+PAGE_SIZE = 50
+MAX_PAGES = 10
+
+
+def review_page_key(country: str, track_id: str, page: int) -> str:
+    """评论页标识：国家/trackId/页码，如 us/1436991227/2"""
+    return f"{country}/{track_id}/{page}"
+
+
+def parse_review_page_key(key: str) -> Tuple[str, str, int]:
+    """
+    解析评论页标识
+
+    Raises:
+        ValueError: 格式不是 国家/trackId/页码
+    """
+    parts = key.split('/')
+    if len(parts) != 3 or not parts[0] or not parts[1].isdigit() or not parts[2].isdigit():
+        raise ValueError(f"Invalid review page key: {key!r} (expected country/trackId/page)")
+    return parts[0], parts[1], int(parts[2])
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """RSS 中带时区的时间 -> UTC naive datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _label(entry: Dict[str, Any], field: str) -> str:
+    return str((entry.get(field) or {}).get('label') or '')
+
+
+def parse_reviews(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    解析 RSS JSON 中的评论（第一页开头的应用信息条目会被跳过）
+
+    Args:
+        payload: RSS 返回的 JSON
+
+    Returns:
+        List[Dict]: 按最新排序的评论（review_id / rating / title / content / author /
+        version / vote_count / updated_at）
+    """
+    entries = (payload.get('feed') or {}).get('entry') or []
+    if isinstance(entries, dict):  # 只有一个条目时不是列表
+        entries = [entries]
+
+    reviews = []
+    for entry in entries:
+        if 'im:rating' not in entry:
+            continue
+        reviews.append({
+            'review_id': int(_label(entry, 'id')),
+            'rating': int(_label(entry, 'im:rating')),
+            'title': _label(entry, 'title'),
+            'content': _label(entry, 'content'),
+            'author': str(((entry.get('author') or {}).get('name') or {}).get('label') or ''),
+            'version': _label(entry, 'im:version'),
+            'vote_count': int(_label(entry, 'im:voteCount') or 0),
+            'updated_at': _parse_time(_label(entry, 'updated')),
+        })
+    return reviews
+
+
+def _page_result(source: str, key: str, reviews: List[Dict[str, Any]]) -> DataSourceResult:
+    country, track_id, page = parse_review_page_key(key)
+    return DataSourceResult(
+        source=source,
+        app_identifier=key,
+        timestamp=datetime.utcnow(),
+        data={'country': country, 'track_id': track_id, 'page': page, 'reviews': reviews},
+    )
+
+
+class ITunesReviewsSource(BaseDataSource):
+    """iTunes RSS 用户评论数据源，fetch 的参数为评论页标识（见 review_page_key）"""
+
+    RSS_PATH = "/{country}/rss/customerreviews/page={page}/id={track_id}/sortby=mostrecent/json"
+
+    def __init__(self, config: Optional[Dict] = None):
+        super().__init__(config)
+        self.api_base = (self.config.get('api_base') or settings.itunes_api_base).rstrip('/')
+        self.session = requests.Session()
+
+    def fetch(self, key: str) -> DataSourceResult:
+        """
+        获取一页评论
+
+        Args:
+            key: 评论页标识，如 us/1436991227/1
+
+        Returns:
+            DataSourceResult: data 为 country / track_id / page / reviews
+        """
+        country, track_id, page = parse_review_page_key(key)
+        url = self.api_base + self.RSS_PATH.format(country=country, page=page, track_id=track_id)
+        try:
+            response = self.session.get(url, timeout=10)
+            monitoring.inc('app_radar_http_responses_total', api='itunes_reviews',
+                           code=response.status_code)
+            response.raise_for_status()
+            reviews = parse_reviews(response.json())
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"iTunes reviews request failed: {e}")
+        except (TypeError, ValueError, AttributeError) as e:
+            raise Exception(f"Failed to parse iTunes reviews page {key}: {e}")
+
+        return _page_result("itunes_rss", key, reviews)
+
+
+class FixtureReviewsSource(BaseDataSource):
+    """
+    本地 fixture 评论数据源 - 用于测试、基准和离线环境
+
+    fixture 为 JSON 对象，键为 trackId，值为按最新排序的评论（不区分国家），按 PAGE_SIZE 分页:
+        {"1436991227": [{"review_id": 11234, "rating": 5, "updated_at": "2025-01-02T10:00:00-07:00", ...}]}
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        super().__init__(config)
+        path = Path(self.config.get('path', ''))
+        self.reviews = json.loads(path.read_text(encoding='utf-8')) if path.is_file() else {}
+        self.lookups = 0
+
+    def fetch(self, key: str) -> DataSourceResult:
+        self.lookups += 1
+        _, track_id, page = parse_review_page_key(key)
+        items = self.reviews.get(track_id, [])[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+        reviews = [
+            {
+                'review_id': int(item['review_id']),
+                'rating': int(item['rating']),
+                'title': item.get('title', ''),
+                'content': item.get('content', ''),
+                'author': item.get('author', ''),
+                'version': item.get('version', ''),
+                'vote_count': int(item.get('vote_count') or 0),
+                'updated_at': _parse_time(item.get('updated_at')),
+            }
+            for item in items
+        ]
+        return _page_result("fixture", key, reviews)
@@ -0,0 +1,173 @@
+"""
+App Radar Agent - App Store 榜单数据源
+iTunes RSS 生成的免费 / 付费 / 畅销榜（总榜和各类别榜），以及用于测试的本地 fixture
+"""
+import json
+import requests
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from .base import BaseDataSource, DataSourceResult
+from app_radar.config.settings import settings
+from app_radar.utils import monitoring
+
+
+# 总榜的 genre 名称
+GENRE_ALL = 'all'
+
+
+def chart_key(country: str, chart: str, genre: str = GENRE_ALL) -> str:
+    """榜单标识：国家/榜单/类别，如 us/topfreeapplications/Games"""
+    return f"{country}/{chart}/{genre}"
+
+
+def parse_chart_key(key: str) -> Tuple[str, str, str]:
+    """
+    解析榜单标识
+
+    Raises:
+        ValueError: 格式不是 国家/榜单/类别
+    """
+    parts = key.split('/', 2)
+    if len(parts) != 3 or not all(parts):
+        raise ValueError(f"Invalid chart key: {key!r} (expected country/chart/genre)")
+    return parts[0], parts[1], parts[2]
+
+
+def configured_chart_keys() -> List[str]:
+    """配置中所有国家 × 榜单 × (总榜 + 各类别) 的榜单标识"""
+    genres = [GENRE_ALL, *settings.top_chart_genres]
+    return [
+        chart_key(country, chart, genre)
+        for country in settings.top_chart_countries
+        for chart in settings.top_chart_feeds
+        for genre in genres
+    ]
+
+
+def _label(entry: Dict[str, Any], field: str) -> str:
+    return str((entry.get(field) or {}).get('label') or '')
+
+
+def parse_feed(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    解析 RSS JSON 中的榜单条目
+
+    Args:
+        payload: RSS 返回的 JSON
+
+    Returns:
+        List[Dict]: 按名次排列的条目（rank / track_id / name / developer / category / url）
+    """
+    entries = (payload.get('feed') or {}).get('entry') or []
+    if isinstance(entries, dict):  # 只有一个条目时不是列表
+        entries = [entries]
+
+    parsed = []
+    for entry in entries:
+        attributes = (entry.get('id') or {}).get('attributes') or {}
+        track_id = attributes.get('im:id')
+        if not track_id:
+            continue
+        parsed.append({
+            'rank': len(parsed) + 1,
+            'track_id': int(track_id),
+            'name': _label(entry, 'im:name'),
+            'developer': _label(entry, 'im:artist'),
+            'category': str(((entry.get('category') or {}).get('attributes') or {}).get('label') or ''),
+            'url': _label(entry, 'id'),
+        })
+    return parsed
+
+
+def _chart_result(source: str, key: str, entries: List[Dict[str, Any]]) -> DataSourceResult:
+    country, chart, genre = parse_chart_key(key)
+    return DataSourceResult(
+        source=source,
+        app_identifier=key,
+        timestamp=datetime.utcnow(),
+        data={'country': country, 'chart': chart, 'genre': genre, 'entries': entries},
+    )
+
+
+class ITunesChartsSource(BaseDataSource):
+    """
+    iTunes RSS 榜单数据源
+
+    fetch 的参数为榜单标识（见 chart_key），类别名称通过 top_chart_genres 映射为 genre id
+    """
+
+    RSS_PATH = "/{country}/rss/{chart}/limit={limit}{genre}/json"
+
+    def __init__(self, config: Optional[Dict] = None):
+        super().__init__(config)
+        self.api_base = (self.config.get('api_base') or settings.itunes_api_base).rstrip('/')
+        self.limit = self.config.get('limit') or settings.top_chart_limit
+        self.genres = self.config.get('genres') or settings.top_chart_genres
+        self.session = requests.Session()
+
+    def url_for(self, key: str) -> str:
+        country, chart, genre = parse_chart_key(key)
+        if genre == GENRE_ALL:
+            genre_part = ''
+        elif genre in self.genres:
+            genre_part = f"/genre={self.genres[genre]}"
+        else:
+            raise ValueError(f"Unknown chart genre: {genre}")
+        return self.api_base + self.RSS_PATH.format(
+            country=country, chart=chart, limit=self.limit, genre=genre_part
+        )
+
+    def fetch(self, key: str) -> DataSourceResult:
+        """
+        获取一个榜单
+
+        Args:
+            key: 榜单标识，如 us/topgrossingapplications/Games
+
+        Returns:
+            DataSourceResult: data 为 country / chart / genre / entries
+        """
+        url = self.url_for(key)
+        try:
+            response = self.session.get(url, timeout=10)
+            monitoring.inc('app_radar_http_responses_total', api='itunes_rss', code=response.status_code)
+            response.raise_for_status()
+            entries = parse_feed(response.json())
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"iTunes RSS request failed: {e}")
+        except (TypeError, ValueError, AttributeError) as e:
+            raise Exception(f"Failed to parse iTunes RSS feed {key}: {e}")
+
+        return _chart_result("itunes_rss", key, entries)
+
+
+class FixtureChartsSource(BaseDataSource):
+    """
+    本地 fixture 榜单数据源 - 用于测试、基准和离线环境
+
+    fixture 为 JSON 对象，键为榜单标识，值为按名次排列的条目:
+        {"us/topfreeapplications/all": [{"track_id": 1436991227, "name": "Temu", ...}]}
+    fixture 中没有的榜单返回空列表。
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        super().__init__(config)
+        path = Path(self.config.get('path', ''))
+        self.charts = json.loads(path.read_text(encoding='utf-8')) if path.is_file() else {}
+        self.lookups = 0
+
+    def fetch(self, key: str) -> DataSourceResult:
+        self.lookups += 1
+        entries = [
+            {
+                'rank': rank,
+                'track_id': int(item['track_id']),
+                'name': item.get('name', ''),
+                'developer': item.get('developer', ''),
+                'category': item.get('category', ''),
+                'url': item.get('url', ''),
+            }
+            for rank, item in enumerate(self.charts.get(key, []), 1)
+        ]
+        return _chart_result("fixture", key, entries)
@@ -0,0 +1,199 @@
+"""
+App Radar Agent - 本地 Slack Webhook 模拟服务
+用于在不连接真实 Slack 的情况下验证消息拆分、顺序、限速处理和文件上传流程
+"""
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from app_radar.integrations.slack_webhook import MAX_BLOCKS
+
+
+class LocalSlackServer:
+    """
+    本地 Slack 服务
+
+    Webhook 行为尽量贴近 Slack Incoming Webhook：
+    - 块数超过 50 时返回 400 invalid_blocks
+    - 两次请求间隔小于 min_interval 时返回 429 和 Retry-After
+    - rate_limit_first 可强制前 N 个请求返回 429
+
+    同时模拟 Web API 的文件上传流程（api_base 下的 files.getUploadURLExternal /
+    files.completeUploadExternal，以及返回的 upload_url），校验 Bearer Token。
+
+    用法：
+        with LocalSlackServer() as server:
+            reporter = SlackReporter(server.webhook_url)
+            ...
+            server.messages  # 按接收顺序记录的消息
+            server.files     # file_id -> 上传记录
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, min_interval: float = 0.0,
+                 rate_limit_first: int = 0, retry_after: int = 1,
+                 bot_token: str = 'xoxb-local'):
+        self.min_interval = min_interval
+        self.rate_limit_first = rate_limit_first
+        self.retry_after = retry_after
+        self.bot_token = bot_token
+        self.files: Dict[str, Dict] = {}
+        self.messages: List[Dict] = []
+        self.requests = 0
+        self.rejected: List[int] = []
+        self._last_accepted: Optional[float] = None
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def webhook_url(self) -> str:
+        return f"{self.base_url}/services/T000/B000/local"
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.base_url}/api"
+
+    def _handle_api(self, method: str, headers, body: bytes):
+        """模拟 Web API 方法，返回 (状态码, JSON 响应体, 额外响应头)"""
+        if headers.get('Authorization') != f"Bearer {self.bot_token}":
+            return 200, {'ok': False, 'error': 'invalid_auth'}, {}
+        form = {k: v[0] for k, v in parse_qs(body.decode('utf-8')).items()}
+
+        with self._lock:
+            if method == 'files.getUploadURLExternal':
+                if not form.get('filename') or not form.get('length'):
+                    return 200, {'ok': False, 'error': 'invalid_arguments'}, {}
+                file_id = f"F{len(self.files) + 1:08d}"
+                self.files[file_id] = {
+                    'filename': form['filename'],
+                    'length': int(form['length']),
+                    'received': 0,
+                    'completed': False,
+                }
+                return 200, {
+                    'ok': True,
+                    'file_id': file_id,
+                    'upload_url': f"{self.base_url}/upload/{file_id}",
+                }, {}
+
+            if method == 'files.completeUploadExternal':
+                try:
+                    entries = json.loads(form.get('files', '[]'))
+                except ValueError:
+                    return 200, {'ok': False, 'error': 'invalid_arguments'}, {}
+                for entry in entries:
+                    record = self.files.get(entry.get('id'))
+                    if record is None or not record['received']:
+                        return 200, {'ok': False, 'error': 'file_not_found'}, {}
+                    record.update(completed=True, title=entry.get('title'),
+                                  channel_id=form.get('channel_id'))
+                return 200, {'ok': True, 'files': [{'id': e['id']} for e in entries]}, {}
+
+        return 200, {'ok': False, 'error': 'unknown_method'}, {}
+
+    @staticmethod
+    def _file_content(headers, body: bytes) -> bytes:
+        """上传地址接受原始字节或 multipart 表单，返回文件内容"""
+        content_type = headers.get('Content-Type', '')
+        if not content_type.startswith('multipart/form-data'):
+            return body
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + body
+        )
+        for part in message.iter_parts():
+            if part.get_filename():
+                return part.get_payload(decode=True)
+        return b''
+
+    def _handle_upload(self, file_id: str, headers, body: bytes):
+        body = self._file_content(headers, body)
+        with self._lock:
+            record = self.files.get(file_id)
+            if record is None:
+                return 404, 'not_found', {}
+            record['received'] = len(body)
+            return 200, 'OK - ' + str(len(body)), {}
+
+    def _handle(self, body: bytes):
+        """处理 Webhook 消息，返回 (状态码, 响应体, 额外响应头)"""
+        with self._lock:
+            self.requests += 1
+            if self.requests <= self.rate_limit_first:
+                self.rejected.append(429)
+                return 429, 'rate_limited', {'Retry-After': str(self.retry_after)}
+
+            now = time.monotonic()
+            if (self._last_accepted is not None
+                    and now - self._last_accepted < self.min_interval):
+                self.rejected.append(429)
+                return 429, 'rate_limited', {'Retry-After': str(self.retry_after)}
+
+            try:
+                message = json.loads(body)
+            except ValueError:
+                self.rejected.append(400)
+                return 400, 'invalid_payload', {}
+
+            if len(message.get('blocks', [])) > MAX_BLOCKS:
+                self.rejected.append(400)
+                return 400, 'invalid_blocks', {}
+
+            self._last_accepted = now
+            self.messages.append(message)
+            return 200, 'ok', {}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+                content_type = 'text/plain'
+                if self.path.startswith('/api/'):
+                    status, data, headers = server._handle_api(self.path[5:], self.headers, body)
+                    text, content_type = json.dumps(data), 'application/json'
+                elif self.path.startswith('/upload/'):
+                    status, text, headers = server._handle_upload(self.path[8:], self.headers, body)
+                else:
+                    status, text, headers = server._handle(body)
+                payload = text.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'LocalSlackServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'LocalSlackServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,182 @@
+"""
+App Radar Agent - 后台投递器
+在独立线程中轮询 outbox 表，按目标并发、目标内按顺序投递，失败后指数退避重试；
+投递期间定期续约，结果按租约令牌写回，租约丢失时不会覆盖接手者的状态
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from app_radar.config.settings import settings
+from app_radar.integrations.slack_webhook import WebhookDelivery
+from app_radar.storage.database import get_db_session, OutboxMessage
+from app_radar.storage.outbox import (
+    claim_due, commit_settled, mark_delivered, mark_failed, pending_messages, record_progress,
+    release_claimed, renew_lease
+)
+
+
+class _LeaseHeartbeat(threading.Thread):
+    """投递期间定期续约（分片按限速发送，整份报告可能超过一个租约时长）"""
+
+    def __init__(self, token: str, lease_seconds: Optional[int] = None):
+        super().__init__(name=f'outbox-heartbeat-{token[:8]}', daemon=True)
+        self.token = token
+        self.lease_seconds = lease_seconds or settings.outbox_lease_seconds
+        self._done = threading.Event()
+
+    def run(self):
+        interval = max(self.lease_seconds / 3, 1)
+        while not self._done.wait(interval):
+            db = get_db_session()
+            try:
+                if not renew_lease(db, self.token, self.lease_seconds):
+                    return
+            except Exception as e:
+                # 数据库暂时不可用：下次再试，租约未过期前仍然有效
+                db.rollback()
+                print(f"⚠️  Outbox lease heartbeat failed: {e}")
+            finally:
+                db.close()
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class OutboxDeliverer(threading.Thread):
+    """
+    后台投递线程
+
+    用法：
+        deliverer = OutboxDeliverer()
+        deliverer.start()
+        ...            # 采集、分析不等待投递
+        deliverer.wake()  # 有新消息入队时立即处理
+        deliverer.drain(timeout=60)
+        deliverer.stop()
+    """
+
+    def __init__(self, delivery: Optional[WebhookDelivery] = None,
+                 poll_interval: Optional[float] = None):
+        super().__init__(name='outbox-deliverer', daemon=True)
+        self.delivery = delivery or WebhookDelivery()
+        self.poll_interval = poll_interval if poll_interval is not None else settings.outbox_poll_interval
+        self.delivered = 0
+        self.failed = 0
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._idle = threading.Event()
+
+    def _settle(self, db, entry: OutboxMessage, token: str, result) -> bool:
+        """
+        按租约令牌写回一份报告的投递结果并立即提交（之后出错也不会回滚已送达的进度）
+
+        Returns:
+            bool: 是否仍持有租约
+        """
+        record_progress(entry, result.sent)
+        if result.ok:
+            mark_delivered(entry)
+        else:
+            mark_failed(entry, '; '.join(result.errors), retryable=result.retryable)
+        if not commit_settled(db, entry, token):
+            print(f"⚠️  Outbox lease lost for message {entry.id}, result discarded")
+            return False
+        if result.ok:
+            self.delivered += 1
+        else:
+            self.failed += 1
+        return True
+
+    async def _deliver_target(self, db, token: str, entries: List[OutboxMessage]):
+        """同一目标的记录按入队顺序投递"""
+        for entry in entries:
+            result = await self.delivery.deliver(entry.target, pending_messages(entry))
+            if not self._settle(db, entry, token, result) or not result.ok:
+                # 前一份报告未送达时不发送后面的，保持顺序（claim_due 也不会领取排在它后面的记录）
+                break
+
+    async def _deliver_all(self, db, token: str, by_target: Dict[str, List[OutboxMessage]]):
+        await asyncio.gather(*(self._deliver_target(db, token, e) for e in by_target.values()))
+
+    def deliver_due(self) -> int:
+        """
+        领取并投递所有已到期的记录
+
+        每份报告送达（或失败）后立即提交；本轮未尝试的记录退回待投递，
+        投递期间后台续约，进程中途退出时租约过期后由下一个投递器接手。
+
+        Returns:
+            int: 本轮处理的记录数
+        """
+        db = get_db_session()
+        try:
+            entries = claim_due(db)
+            if not entries:
+                return 0
+            token = entries[0].lease_token
+
+            by_target: Dict[str, List[OutboxMessage]] = defaultdict(list)
+            for entry in entries:
+                if entry.channel != 'slack_webhook':
+                    mark_failed(entry, f"Unsupported channel: {entry.channel}", retryable=False)
+                    self.failed += commit_settled(db, entry, token)
+                    continue
+                by_target[entry.target].append(entry)
+
+            heartbeat = _LeaseHeartbeat(token)
+            heartbeat.start()
+            try:
+                asyncio.run(self._deliver_all(db, token, by_target))
+            finally:
+                heartbeat.stop()
+                db.rollback()
+                release_claimed(db, token)
+            return len(entries)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Outbox delivery error: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._idle.clear()
+            processed = self.deliver_due()
+            if processed:
+                continue
+            self._idle.set()
+            self._wake_event.wait(self.poll_interval)
+            self._wake_event.clear()
+
+    def wake(self):
+        """通知投递器有新消息"""
+        self._idle.clear()
+        self._wake_event.set()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待当前已到期的记录处理完毕（退避中的记录留给下次运行）
+
+        Args:
+            timeout: 最长等待秒数
+
+        Returns:
+            bool: 是否在超时前处理完
+        """
+        timeout = settings.outbox_drain_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        self.wake()
+        while time.monotonic() < deadline:
+            if self._idle.wait(min(0.2, max(deadline - time.monotonic(), 0))):
+                return True
+        return False
+
+    def stop(self, timeout: float = 5):
+        self._stop_event.set()
+        self._wake_event.set()
+        self.join(timeout)
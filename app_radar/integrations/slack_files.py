@@ -0,0 +1,158 @@
+"""
+App Radar Agent - Slack 文件上传
+使用 files.getUploadURLExternal -> 上传 -> files.completeUploadExternal 流程上传图表，
+多张图表并发上传，内容未变化的图片复用之前的文件 ID
+"""
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import requests
+
+from app_radar.config.settings import settings
+from app_radar.storage.database import get_db_session, ChartUpload
+from app_radar.utils import monitoring
+
+
+class SlackAPIError(RuntimeError):
+    """Slack Web API 返回 ok=false"""
+
+
+def file_digest(path: Path) -> str:
+    """图片内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SlackFileUploader:
+    """Slack 文件上传器（需要带 files:write 权限的 Bot Token）"""
+
+    def __init__(self, token: Optional[str] = None, api_base: Optional[str] = None,
+                 channel: Optional[str] = None, max_workers: Optional[int] = None,
+                 max_retries: int = 3, timeout: float = 30):
+        self.token = token or settings.slack_bot_token
+        if not self.token:
+            raise ValueError("Slack bot token is required for file uploads")
+        self.api_base = (api_base or settings.slack_api_base).rstrip('/')
+        self.channel = channel if channel is not None else settings.slack_chart_channel
+        self.max_workers = max_workers or settings.slack_upload_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f"Bearer {self.token}"
+        self.uploaded = 0
+        self.reused = 0
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送请求，429 按 Retry-After 重试"""
+        for attempt in range(self.max_retries + 1):
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            if response.status_code != 429 or attempt == self.max_retries:
+                response.raise_for_status()
+                return response
+            time.sleep(float(response.headers.get('Retry-After', 1)))
+
+    def _api(self, api_method: str, data: Dict) -> Dict:
+        response = self._request('POST', f"{self.api_base}/{api_method}", data=data)
+        payload = response.json()
+        if not payload.get('ok'):
+            raise SlackAPIError(f"{api_method}: {payload.get('error', 'unknown_error')}")
+        return payload
+
+    def upload(self, path: Path, title: Optional[str] = None) -> str:
+        """
+        上传单个文件（不查去重缓存）
+
+        Args:
+            path: 文件路径
+            title: 文件标题，默认为文件名
+
+        Returns:
+            str: Slack 文件 ID
+        """
+        path = Path(path)
+        content = path.read_bytes()
+
+        ticket = self._api('files.getUploadURLExternal', {
+            'filename': path.name,
+            'length': len(content),
+        })
+        self._request('POST', ticket['upload_url'], files={'file': (path.name, content)})
+
+        complete = {'files': json.dumps([{'id': ticket['file_id'], 'title': title or path.stem}])}
+        if self.channel:
+            complete['channel_id'] = self.channel
+        self._api('files.completeUploadExternal', complete)
+        return ticket['file_id']
+
+    def upload_many(self, paths: Iterable[Path]) -> Dict[str, str]:
+        """
+        并发上传多个文件，内容哈希已上传过的直接复用文件 ID
+
+        Args:
+            paths: 文件路径
+
+        Returns:
+            Dict[str, str]: 文件路径 -> Slack 文件 ID（上传失败的文件不包含在内）
+        """
+        digests: Dict[Path, str] = {}
+        for path in map(Path, paths):
+            try:
+                digests[path] = file_digest(path)
+            except OSError as e:
+                # 图表已被清理或无法读取时跳过该文件，其余照常上传
+                print(f"⚠️  图表无法读取，跳过 {path.name}: {e}")
+        if not digests:
+            return {}
+
+        db = get_db_session()
+        try:
+            known = {
+                row.content_hash: row.file_id
+                for row in db.query(ChartUpload).filter(
+                    ChartUpload.content_hash.in_(set(digests.values()))
+                )
+            }
+        finally:
+            db.close()
+
+        pending: Dict[str, Path] = {}
+        for path, digest in digests.items():
+            if digest in known:
+                self.reused += 1
+                monitoring.inc('app_radar_cache_total', cache='chart_upload', result='hit')
+            elif digest not in pending:
+                # 同一次运行中内容相同的图片只上传一次
+                pending[digest] = path
+                monitoring.inc('app_radar_cache_total', cache='chart_upload', result='miss')
+
+        uploaded: Dict[str, str] = {}
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                futures = {digest: pool.submit(self.upload, path) for digest, path in pending.items()}
+                for digest, future in futures.items():
+                    try:
+                        uploaded[digest] = future.result()
+                    except (requests.exceptions.RequestException, SlackAPIError, OSError) as e:
+                        print(f"⚠️  图表上传失败 {pending[digest].name}: {e}")
+
+        if uploaded:
+            db = get_db_session()
+            try:
+                for digest, file_id in uploaded.items():
+                    path = pending[digest]
+                    db.merge(ChartUpload(content_hash=digest, file_id=file_id,
+                                         filename=path.name, size=path.stat().st_size))
+                db.commit()
+            finally:
+                db.close()
+            self.uploaded += len(uploaded)
+
+        file_ids = {**known, **uploaded}
+        return {str(path): file_ids[digest] for path, digest in digests.items() if digest in file_ids}
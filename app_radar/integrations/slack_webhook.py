@@ -0,0 +1,197 @@
+"""
+App Radar Agent - Slack Incoming Webhook 投递
+按 Block Kit 限制拆分消息，异步按顺序发送，遵守限速并处理 429 Retry-After
+"""
+import asyncio
+import copy
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+
+from app_radar.config.settings import settings
+from app_radar.utils import monitoring
+
+
+# Slack Block Kit 限制
+MAX_BLOCKS = 50
+MAX_SECTION_TEXT = 3000
+MAX_FALLBACK_TEXT = 4000
+
+# 拆分时，若最后一个分隔线之后的块数不超过该值，则在分隔线处断开
+DIVIDER_LOOKBACK = 12
+
+
+def _truncate_text(block: Dict) -> Dict:
+    """截断超出长度限制的 section 文本"""
+    text = block.get('text')
+    if block.get('type') == 'section' and isinstance(text, dict) and len(text.get('text', '')) > MAX_SECTION_TEXT:
+        block = copy.deepcopy(block)
+        block['text']['text'] = block['text']['text'][:MAX_SECTION_TEXT - 1] + '…'
+    return block
+
+
+def chunk_message(message: Dict, max_blocks: int = MAX_BLOCKS) -> List[Dict]:
+    """
+    将消息拆分为多个满足 Block Kit 限制的消息
+
+    优先在分隔线处断开，分片首尾的分隔线会被去掉；每个分片的 fallback 文本带上
+    "(i/n)" 序号。
+
+    Args:
+        message: 完整的 Slack 消息（含 blocks 和 text）
+        max_blocks: 每条消息的最大块数
+
+    Returns:
+        List[Dict]: 拆分后的消息列表（不超限时只有一条）
+    """
+    blocks = [_truncate_text(b) for b in message.get('blocks', [])]
+    text = (message.get('text') or '')[:MAX_FALLBACK_TEXT - 16]
+
+    if len(blocks) <= max_blocks:
+        return [{**message, 'blocks': blocks, 'text': text}]
+
+    chunks: List[List[Dict]] = []
+    current: List[Dict] = []
+    for block in blocks:
+        if block.get('type') == 'divider' and not current:
+            continue
+        current.append(block)
+        if len(current) == max_blocks:
+            # 回退到最近的分隔线，把分隔线之后的块留给下一片
+            cut = len(current)
+            for i in range(len(current) - 1, max(len(current) - DIVIDER_LOOKBACK, 0) - 1, -1):
+                if current[i].get('type') == 'divider':
+                    cut = i
+                    break
+            chunks.append(current[:cut])
+            # 断点处的分隔线不带入下一片
+            current = current[cut + 1:] if cut < len(current) else []
+    if current:
+        chunks.append(current)
+
+    # 去掉分片末尾的分隔线
+    chunks = [c[:-1] if c[-1].get('type') == 'divider' else c for c in chunks]
+    chunks = [c for c in chunks if c]
+
+    total = len(chunks)
+    return [
+        {**message, 'blocks': chunk, 'text': f"{text} ({i}/{total})"}
+        for i, chunk in enumerate(chunks, 1)
+    ]
+
+
+@dataclass
+class DeliveryResult:
+    """一组消息的投递结果"""
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    elapsed: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    retryable: bool = True  # 最后一次失败是否值得稍后重试
+
+    @property
+    def ok(self) -> bool:
+        return self.failed == 0
+
+
+class WebhookDelivery:
+    """
+    异步 Webhook 投递器
+
+    - 同一个 Webhook 的消息严格按顺序发送，两次发送间隔不少于 min_interval
+    - 429 时按 Retry-After 等待后重试；5xx 和网络错误按指数退避重试
+    - 不同 Webhook 之间并发投递
+    - 某条消息最终失败时停止发送该 Webhook 的后续分片，避免报告乱序或缺段
+    """
+
+    def __init__(self, min_interval: Optional[float] = None, max_retries: Optional[int] = None,
+                 timeout: float = 10, session: Optional[requests.Session] = None):
+        self.min_interval = settings.slack_min_interval if min_interval is None else min_interval
+        self.max_retries = settings.slack_max_retries if max_retries is None else max_retries
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def _post(self, url: str, message: Dict) -> requests.Response:
+        with monitoring.timed('app_radar_slack_send_seconds'):
+            response = self.session.post(url, json=message, timeout=self.timeout)
+        monitoring.inc('app_radar_http_responses_total', api='slack_webhook', code=response.status_code)
+        return response
+
+    async def _send_one(self, url: str, message: Dict, result: DeliveryResult) -> bool:
+        attempt = 0
+        while True:
+            try:
+                response = await asyncio.to_thread(self._post, url, message)
+            except requests.exceptions.RequestException as e:
+                error, wait = str(e), 2 ** attempt
+            else:
+                if response.status_code < 300:
+                    monitoring.inc('app_radar_slack_messages_total', outcome='sent')
+                    return True
+                if response.status_code == 429:
+                    result.rate_limited += 1
+                    error = "429 rate limited"
+                    wait = float(response.headers.get('Retry-After', 1))
+                elif response.status_code >= 500:
+                    error, wait = f"{response.status_code} {response.text[:200]}", 2 ** attempt
+                else:
+                    # 4xx（如 invalid_blocks）重试无意义
+                    result.errors.append(f"{response.status_code} {response.text[:200]}")
+                    result.retryable = False
+                    monitoring.inc('app_radar_slack_messages_total', outcome='rejected')
+                    return False
+
+            if attempt >= self.max_retries:
+                result.errors.append(error)
+                monitoring.inc('app_radar_slack_messages_total', outcome='failed')
+                return False
+            attempt += 1
+            result.retries += 1
+            monitoring.inc('app_radar_slack_retries_total', reason=error.split(' ', 1)[0])
+            await asyncio.sleep(wait)
+
+    async def deliver(self, url: str, messages: List[Dict]) -> DeliveryResult:
+        """
+        按顺序投递到同一个 Webhook
+
+        Args:
+            url: Webhook URL
+            messages: 消息列表（应已经过 chunk_message 拆分）
+
+        Returns:
+            DeliveryResult: 投递结果
+        """
+        result = DeliveryResult()
+        started = time.monotonic()
+        last_sent = None
+
+        for i, message in enumerate(messages):
+            if last_sent is not None:
+                wait = self.min_interval - (time.monotonic() - last_sent)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            ok = await self._send_one(url, message, result)
+            last_sent = time.monotonic()
+            if ok:
+                result.sent += 1
+            else:
+                result.failed += len(messages) - i
+                break
+
+        result.elapsed = time.monotonic() - started
+        return result
+
+    async def deliver_many(self, targets: Dict[str, List[Dict]]) -> Dict[str, DeliveryResult]:
+        """并发投递到多个 Webhook（每个 Webhook 内部仍按顺序）"""
+        urls = list(targets)
+        results = await asyncio.gather(*(self.deliver(url, targets[url]) for url in urls))
+        return dict(zip(urls, results))
+
+    def send(self, url: str, message: Dict) -> DeliveryResult:
+        """同步入口：拆分并投递一条完整消息"""
+        return asyncio.run(self.deliver(url, chunk_message(message)))
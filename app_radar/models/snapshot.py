@@ -0,0 +1,175 @@
+"""
+App Radar Agent - 应用快照
+流程内部传递的单次采集结果：__slots__ 记录，只在数据源边界校验一次，
+只在持久化 / 哈希 / 序列化等输出边界转换为 dict
+
+同时实现只读 Mapping 接口（键名与数据源原始字段一致，如 'trackId'、'rating_count'），
+报告层按 dict 读取的代码无需修改。
+"""
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+# (Mapping 键, 属性名)，顺序即 to_dict() 的键顺序
+FIELDS: Tuple[Tuple[str, str], ...] = (
+    ('trackId', 'track_id'),
+    ('name', 'name'),
+    ('developer', 'developer'),
+    ('rating', 'rating'),
+    ('rating_count', 'rating_count'),
+    ('version', 'version'),
+    ('genres', 'genres'),
+    ('category', 'category'),
+    ('url', 'url'),
+    ('description', 'description'),
+    ('price', 'price'),
+    ('currency', 'currency'),
+    ('releaseDate', 'release_date'),
+    ('currentVersionReleaseDate', 'current_version_release_date'),
+    ('fileSizeBytes', 'file_size_bytes'),
+    ('contentAdvisoryRating', 'content_advisory_rating'),
+)
+
+# 流程中附加的字段，未设置（None）时不出现在 Mapping 中
+OPTIONAL_FIELDS: Tuple[str, ...] = ('company', 'cadence_median_days', 'cadence_trend')
+
+_ATTRS: Dict[str, str] = {**dict(FIELDS), **{name: name for name in OPTIONAL_FIELDS}}
+
+
+def _text(value: Any) -> str:
+    return '' if value is None else str(value)
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    return None if value in (None, '') else int(value)
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    return None if value in (None, '') else float(value)
+
+
+class AppSnapshot(Mapping):
+    """
+    单个应用的一次采集结果
+
+    用法：
+        app = AppSnapshot.from_itunes(result)   # 数据源边界：校验并规范化类型
+        app.rating_count                        # 流程内部按属性访问
+        app.get('rating_count')                 # 报告层按 Mapping 访问
+        json.dumps(app.to_dict())               # 输出边界
+    """
+
+    __slots__ = tuple(attr for _, attr in FIELDS) + OPTIONAL_FIELDS
+
+    def __init__(self, track_id: Optional[int] = None, name: str = '', developer: str = '',
+                 rating: Optional[float] = None, rating_count: int = 0, version: str = '',
+                 genres: Tuple[str, ...] = (), category: str = '', url: str = '',
+                 description: str = '', price: float = 0.0, currency: str = 'USD',
+                 release_date: str = '', current_version_release_date: str = '',
+                 file_size_bytes: Optional[int] = None, content_advisory_rating: str = '',
+                 company: Optional[Dict] = None, cadence_median_days: Optional[float] = None,
+                 cadence_trend: Optional[str] = None):
+        self.track_id = track_id
+        self.name = name
+        self.developer = developer
+        self.rating = rating
+        self.rating_count = rating_count
+        self.version = version
+        self.genres = genres
+        self.category = category
+        self.url = url
+        self.description = description
+        self.price = price
+        self.currency = currency
+        self.release_date = release_date
+        self.current_version_release_date = current_version_release_date
+        self.file_size_bytes = file_size_bytes
+        self.content_advisory_rating = content_advisory_rating
+        self.company = company
+        self.cadence_median_days = cadence_median_days
+        self.cadence_trend = cadence_trend
+
+    @classmethod
+    def from_itunes(cls, app: Dict[str, Any]) -> 'AppSnapshot':
+        """
+        校验并转换 iTunes results 中的一项
+
+        Args:
+            app: iTunes Search / Lookup API 返回的单个结果
+
+        Returns:
+            AppSnapshot: 应用快照
+
+        Raises:
+            ValueError: 缺少 trackId 或字段类型无法转换
+        """
+        if app.get('trackId') is None:
+            raise ValueError(f"iTunes result without trackId: {app.get('trackName')!r}")
+        try:
+            return cls(
+                track_id=int(app['trackId']),
+                name=_text(app.get('trackName')),
+                developer=_text(app.get('sellerName', app.get('artistName'))),
+                rating=_optional_float(app.get('averageUserRating')),
+                rating_count=int(app.get('userRatingCount') or 0),
+                version=_text(app.get('version')),
+                # 类别、币种等取值很少，驻留后所有快照共享同一个字符串
+                genres=tuple(sys.intern(str(genre)) for genre in app.get('genres') or ()),
+                category=sys.intern(_text(app.get('primaryGenreName'))),
+                url=_text(app.get('trackViewUrl')),
+                description=_text(app.get('description')),
+                price=float(app.get('price') or 0),
+                currency=sys.intern(_text(app.get('currency', 'USD'))),
+                release_date=_text(app.get('releaseDate')),
+                current_version_release_date=_text(app.get('currentVersionReleaseDate')),
+                file_size_bytes=_optional_int(app.get('fileSizeBytes')),
+                content_advisory_rating=sys.intern(_text(app.get('contentAdvisoryRating'))),
+            )
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid iTunes result for trackId {app.get('trackId')}: {e}")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AppSnapshot':
+        """
+        从 to_dict() 的输出恢复（检查点、任务结果），不再重复校验
+
+        Args:
+            data: to_dict() 生成的字典
+
+        Returns:
+            AppSnapshot: 应用快照
+        """
+        snapshot = cls(**{attr: data[key] for key, attr in _ATTRS.items() if key in data})
+        snapshot.genres = tuple(snapshot.genres or ())
+        return snapshot
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为 dict（键名与数据源原始字段一致，可直接 JSON 序列化）"""
+        data = {key: getattr(self, attr) for key, attr in FIELDS}
+        data['genres'] = list(self.genres)
+        for name in OPTIONAL_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, _ATTRS[key])
+        if value is None and key in OPTIONAL_FIELDS:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for key, _ in FIELDS:
+            yield key
+        for name in OPTIONAL_FIELDS:
+            if getattr(self, name) is not None:
+                yield name
+
+    def __len__(self) -> int:
+        return len(FIELDS) + sum(getattr(self, name) is not None for name in OPTIONAL_FIELDS)
+
+    def __repr__(self) -> str:
+        return (f"AppSnapshot(track_id={self.track_id!r}, name={self.name!r}, "
+                f"rating={self.rating!r}, rating_count={self.rating_count!r})")
@@ -0,0 +1,123 @@
+"""
+App Radar Agent - 图表内容寻址缓存
+按 "图表类型 + 输入数据 + 渲染参数" 的哈希缓存 PNG，输入未变化时跳过 matplotlib 渲染
+"""
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from app_radar.config.settings import settings
+from app_radar.models.snapshot import AppSnapshot
+from app_radar.utils import monitoring
+
+
+# 渲染代码有视觉变化时递增，使旧缓存失效
+CHART_CACHE_VERSION = 1
+
+INDEX_FILE = "index.json"
+
+
+def _json_default(value):
+    """应用快照按内容参与哈希，其余非 JSON 类型按字符串"""
+    if isinstance(value, AppSnapshot):
+        return value.to_dict()
+    return str(value)
+
+
+class ChartCache:
+    """
+    图表缓存
+
+    缓存文件为 <cache_dir>/<hash>.png，index.json 记录每个条目的大小和最近使用时间，
+    总大小超过上限时按最近最少使用淘汰。仅在主进程中读写。
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or settings.charts_dir / ".cache")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else settings.chart_cache_max_mb * 1024 * 1024
+        self.index_path = self.cache_dir / INDEX_FILE
+        self.index: Dict[str, Dict] = self._load_index()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+    def _load_index(self) -> Dict[str, Dict]:
+        try:
+            index = json.loads(self.index_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        # 丢弃文件已不存在的条目
+        return {k: v for k, v in index.items() if (self.cache_dir / f"{k}.png").exists()}
+
+    @staticmethod
+    def make_key(kind: str, args: Dict, dpi: int) -> str:
+        """计算图表任务的内容哈希"""
+        payload = json.dumps(
+            [CHART_CACHE_VERSION, kind, dpi, args],
+            sort_keys=True, ensure_ascii=False, default=_json_default
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def fetch(self, key: str, dest: Path) -> bool:
+        """
+        命中缓存时将图片复制到目标路径
+
+        Returns:
+            bool: 是否命中
+        """
+        entry = self.index.get(key)
+        cached = self.cache_dir / f"{key}.png"
+        if entry is None or not cached.exists():
+            self.misses += 1
+            monitoring.inc('app_radar_cache_total', cache='chart', result='miss')
+            return False
+
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cached, dest)
+        entry['last_used'] = time.time()
+        self._dirty = True
+        self.hits += 1
+        monitoring.inc('app_radar_cache_total', cache='chart', result='hit')
+        return True
+
+    def store(self, key: str, src: Path):
+        """将新渲染的图片放入缓存"""
+        cached = self.cache_dir / f"{key}.png"
+        shutil.copyfile(src, cached)
+        self.index[key] = {'size': cached.stat().st_size, 'last_used': time.time()}
+        self._dirty = True
+
+    def evict(self) -> int:
+        """
+        按 LRU 淘汰直到总大小不超过上限
+
+        Returns:
+            int: 淘汰的条目数
+        """
+        total = sum(entry['size'] for entry in self.index.values())
+        evicted = 0
+        for key, entry in sorted(self.index.items(), key=lambda kv: kv[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            (self.cache_dir / f"{key}.png").unlink(missing_ok=True)
+            total -= entry['size']
+            del self.index[key]
+            evicted += 1
+        if evicted:
+            self._dirty = True
+        return evicted
+
+    def save(self):
+        """淘汰超额条目并写回索引文件"""
+        self.evict()
+        if not self._dirty:
+            return
+        tmp = self.index_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.index), encoding='utf-8')
+        tmp.replace(self.index_path)
+        self._dirty = False
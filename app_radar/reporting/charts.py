@@ -1,126 +1,171 @@
 """
 App Radar Agent - 图表生成模块
-使用 matplotlib 生成数据可视化图表
+使用 matplotlib 面向对象 API (Figure + Agg) 生成数据可视化图表，
+不依赖 pyplot 全局状态，可在进程池中并行渲染
 """
-import matplotlib.pyplot as plt
-import matplotlib
-from typing import List, Dict
+import functools
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 
+import matplotlib
+import matplotlib.dates as mdates
+import numpy as np
+from matplotlib import style
+from matplotlib.figure import Figure
+
+from app_radar.analytics.downsample import lttb
+from app_radar.config.settings import settings
+from app_radar.reporting.chart_cache import ChartCache
+from app_radar.utils import monitoring
+
+# 强制使用无界面后端
+matplotlib.use('Agg', force=True)
+
 # 设置中文字体支持
 matplotlib.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
 matplotlib.rcParams['axes.unicode_minus'] = False
 
+CHART_STYLE = 'seaborn-v0_8-darkgrid'
+PALETTE = ['#007A5A', '#1264A3', '#ECB22E', '#E01E5A', '#36C5F0', '#4A154B']
+
+
+def slugify(value: str) -> str:
+    """将应用名/类别名转换为安全的文件名片段"""
+    slug = re.sub(r'[^\w\-]+', '_', value.strip().lower(), flags=re.UNICODE).strip('_')
+    return slug or 'unknown'
+
+
+def styled(method):
+    """在样式上下文中执行绘图方法（不修改全局 rcParams）"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with style.context(CHART_STYLE):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+@dataclass
+class ChartJob:
+    """一个独立的图表渲染任务（可跨进程传递）"""
+    kind: str  # ChartGenerator 的方法名，如 'create_rating_scatter'
+    filename: str
+    args: Dict[str, Any] = field(default_factory=dict)
+
 
 class ChartGenerator:
     """图表生成器"""
 
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, dpi: Optional[int] = None, verbose: bool = True):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.dpi = dpi or settings.chart_dpi
+        self.verbose = verbose
+
+    def _figure(self, figsize):
+        """创建 Figure 和坐标轴（不经过 pyplot，不注册到全局图形管理器）"""
+        fig = Figure(figsize=figsize, layout='tight')
+        fig.patch.set_facecolor('white')
+        return fig, fig.add_subplot()
 
-        # 设置样式
-        plt.style.use('seaborn-v0_8-darkgrid')
+    def _save(self, fig: Figure, filename: str) -> Path:
+        output_path = self.output_dir / filename
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        fig.savefig(output_path, dpi=self.dpi, facecolor='white')
+        if self.verbose:
+            print(f"✅ Chart saved: {output_path}")
+        return output_path
 
-    def create_rating_scatter(self, apps: List[Dict], filename: str = "rating_scatter.png") -> Path:
+    @styled
+    def create_rating_scatter(self, apps: List[Dict], filename: str = "rating_scatter.png",
+                              title: str = 'App Rating vs User Engagement') -> Path:
         """
         创建评分 vs 评论数散点图
 
         Args:
             apps: 应用数据列表
             filename: 输出文件名
+            title: 图表标题
 
         Returns:
             Path: 生成的图片路径
         """
-        fig, ax = plt.subplots(figsize=(12, 7))
+        fig, ax = self._figure((12, 7))
 
         # 提取数据
-        x = [app['rating'] for app in apps if app.get('rating')]
-        y = [app['rating_count'] / 1000 for app in apps if app.get('rating_count')]  # 转换为 K
-        labels = [app['name'] for app in apps if app.get('rating')]
-        colors = ['#007A5A' if app['rating'] >= 4.7 else '#1264A3' for app in apps if app.get('rating')]
+        rated = [app for app in apps if app.get('rating')]
+        x = [app['rating'] for app in rated]
+        y = [app.get('rating_count', 0) / 1000 for app in rated]  # 转换为 K
+        labels = [app['name'] for app in rated]
+        colors = ['#007A5A' if app['rating'] >= 4.7 else '#1264A3' for app in rated]
 
         # 绘制散点
-        scatter = ax.scatter(x, y, s=200, alpha=0.6, c=colors, edgecolors='white', linewidth=2)
+        ax.scatter(x, y, s=200, alpha=0.6, c=colors, edgecolors='white', linewidth=2)
 
         # 添加标签
         for i, label in enumerate(labels):
-            if i < len(x):
-                ax.annotate(label, (x[i], y[i]),
-                           xytext=(8, 8), textcoords='offset points',
-                           fontsize=9, alpha=0.8,
-                           bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.7))
+            ax.annotate(label, (x[i], y[i]),
+                        xytext=(8, 8), textcoords='offset points',
+                        fontsize=9, alpha=0.8,
+                        bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.7))
 
         # 设置标签和标题
         ax.set_xlabel('Average Rating', fontsize=12, fontweight='bold')
         ax.set_ylabel('Review Count (K)', fontsize=12, fontweight='bold')
-        ax.set_title('App Rating vs User Engagement', fontsize=14, fontweight='bold', pad=20)
+        ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
 
-        # 设置网格
+        # 设置网格和背景
         ax.grid(True, alpha=0.3, linestyle='--')
-
-        # 设置背景
         ax.set_facecolor('#F8F8F8')
-        fig.patch.set_facecolor('white')
 
-        # 保存
-        output_path = self.output_dir / filename
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150, bbox_inches='tight', facecolor='white')
-        plt.close()
-
-        print(f"✅ Chart saved: {output_path}")
-        return output_path
+        return self._save(fig, filename)
 
-    def create_growth_trend(self, apps: List[Dict], filename: str = "growth_trend.png") -> Path:
+    @styled
+    def create_history_chart(self, series: Dict[str, Dict[str, List[float]]],
+                             filename: str = "growth_trend.png",
+                             title: str = 'Review Count Trend',
+                             ylabel: str = 'Review Count (K)',
+                             scale: float = 1000.0) -> Path:
         """
-        创建增长趋势图
+        创建真实历史趋势图（多条序列）
 
         Args:
-            apps: 应用数据列表（需要包含历史数据）
+            series: 应用标识 -> {'label': 图例名称, 'x': epoch 秒列表, 'y': 指标值列表}（应已降采样）
             filename: 输出文件名
+            title: 图表标题
+            ylabel: 纵轴标签
+            scale: 纵轴缩放（默认转换为 K）
 
         Returns:
             Path: 生成的图片路径
         """
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = self._figure((12, 6))
 
-        # 模拟 7 天数据（实际应从数据库获取）
-        days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+        for i, (key, points) in enumerate(series.items()):
+            x = np.asarray(points['x'], dtype=np.int64).astype('datetime64[s]')
+            y = np.asarray(points['y'], dtype=np.float64) / scale
+            ax.plot(x, y, linewidth=2, label=points.get('label', key),
+                    color=PALETTE[i % len(PALETTE)] if len(series) <= len(PALETTE) else None)
 
-        # TOP 3 应用的趋势
-        top_apps = sorted(apps, key=lambda x: x.get('rating_count', 0), reverse=True)[:3]
-        colors = ['#007A5A', '#1264A3', '#ECB22E']
+        ax.set_xlabel('Date', fontsize=12, fontweight='bold')
+        ax.set_ylabel(ylabel, fontsize=12, fontweight='bold')
+        ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(ax.xaxis.get_major_locator()))
 
-        for i, app in enumerate(top_apps):
-            # 模拟增长数据
-            base = app.get('rating_count', 1000) / 1000  # K
-            growth = [base * (1 + j * 0.02) for j in range(7)]  # 2% daily growth
-
-            ax.plot(days, growth, marker='o', linewidth=2.5,
-                   label=app['name'], color=colors[i], markersize=8)
-
-        ax.set_xlabel('Day of Week', fontsize=12, fontweight='bold')
-        ax.set_ylabel('Review Count (K)', fontsize=12, fontweight='bold')
-        ax.set_title('7-Day Growth Trend (Top 3 Apps)', fontsize=14, fontweight='bold', pad=20)
-
-        ax.legend(loc='upper left', fontsize=10, framealpha=0.9)
+        if len(series) <= 12:
+            ax.legend(loc='upper left', fontsize=10, framealpha=0.9)
         ax.grid(True, alpha=0.3, linestyle='--')
         ax.set_facecolor('#F8F8F8')
-        fig.patch.set_facecolor('white')
 
-        output_path = self.output_dir / filename
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150, bbox_inches='tight', facecolor='white')
-        plt.close()
-
-        print(f"✅ Chart saved: {output_path}")
-        return output_path
+        return self._save(fig, filename)
 
+    @styled
     def create_category_distribution(self, apps: List[Dict], filename: str = "category_dist.png") -> Path:
         """创建类别分布饼图"""
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig, ax = self._figure((10, 8))
 
         # 统计类别
         categories = {}
@@ -129,8 +174,8 @@ class ChartGenerator:
             categories[cat] = categories.get(cat, 0) + 1
 
         # 绘制饼图
-        colors = plt.cm.Set3(range(len(categories)))
-        wedges, texts, autotexts = ax.pie(
+        colors = matplotlib.colormaps['Set3'](range(len(categories)))
+        ax.pie(
             categories.values(),
             labels=categories.keys(),
             autopct='%1.1f%%',
@@ -141,10 +186,190 @@ class ChartGenerator:
 
         ax.set_title('App Category Distribution', fontsize=14, fontweight='bold', pad=20)
 
-        output_path = self.output_dir / filename
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150, bbox_inches='tight', facecolor='white')
-        plt.close()
+        return self._save(fig, filename)
 
-        print(f"✅ Chart saved: {output_path}")
-        return output_path
+    @styled
+    def create_app_card(self, app: Dict, peers: List[Dict], filename: str) -> Path:
+        """
+        创建单应用对比图：与同类别应用的评论数/评分对比
+
+        Args:
+            app: 目标应用
+            peers: 同类别应用（含目标应用）
+            filename: 输出文件名
+
+        Returns:
+            Path: 生成的图片路径
+        """
+        fig, ax = self._figure((10, 6))
+
+        ranked = sorted(peers, key=lambda x: x.get('rating_count', 0), reverse=True)[:15]
+        names = [p['name'] for p in ranked]
+        values = [p.get('rating_count', 0) / 1000 for p in ranked]
+        colors = ['#E01E5A' if p['name'] == app['name'] else '#1264A3' for p in ranked]
+
+        ax.barh(names[::-1], values[::-1], color=colors[::-1], alpha=0.8)
+        for i, p in enumerate(ranked[::-1]):
+            if p.get('rating'):
+                ax.annotate(f"{p['rating']:.1f}", (values[::-1][i], i),
+                            xytext=(4, 0), textcoords='offset points',
+                            va='center', fontsize=8)
+
+        ax.set_xlabel('Review Count (K)', fontsize=11, fontweight='bold')
+        ax.set_title(f"{app['name']} vs {app.get('category', 'Unknown')} peers",
+                     fontsize=13, fontweight='bold', pad=15)
+        ax.grid(True, axis='x', alpha=0.3, linestyle='--')
+        ax.set_facecolor('#F8F8F8')
+
+        return self._save(fig, filename)
+
+    def render(self, job: ChartJob) -> Path:
+        """执行单个渲染任务"""
+        return getattr(self, job.kind)(filename=job.filename, **job.args)
+
+
+def downsample_history(history: Dict[str, tuple], labels: Optional[Dict[str, str]] = None,
+                       max_points: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    将 storage.history 的序列用 LTTB 降采样到固定点数，并转换为可序列化的列表
+
+    Args:
+        history: 应用标识 -> (epoch 秒, 指标值)
+        labels: 应用标识 -> 图例名称，默认使用应用标识
+        max_points: 每条序列的点数预算，默认 settings.chart_history_points
+
+    Returns:
+        Dict[str, Dict]: 应用标识 -> {'label': 图例名称, 'x': [...], 'y': [...]}
+    """
+    labels = labels or {}
+    max_points = max_points or settings.chart_history_points
+    series = {}
+    for identifier, (x, y) in history.items():
+        if len(x) < 2:
+            continue
+        dx, dy = lttb(x, y, max_points)
+        series[identifier] = {'label': labels.get(identifier, identifier),
+                              'x': dx.astype(np.int64).tolist(), 'y': dy.tolist()}
+    return series
+
+
+def build_chart_jobs(apps: List[Dict], per_category: bool = False,
+                     per_app: bool = False,
+                     history: Optional[Dict[str, Dict]] = None) -> List[ChartJob]:
+    """
+    构建本次运行需要渲染的图表任务
+
+    Args:
+        apps: 应用数据列表
+        per_category: 是否为每个类别生成散点图
+        per_app: 是否为每个应用生成对比图
+        history: 已降采样的历史序列（见 downsample_history）；还没有历史数据时不生成趋势图
+
+    Returns:
+        List[ChartJob]: 相互独立的渲染任务
+    """
+    jobs = [ChartJob('create_rating_scatter', 'rating_scatter.png', {'apps': apps})]
+    if history:
+        jobs.append(ChartJob('create_history_chart', 'growth_trend.png', {
+            'series': history,
+            'title': f'Review Count Trend (Top {len(history)} Apps)',
+        }))
+    jobs.append(ChartJob('create_category_distribution', 'category_dist.png', {'apps': apps}))
+
+    by_category: Dict[str, List[Dict]] = {}
+    for app in apps:
+        by_category.setdefault(app.get('category') or 'Unknown', []).append(app)
+
+    if per_category:
+        for category, members in sorted(by_category.items()):
+            jobs.append(ChartJob(
+                'create_rating_scatter',
+                f"categories/{slugify(category)}.png",
+                {'apps': members, 'title': f'{category}: Rating vs User Engagement'}
+            ))
+
+    if per_app:
+        for app in apps:
+            peers = by_category[app.get('category') or 'Unknown']
+            jobs.append(ChartJob(
+                'create_app_card',
+                f"apps/{slugify(app['name'])}.png",
+                {'app': app, 'peers': peers}
+            ))
+
+    return jobs
+
+
+def _init_worker():
+    matplotlib.use('Agg', force=True)
+
+
+def _render_in_worker(output_dir: str, dpi: int, job: ChartJob) -> str:
+    return str(ChartGenerator(output_dir, dpi=dpi, verbose=False).render(job))
+
+
+def render_charts(jobs: List[ChartJob], output_dir: Path, dpi: Optional[int] = None,
+                  max_workers: Optional[int] = None,
+                  cache: Optional[ChartCache] = None) -> List[Path]:
+    """
+    渲染一组图表；输入未变化的图表直接复用缓存，其余任务较多时使用进程池并行
+
+    Args:
+        jobs: 渲染任务
+        output_dir: 输出目录
+        dpi: 输出分辨率
+        max_workers: 进程数，默认为 settings.chart_workers 或 CPU 核数；为 1 时串行
+        cache: 图表缓存，默认在 settings.chart_cache_enabled 时使用 charts_dir/.cache
+
+    Returns:
+        List[Path]: 生成的图表路径（与 jobs 顺序一致）
+    """
+    dpi = dpi or settings.chart_dpi
+    output_dir = Path(output_dir)
+    if cache is None and settings.chart_cache_enabled:
+        cache = ChartCache()
+
+    paths: List[Optional[Path]] = [None] * len(jobs)
+    keys: List[Optional[str]] = [None] * len(jobs)
+    pending = []
+    for i, job in enumerate(jobs):
+        if cache is not None:
+            keys[i] = cache.make_key(job.kind, job.args, dpi)
+            dest = output_dir / job.filename
+            if cache.fetch(keys[i], dest):
+                paths[i] = dest
+                continue
+        pending.append(i)
+
+    with monitoring.timed('app_radar_chart_render_seconds'):
+        rendered = _render_uncached([jobs[i] for i in pending], output_dir, dpi, max_workers)
+    monitoring.inc('app_radar_charts_rendered_total', len(rendered))
+    for i, path in zip(pending, rendered):
+        paths[i] = path
+        if cache is not None:
+            cache.store(keys[i], path)
+
+    if cache is not None:
+        cache.save()
+
+    return paths
+
+
+def _render_uncached(jobs: List[ChartJob], output_dir: Path, dpi: int,
+                     max_workers: Optional[int] = None) -> List[Path]:
+    """实际调用 matplotlib 渲染（串行或进程池）"""
+    if not jobs:
+        return []
+
+    workers = max_workers or settings.chart_workers or os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+
+    if workers <= 1:
+        generator = ChartGenerator(output_dir, dpi=dpi, verbose=False)
+        return [generator.render(job) for job in jobs]
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        paths = pool.map(_render_in_worker, [str(output_dir)] * len(jobs),
+                         [dpi] * len(jobs), jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+        return [Path(p) for p in paths]
@@ -0,0 +1,213 @@
+"""
+App Radar Agent - 增量报告
+对比当前指标快照与上一次报告的快照，只输出发生变化的应用
+"""
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import DateTime, bindparam, func, select, text
+from sqlalchemy.engine import Engine
+
+from app_radar.storage.database import engine as default_engine, Metric, ReportSnapshot
+
+
+# 一次查询得到每个应用在两个时间点的最新指标及其排名（按评论数）
+# 每个应用的最新一条通过 (app_id, timestamp) 索引倒序取第一行，耗时随应用数增长，与历史长度无关
+# scope: 关注列表的 trackId（JSON 数组），为空时不限应用；prev_at 为空时没有基线
+DELTA_SQL = text("""
+    WITH scoped_apps AS (
+        SELECT id FROM apps
+        WHERE :scope IS NULL OR app_identifier IN (SELECT value FROM json_each(:scope))
+    ),
+    latest AS (
+        SELECT (SELECT m.id FROM metrics m
+                WHERE m.app_id = a.id AND m.timestamp <= :cur_at AND m.rating_count IS NOT NULL
+                ORDER BY m.timestamp DESC, m.id DESC LIMIT 1) AS cur_id,
+               (SELECT m.id FROM metrics m
+                WHERE :prev_at IS NOT NULL
+                  AND m.app_id = a.id AND m.timestamp <= :prev_at AND m.rating_count IS NOT NULL
+                ORDER BY m.timestamp DESC, m.id DESC LIMIT 1) AS prev_id
+        FROM scoped_apps a
+    ),
+    ranked AS (
+        -- 截至 prev_at 有指标的应用截至 cur_at 也一定有，两个排名在同一遍中计算
+        SELECT c.app_id,
+               RANK() OVER (ORDER BY c.rating_count DESC) AS cur_rnk,
+               CASE WHEN p.id IS NOT NULL THEN
+                   RANK() OVER (PARTITION BY p.id IS NULL ORDER BY p.rating_count DESC)
+               END AS prev_rnk,
+               c.rating AS cur_rating, p.rating AS prev_rating,
+               c.rating_count AS cur_count, p.rating_count AS prev_count,
+               c.version AS cur_version, p.version AS prev_version
+        FROM latest
+        JOIN metrics c ON c.id = latest.cur_id
+        LEFT JOIN metrics p ON p.id = latest.prev_id
+    )
+    SELECT a.id, a.name, a.category,
+           r.cur_rnk, r.prev_rnk,
+           r.cur_rating, r.prev_rating,
+           r.cur_count, r.prev_count,
+           r.cur_version, r.prev_version
+    FROM ranked r
+    JOIN apps a ON a.id = r.app_id
+    WHERE r.cur_rnk <= :top_n OR r.prev_rnk <= :top_n
+    ORDER BY r.cur_rnk
+""").bindparams(
+    bindparam('cur_at', type_=DateTime),
+    bindparam('prev_at', type_=DateTime),
+)
+
+# 评分变化达到该值才视为变化
+RATING_THRESHOLD = 0.05
+
+
+@dataclass
+class AppDelta:
+    """单个应用相对基线的变化"""
+    app_id: int
+    name: str
+    category: Optional[str]
+    rank: int
+    prev_rank: Optional[int]
+    rating: Optional[float]
+    prev_rating: Optional[float]
+    rating_count: int
+    prev_rating_count: Optional[int]
+    version: Optional[str]
+    prev_version: Optional[str]
+    kinds: List[str] = field(default_factory=list)
+
+    @property
+    def rank_change(self) -> Optional[int]:
+        """排名上升为正"""
+        if self.prev_rank is None:
+            return None
+        return self.prev_rank - self.rank
+
+    @property
+    def rating_change(self) -> Optional[float]:
+        if self.rating is None or self.prev_rating is None:
+            return None
+        return self.rating - self.prev_rating
+
+
+@dataclass
+class DeltaReport:
+    """增量报告"""
+    snapshot_at: datetime
+    previous_snapshot_at: Optional[datetime]
+    top_n: int
+    changes: List[AppDelta]
+
+    @property
+    def is_first(self) -> bool:
+        return self.previous_snapshot_at is None
+
+    def of_kind(self, kind: str) -> List[AppDelta]:
+        return [d for d in self.changes if kind in d.kinds]
+
+
+def classify(delta: AppDelta, top_n: int, rating_threshold: float = RATING_THRESHOLD) -> List[str]:
+    """
+    判断应用的变化类型
+
+    Returns:
+        List[str]: new_entrant / dropped_out / rank / rating / version 的子集
+    """
+    kinds = []
+    in_top = delta.rank <= top_n
+    was_in_top = delta.prev_rank is not None and delta.prev_rank <= top_n
+
+    if in_top and not was_in_top:
+        kinds.append('new_entrant')
+    elif was_in_top and not in_top:
+        kinds.append('dropped_out')
+    elif delta.rank_change:
+        kinds.append('rank')
+
+    if delta.rating_change is not None and abs(delta.rating_change) >= rating_threshold:
+        kinds.append('rating')
+    if delta.prev_version and delta.version and delta.version != delta.prev_version:
+        kinds.append('version')
+    return kinds
+
+
+def last_report_snapshot(db, watchlist: Optional[str] = None) -> Optional[ReportSnapshot]:
+    """最近一次已发送报告的快照（watchlist 为 None 时为默认列表的报告）"""
+    return (db.query(ReportSnapshot)
+            .filter(ReportSnapshot.watchlist.is_(None) if watchlist is None
+                    else ReportSnapshot.watchlist == watchlist)
+            .order_by(ReportSnapshot.id.desc())
+            .first())
+
+
+def latest_metric_time(db) -> Optional[datetime]:
+    return db.execute(select(func.max(Metric.timestamp))).scalar()
+
+
+def compute_delta(db, top_n: int = 10, snapshot_at: Optional[datetime] = None,
+                  previous_at: Optional[datetime] = None,
+                  app_identifiers: Optional[List[str]] = None,
+                  watchlist: Optional[str] = None,
+                  bind: Engine = default_engine) -> Optional[DeltaReport]:
+    """
+    计算当前快照相对上一次报告的变化
+
+    Args:
+        db: 数据库会话（读取快照记录）
+        top_n: 榜单范围，进出该范围视为新进榜/跌出
+        snapshot_at: 当前快照时间，默认为最新指标时间
+        previous_at: 基线快照时间，默认为上一次报告的快照
+        app_identifiers: 只对比这些应用（trackId），排名也在其中计算；默认所有应用
+        watchlist: 关注列表名称，基线取该列表上一次报告的快照
+        bind: 执行窗口查询的数据库引擎
+
+    Returns:
+        Optional[DeltaReport]: 增量报告；没有任何指标时返回 None
+    """
+    snapshot_at = snapshot_at or latest_metric_time(db)
+    if snapshot_at is None:
+        return None
+    if previous_at is None:
+        last = last_report_snapshot(db, watchlist)
+        previous_at = last.snapshot_at if last else None
+
+    with bind.connect() as conn:
+        rows = conn.execute(DELTA_SQL, {
+            'cur_at': snapshot_at, 'prev_at': previous_at, 'top_n': top_n,
+            'scope': None if app_identifiers is None else json.dumps(list(app_identifiers)),
+        }).all()
+
+    changes = []
+    for row in rows:
+        delta = AppDelta(*row)
+        delta.kinds = classify(delta, top_n)
+        if delta.kinds:
+            changes.append(delta)
+
+    return DeltaReport(
+        snapshot_at=snapshot_at,
+        previous_snapshot_at=previous_at,
+        top_n=top_n,
+        changes=changes,
+    )
+
+
+def record_report_snapshot(db, report_type: str, snapshot_at: datetime, top_n: int,
+                           change_count: Optional[int] = None,
+                           outbox_id: Optional[int] = None,
+                           watchlist: Optional[str] = None) -> ReportSnapshot:
+    """记录报告所基于的快照（调用方负责 commit）"""
+    snapshot = ReportSnapshot(
+        report_type=report_type,
+        snapshot_at=snapshot_at,
+        top_n=top_n,
+        change_count=change_count,
+        outbox_id=outbox_id,
+        watchlist=watchlist,
+    )
+    db.add(snapshot)
+    db.flush()
+    return snapshot
@@ -0,0 +1,329 @@
+"""
+App Radar Agent - 多格式报告输出
+单次遍历应用数据，同时流式写出 Markdown / JSON / HTML / CSV 等格式
+"""
+import csv
+import html
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Type
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app_radar.config.settings import settings
+from app_radar.storage.database import engine as default_engine
+
+
+@dataclass
+class ReportRow:
+    """报告中的一行（一个应用的最新快照）"""
+    rank: int
+    name: str
+    developer: Optional[str] = None
+    category: Optional[str] = None
+    rating: Optional[float] = None
+    rating_count: int = 0
+    version: Optional[str] = None
+    url: Optional[str] = None
+
+    @classmethod
+    def from_app(cls, app: Dict, rank: int) -> 'ReportRow':
+        """
+        从应用数据构建
+
+        支持流程中的应用字典（name / rating / rating_count ...）以及
+        scripts/fetch_data.py 输出的 {"app": ..., "store_data": {...}} 结构。
+        """
+        if 'store_data' in app:
+            store = app['store_data'] or {}
+            genres = store.get('genres') or []
+            return cls(
+                rank=rank,
+                name=app['app'],
+                developer=store.get('sellerName'),
+                category=", ".join(genres) or None,
+                rating=store.get('averageUserRating'),
+                rating_count=store.get('userRatingCount') or 0,
+                version=store.get('version'),
+                url=store.get('trackViewUrl'),
+            )
+        return cls(
+            rank=rank,
+            name=app['name'],
+            developer=app.get('developer'),
+            category=app.get('category'),
+            rating=app.get('rating'),
+            rating_count=app.get('rating_count') or 0,
+            version=app.get('version'),
+            url=app.get('url'),
+        )
+
+
+COLUMNS = [f.name for f in fields(ReportRow)]
+
+
+class ReportSummary:
+    """遍历过程中顺带累计的汇总指标"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_reviews = 0
+        self._rating_sum = 0.0
+        self._rating_n = 0
+        self.top_engagement: Optional[ReportRow] = None
+        self.top_rating: Optional[ReportRow] = None
+
+    def add(self, row: ReportRow):
+        self.count += 1
+        self.total_reviews += row.rating_count
+        if row.rating:
+            self._rating_sum += row.rating
+            self._rating_n += 1
+            if self.top_rating is None or row.rating > self.top_rating.rating:
+                self.top_rating = row
+        if self.top_engagement is None or row.rating_count > self.top_engagement.rating_count:
+            self.top_engagement = row
+
+    @property
+    def avg_rating(self) -> float:
+        return self._rating_sum / self._rating_n if self._rating_n else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg_rating': round(self.avg_rating, 3),
+            'total_reviews': self.total_reviews,
+            'top_engagement': self.top_engagement.name if self.top_engagement else None,
+            'top_rating': self.top_rating.name if self.top_rating else None,
+        }
+
+
+class ReportWriter(ABC):
+    """
+    输出格式基类
+
+    子类实现 begin / write_row / end，逐行写入已打开的文件，不在内存中拼接整份报告。
+    """
+    extension = ''
+
+    def __init__(self, path: Path, title: str, generated_at: datetime):
+        self.path = Path(path)
+        self.title = title
+        self.generated_at = generated_at
+        self.fh = None
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fh = open(self.path, 'w', encoding='utf-8', newline='')
+        self.begin()
+
+    def close(self, summary: ReportSummary):
+        try:
+            self.end(summary)
+        finally:
+            self.fh.close()
+
+    def begin(self):
+        pass
+
+    @abstractmethod
+    def write_row(self, row: ReportRow):
+        """写入一行"""
+
+    def end(self, summary: ReportSummary):
+        pass
+
+
+WRITERS: Dict[str, Type[ReportWriter]] = {}
+
+
+def register_writer(fmt: str) -> Callable[[Type[ReportWriter]], Type[ReportWriter]]:
+    """注册输出格式（新增格式只需实现一个 ReportWriter 子类）"""
+    def decorator(cls: Type[ReportWriter]) -> Type[ReportWriter]:
+        WRITERS[fmt] = cls
+        return cls
+    return decorator
+
+
+def _fmt_rating(value: Optional[float]) -> str:
+    return f"{value:.2f}" if value else "-"
+
+
+@register_writer('md')
+class MarkdownWriter(ReportWriter):
+    extension = 'md'
+
+    def begin(self):
+        self.fh.write(f"# 📊 {self.title}（{self.generated_at.strftime('%Y-%m-%d')}）\n\n")
+        self.fh.write("| # | App | 评分 | 评论数 | 开发者 | 类别 | 版本 |\n")
+        self.fh.write("|---|-----|------|--------|--------|------|------|\n")
+
+    @staticmethod
+    def _cell(value) -> str:
+        return str(value if value not in (None, '') else '-').replace('|', '\\|')
+
+    def write_row(self, row: ReportRow):
+        name = f"[{self._cell(row.name)}]({row.url})" if row.url else self._cell(row.name)
+        self.fh.write(
+            f"| {row.rank} | {name} | {_fmt_rating(row.rating)} | {row.rating_count:,} | "
+            f"{self._cell(row.developer)} | {self._cell(row.category)} | {self._cell(row.version)} |\n"
+        )
+
+    def end(self, summary: ReportSummary):
+        self.fh.write(
+            f"\n共 {summary.count} 款应用 · 平均评分 {summary.avg_rating:.2f} · "
+            f"总评论数 {summary.total_reviews:,}\n"
+        )
+
+
+@register_writer('csv')
+class CSVWriter(ReportWriter):
+    extension = 'csv'
+
+    def begin(self):
+        self.writer = csv.writer(self.fh)
+        self.writer.writerow(COLUMNS)
+
+    def write_row(self, row: ReportRow):
+        self.writer.writerow([getattr(row, c) for c in COLUMNS])
+
+
+@register_writer('json')
+class JSONWriter(ReportWriter):
+    extension = 'json'
+
+    def begin(self):
+        header = json.dumps({'title': self.title, 'generated_at': self.generated_at.isoformat()},
+                            ensure_ascii=False)
+        # 去掉结尾的 "}"，随后逐条写入 apps 数组
+        self.fh.write(header[:-1] + ', "apps": [\n')
+        self._first = True
+
+    def write_row(self, row: ReportRow):
+        if not self._first:
+            self.fh.write(',\n')
+        self.fh.write(json.dumps(asdict(row), ensure_ascii=False))
+        self._first = False
+
+    def end(self, summary: ReportSummary):
+        self.fh.write(f'\n], "summary": {json.dumps(summary.to_dict(), ensure_ascii=False)}}}\n')
+
+
+@register_writer('html')
+class HTMLWriter(ReportWriter):
+    extension = 'html'
+
+    def begin(self):
+        title = html.escape(self.title)
+        self.fh.write(
+            "<!DOCTYPE html>\n<html lang=\"zh\"><head><meta charset=\"utf-8\">"
+            f"<title>{title}</title>"
+            "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}"
+            "th,td{border:1px solid #ddd;padding:4px 8px}td.n{text-align:right}</style>"
+            f"</head><body>\n<h1>📊 {title}</h1>\n"
+            f"<p>{self.generated_at.strftime('%Y-%m-%d %H:%M')}</p>\n"
+            "<table>\n<tr><th>#</th><th>App</th><th>评分</th><th>评论数</th>"
+            "<th>开发者</th><th>类别</th><th>版本</th></tr>\n"
+        )
+
+    @staticmethod
+    def _cell(value) -> str:
+        return html.escape(str(value)) if value not in (None, '') else '-'
+
+    def write_row(self, row: ReportRow):
+        name = self._cell(row.name)
+        if row.url:
+            name = f'<a href="{html.escape(row.url, quote=True)}">{name}</a>'
+        self.fh.write(
+            f"<tr><td class=\"n\">{row.rank}</td><td>{name}</td>"
+            f"<td class=\"n\">{_fmt_rating(row.rating)}</td><td class=\"n\">{row.rating_count:,}</td>"
+            f"<td>{self._cell(row.developer)}</td><td>{self._cell(row.category)}</td>"
+            f"<td>{self._cell(row.version)}</td></tr>\n"
+        )
+
+    def end(self, summary: ReportSummary):
+        self.fh.write(
+            f"</table>\n<p>共 {summary.count} 款应用 · 平均评分 {summary.avg_rating:.2f} · "
+            f"总评论数 {summary.total_reviews:,}</p>\n</body></html>\n"
+        )
+
+
+def rows_from_apps(apps: Iterable[Dict]) -> Iterator[ReportRow]:
+    """将内存中的应用数据按评论数排序后转换为报告行"""
+    def count(app: Dict) -> int:
+        store = app.get('store_data')
+        return (store.get('userRatingCount') if store else app.get('rating_count')) or 0
+
+    for rank, app in enumerate(sorted(apps, key=count, reverse=True), 1):
+        yield ReportRow.from_app(app, rank)
+
+
+# 每个应用的最新一条指标，按评论数降序（结果逐行读取，不一次性载入）
+LATEST_ROWS_SQL = text("""
+    SELECT a.name, a.developer, a.category, m.rating, m.rating_count, m.version, a.url
+    FROM apps a
+    JOIN (
+        SELECT app_id, rating, rating_count, version,
+               ROW_NUMBER() OVER (PARTITION BY app_id ORDER BY timestamp DESC, id DESC) AS rn
+        FROM metrics
+    ) m ON m.app_id = a.id AND m.rn = 1
+    ORDER BY m.rating_count DESC
+""")
+
+
+def rows_from_db(bind: Engine = default_engine, batch_size: int = 1000) -> Iterator[ReportRow]:
+    """从数据库流式读取所有应用的最新快照"""
+    with bind.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(LATEST_ROWS_SQL)
+        for rank, (name, developer, category, rating, rating_count, version, url) in enumerate(result, 1):
+            yield ReportRow(rank, name, developer, category, rating, rating_count or 0, version, url)
+
+
+def render_report(rows: Iterable[ReportRow], formats: Iterable[str],
+                  output_dir: Optional[Path] = None, basename: str = 'appradar_report',
+                  title: str = 'AppRadar 报告') -> Dict[str, Path]:
+    """
+    单次遍历报告行，写出所有请求的格式
+
+    Args:
+        rows: 报告行（可以是生成器）
+        formats: 输出格式，如 ['md', 'csv']，见 WRITERS
+        output_dir: 输出目录，默认为 results_dir
+        basename: 文件名（不含扩展名）
+        title: 报告标题
+
+    Returns:
+        Dict[str, Path]: 格式 -> 输出文件路径
+    """
+    formats = list(dict.fromkeys(formats))
+    unknown = [f for f in formats if f not in WRITERS]
+    if unknown:
+        raise ValueError(f"Unknown report format(s): {', '.join(unknown)} "
+                         f"(available: {', '.join(sorted(WRITERS))})")
+
+    output_dir = Path(output_dir or settings.results_dir)
+    generated_at = datetime.now()
+    writers: List[ReportWriter] = [
+        WRITERS[fmt](output_dir / f"{basename}.{WRITERS[fmt].extension}", title, generated_at)
+        for fmt in formats
+    ]
+
+    summary = ReportSummary()
+    opened: List[ReportWriter] = []
+    try:
+        for writer in writers:
+            writer.open()
+            opened.append(writer)
+        for row in rows:
+            summary.add(row)
+            for writer in writers:
+                writer.write_row(row)
+    finally:
+        for writer in opened:
+            writer.close(summary)
+
+    return {fmt: writer.path for fmt, writer in zip(formats, writers)}
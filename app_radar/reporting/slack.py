@@ -2,11 +2,16 @@
 App Radar Agent - Slack Block Kit 报告生成
 将应用数据转换为精美的 Slack 消息
 """
-import requests
+import asyncio
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from pathlib import Path
+from app_radar.analytics.insights import insight_key
 from app_radar.config.settings import settings
+from app_radar.integrations.slack_files import SlackFileUploader
+from app_radar.integrations.slack_webhook import WebhookDelivery, chunk_message
+from app_radar.reporting.delta import DeltaReport
+from app_radar.reporting.renderers import ReportSummary, rows_from_apps
 
 
 class SlackReporter:
@@ -45,8 +50,40 @@ class SlackReporter:
         else:
             return "💡 成长期"
 
-    def create_header_blocks(self) -> List[Dict]:
-        """创建消息头部"""
+    def format_company(self, app: Dict) -> str:
+        """格式化公司融资/规模信息（需要 analytics.enrichment 的结果）"""
+        company = app.get('company')
+        if not company:
+            return ""
+
+        parts = []
+        if company.get('funding_stage'):
+            parts.append(company['funding_stage'])
+        if company.get('funding_total'):
+            parts.append(f"${self.format_number(int(company['funding_total']))}")
+        if company.get('employee_count_min'):
+            high = company.get('employee_count_max')
+            parts.append(f"{company['employee_count_min']}-{high} 人" if high
+                         else f"{company['employee_count_min']}+ 人")
+        return f" ({' · '.join(parts)})" if parts else ""
+
+    def format_cadence(self, app: Dict) -> str:
+        """格式化版本发布节奏（需要 analytics.cadence 的结果）"""
+        median = app.get('cadence_median_days')
+        if median is None:
+            return ""
+        trend = {
+            'faster': " | 🚀 发版加速",
+            'slower': " | 🐢 发版放缓",
+        }.get(app.get('cadence_trend'), "")
+        return f"中位 {median:.0f} 天/版{trend}"
+
+    @staticmethod
+    def _title(title: str, watchlist: Optional[str] = None) -> str:
+        return f"{title} · {watchlist}" if watchlist else title
+
+    def create_header_blocks(self, watchlist: Optional[str] = None) -> List[Dict]:
+        """创建消息头部（watchlist 为关注列表名称，默认列表不标注）"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
 
         return [
@@ -54,7 +91,7 @@ class SlackReporter:
                 "type": "header",
                 "text": {
                     "type": "plain_text",
-                    "text": "📱 App Radar 商业产品调研报告",
+                    "text": self._title("📱 App Radar 商业产品调研报告", watchlist),
                     "emoji": True
                 }
             },
@@ -75,14 +112,12 @@ class SlackReporter:
         if not apps:
             return []
 
-        # 计算统计数据
-        valid_ratings = [app['rating'] for app in apps if app.get('rating')]
-        total_reviews = sum(app.get('rating_count', 0) for app in apps)
-        avg_rating = sum(valid_ratings) / len(valid_ratings) if valid_ratings else 0
-
-        # 找出最佳应用
-        top_engagement = max(apps, key=lambda x: x.get('rating_count', 0))
-        top_rating = max(apps, key=lambda x: x.get('rating', 0))
+        # 与文件报告共用同一套汇总逻辑
+        summary = ReportSummary()
+        for row in rows_from_apps(apps):
+            summary.add(row)
+        top_engagement = summary.top_engagement
+        top_rating = summary.top_rating
 
         return [
             {
@@ -97,19 +132,20 @@ class SlackReporter:
                 "fields": [
                     {
                         "type": "mrkdwn",
-                        "text": f"*平均评分*\n{avg_rating:.2f}/5.0"
+                        "text": f"*平均评分*\n{summary.avg_rating:.2f}/5.0"
                     },
                     {
                         "type": "mrkdwn",
-                        "text": f"*总评论数*\n{self.format_number(total_reviews)}"
+                        "text": f"*总评论数*\n{self.format_number(summary.total_reviews)}"
                     },
                     {
                         "type": "mrkdwn",
-                        "text": f"*参与度冠军*\n{top_engagement['name']}"
+                        "text": f"*参与度冠军*\n{top_engagement.name}"
                     },
                     {
                         "type": "mrkdwn",
-                        "text": f"*满意度最高*\n{top_rating['name']} ({top_rating.get('rating', 0):.1f}分)"
+                        "text": (f"*满意度最高*\n{top_rating.name} ({top_rating.rating:.1f}分)"
+                                 if top_rating else "*满意度最高*\n-")
                     }
                 ]
             },
@@ -138,18 +174,23 @@ class SlackReporter:
             engagement = self.get_engagement_level(reviews)
             url = app.get('url', '')
 
+            text = (
+                f"*{i}. {emoji} {app['name']}*\n"
+                f"• 评分: `{rating:.2f}` | 评论: `{self.format_number(reviews)}`\n"
+                f"• 参与度: {engagement}\n"
+                f"• 公司: {app.get('developer', 'Unknown')}{self.format_company(app)}\n"
+                f"• 类别: {app.get('category', 'Unknown')}"
+            )
+            cadence = self.format_cadence(app)
+            if cadence:
+                text += f"\n• 更新节奏: {cadence}"
+
             # 应用卡片
             app_block = {
                 "type": "section",
                 "text": {
                     "type": "mrkdwn",
-                    "text": (
-                        f"*{i}. {emoji} {app['name']}*\n"
-                        f"• 评分: `{rating:.2f}` | 评论: `{self.format_number(reviews)}`\n"
-                        f"• 参与度: {engagement}\n"
-                        f"• 公司: {app.get('developer', 'Unknown')}\n"
-                        f"• 类别: {app.get('category', 'Unknown')}"
-                    )
+                    "text": text
                 }
             }
 
@@ -173,8 +214,10 @@ class SlackReporter:
 
         return blocks
 
-    def create_insights_blocks(self, apps: List[Dict]) -> List[Dict]:
-        """创建洞察分析"""
+    def create_insights_blocks(self, apps: List[Dict],
+                               app_insights: Optional[Dict[str, str]] = None,
+                               limit: int = 10) -> List[Dict]:
+        """创建洞察分析（app_insights 为 LLM 生成的单应用洞察）"""
         # 简单的洞察逻辑
         insights = []
 
@@ -216,7 +259,7 @@ class SlackReporter:
                 f"• 🏢 **头部开发者**: {top_dev[0]} 有 {top_dev[1]} 款应用上榜"
             )
 
-        return [
+        blocks = [
             {"type": "divider"},
             {
                 "type": "section",
@@ -234,6 +277,41 @@ class SlackReporter:
             }
         ]
 
+        if app_insights:
+            blocks.extend(self.create_app_insight_blocks(apps, app_insights, limit))
+
+        return blocks
+
+    def create_app_insight_blocks(self, apps: List[Dict], app_insights: Dict[str, str],
+                                  limit: int = 10) -> List[Dict]:
+        """创建单应用 AI 洞察（与应用列表顺序一致，每个 section 不超过 3000 字符）"""
+        sorted_apps = sorted(apps, key=lambda x: x.get('rating_count', 0), reverse=True)
+        lines = []
+        for app in sorted_apps[:limit]:
+            text = app_insights.get(insight_key(app))
+            if text:
+                lines.append(f"• *{app['name']}*: {text[:400]}")
+
+        if not lines:
+            return []
+
+        return self.create_text_sections("*🤖 AI 洞察*", lines)
+
+    def create_text_sections(self, title: str, lines: List[str]) -> List[Dict]:
+        """标题 + 多行文本，按 section 3000 字符上限拆分"""
+        blocks = [{
+            "type": "section",
+            "text": {"type": "mrkdwn", "text": title}
+        }]
+        chunk = []
+        for line in lines:
+            if chunk and len("\n".join(chunk + [line])) > 3000:
+                blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(chunk)}})
+                chunk = []
+            chunk.append(line)
+        blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(chunk)}})
+        return blocks
+
     def create_action_blocks(self) -> List[Dict]:
         """
         创建操作按钮 (已禁用)
@@ -264,50 +342,156 @@ class SlackReporter:
             }
         ]
 
-    def create_message(self, apps: List[Dict], top_n: int = 10) -> Dict:
-        """创建完整的 Slack 消息"""
+    def create_message(self, apps: List[Dict], top_n: int = 10,
+                       app_insights: Optional[Dict[str, str]] = None,
+                       chart_files: Optional[Dict[str, str]] = None,
+                       watchlist: Optional[str] = None) -> Dict:
+        """创建完整的 Slack 消息（chart_files 为已上传图表的路径 -> 文件 ID）"""
         blocks = []
 
         # 添加各个部分
-        blocks.extend(self.create_header_blocks())
+        blocks.extend(self.create_header_blocks(watchlist))
         blocks.extend(self.create_kpi_blocks(apps))
         blocks.extend(self.create_app_blocks(apps, limit=top_n))
-        blocks.extend(self.create_insights_blocks(apps))
+        blocks.extend(self.create_insights_blocks(apps, app_insights, limit=top_n))
+        if chart_files:
+            blocks.extend(self.create_chart_blocks(chart_files))
         blocks.extend(self.create_action_blocks())
         blocks.extend(self.create_footer_blocks())
 
         return {
             "blocks": blocks,
-            "text": f"App Radar 报告 - {datetime.now().strftime('%Y-%m-%d')}"
+            "text": self._title(f"App Radar 报告 - {datetime.now().strftime('%Y-%m-%d')}", watchlist)
         }
 
-    def send_report(self, apps: List[Dict], top_n: int = 10) -> bool:
+    def create_delta_blocks(self, delta: DeltaReport) -> List[Dict]:
+        """创建增量变化部分（只包含发生变化的应用）"""
+        sections = [
+            ("*🆕 新进 TOP {n}*", 'new_entrant',
+             lambda d: f"• *{d.name}* 第 {d.rank} 名"
+                       + (f"（原第 {d.prev_rank} 名）" if d.prev_rank else "")),
+            ("*↕️ 排名变化*", 'rank',
+             lambda d: f"• *{d.name}* {'⬆️' if d.rank_change > 0 else '⬇️'} "
+                       f"{d.prev_rank} → {d.rank}"),
+            ("*⭐ 评分变化*", 'rating',
+             lambda d: f"• *{d.name}* {d.prev_rating:.2f} → {d.rating:.2f} "
+                       f"({d.rating_change:+.2f})"),
+            ("*🚀 新版本*", 'version',
+             lambda d: f"• *{d.name}* {d.prev_version} → {d.version}"),
+            ("*👋 跌出 TOP {n}*", 'dropped_out',
+             lambda d: f"• *{d.name}* {d.prev_rank} → {d.rank}"),
+        ]
+
+        blocks = []
+        for title, kind, render in sections:
+            items = delta.of_kind(kind)
+            if items:
+                blocks.extend(self.create_text_sections(title.format(n=delta.top_n),
+                                                        [render(d) for d in items]))
+                blocks.append({"type": "divider"})
+
+        if not blocks:
+            blocks = [{
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": "😴 自上次报告以来没有明显变化"}
+            }, {"type": "divider"}]
+        return blocks
+
+    def create_delta_message(self, delta: DeltaReport, watchlist: Optional[str] = None) -> Dict:
+        """创建增量报告消息"""
+        since = (delta.previous_snapshot_at.strftime("%Y-%m-%d %H:%M")
+                 if delta.previous_snapshot_at else "首次报告")
+        blocks = [
+            {
+                "type": "header",
+                "text": {"type": "plain_text", "text": self._title("📈 App Radar 变化报告", watchlist),
+                         "emoji": True}
+            },
+            {
+                "type": "context",
+                "elements": [{
+                    "type": "mrkdwn",
+                    "text": f"🕐 {since} → {delta.snapshot_at.strftime('%Y-%m-%d %H:%M')} (UTC)"
+                            f" | {len(delta.changes)} 个应用有变化"
+                }]
+            },
+            {"type": "divider"}
+        ]
+        blocks.extend(self.create_delta_blocks(delta))
+        blocks.extend(self.create_footer_blocks()[1:])
+
+        return {
+            "blocks": blocks,
+            "text": self._title(f"App Radar 变化报告 - {len(delta.changes)} 个应用有变化", watchlist)
+        }
+
+    def send_report(self, apps: List[Dict], top_n: int = 10,
+                    app_insights: Optional[Dict[str, str]] = None,
+                    chart_files: Optional[Dict[str, str]] = None) -> bool:
         """发送报告到 Slack"""
         if not self.webhook_url:
             print("❌ Slack webhook URL not configured")
             return False
 
-        message = self.create_message(apps, top_n)
+        message = self.create_message(apps, top_n, app_insights, chart_files)
+        chunks = chunk_message(message)
 
-        try:
-            response = requests.post(
-                self.webhook_url,
-                json=message,
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
-            response.raise_for_status()
-            print(f"✅ Report sent to Slack successfully")
+        delivery = WebhookDelivery()
+        result = asyncio.run(delivery.deliver(self.webhook_url, chunks))
+        if result.rate_limited:
+            print(f"⏳ Slack rate limited {result.rate_limited} time(s), retried after Retry-After")
+
+        if result.ok:
+            print(f"✅ Report sent to Slack successfully ({result.sent} message(s))")
             return True
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Failed to send to Slack: {e}")
-            return False
+        print(f"❌ Failed to send to Slack: {result.sent}/{len(chunks)} message(s) sent, "
+              f"{'; '.join(result.errors)}")
+        return False
 
     def upload_chart(self, chart_path: Path, channel: str = None) -> Optional[str]:
         """
-        上传图表到 Slack（需要 Slack App Token）
-        这个功能需要额外的 Slack API 配置
+        上传单张图表到 Slack（需要 Slack Bot Token）
+
+        Args:
+            chart_path: 图表文件路径
+            channel: 同时分享到的频道 ID，默认使用配置
+
+        Returns:
+            Optional[str]: Slack 文件 ID，上传失败时为 None
+        """
+        return self.upload_charts([chart_path], channel=channel).get(str(chart_path))
+
+    def upload_charts(self, chart_paths: List[Path], channel: str = None) -> Dict[str, str]:
+        """
+        并发上传多张图表，内容未变化的图表复用已上传的文件
+
+        Returns:
+            Dict[str, str]: 图表路径 -> Slack 文件 ID
         """
-        # TODO: 实现图表上传功能
-        # 需要使用 files.upload API 和 Bot Token
-        pass
+        if not settings.slack_bot_token:
+            print("⚠️  Slack Bot Token 未配置，跳过图表上传")
+            return {}
+
+        uploader = SlackFileUploader(channel=channel)
+        file_ids = uploader.upload_many(chart_paths)
+        print(f"🖼️  图表上传: 新上传 {uploader.uploaded} 张, 复用 {uploader.reused} 张")
+        return file_ids
+
+    def create_chart_blocks(self, chart_files: Dict[str, str]) -> List[Dict]:
+        """创建图表图片块（引用已上传的 Slack 文件）"""
+        blocks = []
+        for path, file_id in chart_files.items():
+            title = Path(path).stem.replace('_', ' ')
+            blocks.append({
+                "type": "image",
+                "slack_file": {"id": file_id},
+                "alt_text": title,
+                "title": {"type": "plain_text", "text": title[:2000]}
+            })
+        if blocks:
+            blocks.insert(0, {
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": "*📊 数据图表*"}
+            })
+            blocks.append({"type": "divider"})
+        return blocks
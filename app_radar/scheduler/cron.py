@@ -0,0 +1,118 @@
+"""
+App Radar Agent - Cron 表达式解析
+支持标准 5 字段格式（分 时 日 月 周），字段内可用 * / , - 组合
+"""
+from datetime import datetime, timedelta
+from typing import FrozenSet
+
+
+# (最小值, 最大值)
+FIELD_RANGES = [
+    (0, 59),   # minute
+    (0, 23),   # hour
+    (1, 31),   # day of month
+    (1, 12),   # month
+    (0, 7),    # day of week（0 = 周日，7 也视为周日，解析后归一为 0）
+]
+
+ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+# 搜索下一次触发时间的上限（避免 "2 月 30 日" 这类永不触发的表达式死循环）
+MAX_SEARCH_DAYS = 366 * 5
+
+
+def _parse_field(expr: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in expr.split(','):
+        step = 1
+        if '/' in part:
+            part, step_str = part.split('/', 1)
+            step = int(step_str)
+            if step <= 0:
+                raise ValueError(f"Invalid step in cron field: {expr}")
+
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_str, end_str = part.split('-', 1)
+            start, end = int(start_str), int(end_str)
+        else:
+            start = int(part)
+            end = high if step != 1 else start
+
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field out of range ({low}-{high}): {expr}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSpec:
+    """
+    解析后的 Cron 表达式
+
+    示例:
+        CronSpec("0 */8 * * *").next_after(datetime.now())
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr.strip()
+        fields = ALIASES.get(self.expr, self.expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expr!r}")
+
+        parsed = []
+        for field, (low, high) in zip(fields, FIELD_RANGES):
+            try:
+                parsed.append(_parse_field(field, low, high))
+            except ValueError as e:
+                raise ValueError(f"Invalid cron expression {expr!r}: {e}") from None
+
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # 周字段的 7 表示周日（包括 5-7、*/7 这类范围和步长）
+        self.weekdays = frozenset(0 if day == 7 else day for day in weekdays)
+        # 与 cron 一致：日和周都被限定时，满足其一即可
+        self._dom_restricted = fields[2] != '*'
+        self._dow_restricted = fields[4] != '*'
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._dom_restricted and self._dow_restricted:
+            return dom or dow
+        return dom and dow
+
+    def next_after(self, dt: datetime) -> datetime:
+        """
+        严格晚于 dt 的下一次触发时间
+
+        Args:
+            dt: 起始时间
+
+        Returns:
+            datetime: 下一次触发时间（秒和微秒为 0）
+        """
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=MAX_SEARCH_DAYS)
+
+        while candidate <= limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+
+        raise ValueError(f"Cron expression never fires: {self.expr!r}")
+
+    def __repr__(self) -> str:
+        return f"CronSpec({self.expr!r})"
+
@@ -0,0 +1,183 @@
+"""
+App Radar Agent - 常驻调度进程
+按固定间隔或 Cron 表达式周期运行流程，进程内保持数据库连接、HTTP 会话和缓存常驻
+"""
+import fcntl
+import os
+import random
+import signal
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from app_radar.config.settings import settings
+from app_radar.scheduler.cron import CronSpec
+
+
+class RunLockBusy(RuntimeError):
+    """另一个进程正在运行流程"""
+
+
+class RunLock:
+    """
+    跨进程的运行锁（flock），保证 cron 任务、手动运行和常驻进程不会同时执行流程
+
+    用法：
+        with RunLock():
+            run_full_pipeline()
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or settings.lock_path)
+        self._fh = None
+
+    def acquire(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(self.path, 'a+')
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.seek(0)
+            holder = fh.read().strip() or 'unknown'
+            fh.close()
+            raise RunLockBusy(f"Another App Radar run is in progress (pid {holder})")
+        fh.seek(0)
+        fh.truncate()
+        fh.write(str(os.getpid()))
+        fh.flush()
+        self._fh = fh
+
+    def release(self):
+        if self._fh is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self) -> 'RunLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class Daemon:
+    """
+    常驻调度器
+
+    - 间隔模式：按计划时间每 interval_hours 运行一轮；Cron 模式：按表达式触发
+    - 每次触发加上 0 ~ jitter_seconds 的随机延迟，避免多实例同时请求上游 API
+    - 同一进程内顺序执行，并通过 RunLock 避免与其他进程重叠；
+      某一轮超时错过的触发点直接跳过，不会补跑
+    - SIGTERM / SIGINT：等待中立即退出；运行中则跑完当前一轮后退出，
+      再次收到信号时强制中断
+    """
+
+    def __init__(self, run_cycle: Callable[[], None], interval_hours: Optional[float] = None,
+                 cron: Optional[str] = None, jitter_seconds: Optional[float] = None,
+                 lock: Optional[RunLock] = None):
+        self.run_cycle = run_cycle
+        self.cron = CronSpec(cron) if cron else None
+        if interval_hours is None:
+            interval_hours = settings.schedule_interval_hours
+        if interval_hours <= 0:
+            raise ValueError(f"Schedule interval must be positive: {interval_hours} hours")
+        self.interval = timedelta(hours=interval_hours)
+        self.jitter_seconds = settings.schedule_jitter_seconds if jitter_seconds is None else jitter_seconds
+        self.lock = lock or RunLock()
+        self.cycles = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._running = False
+
+    def next_run(self, last_base: datetime, now: datetime) -> datetime:
+        """
+        计算下一次运行时间（不含抖动）
+
+        Args:
+            last_base: 上一轮的计划时间（间隔模式使用）
+            now: 当前时间
+        """
+        if self.cron:
+            return self.cron.next_after(now)
+        scheduled = last_base + self.interval
+        while scheduled < now:
+            # 上一轮超过了间隔，跳过错过的触发点
+            scheduled += self.interval
+        return scheduled
+
+    def _handle_signal(self, signum, frame):
+        if self._stop.is_set() and self._running:
+            raise KeyboardInterrupt
+        name = signal.Signals(signum).name
+        if self._running:
+            print(f"\n🛑 收到 {name}，当前一轮完成后退出（再次发送强制中断）")
+        else:
+            print(f"\n🛑 收到 {name}，退出")
+        self._stop.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+    def stop(self):
+        self._stop.set()
+
+    def _run_once(self):
+        self._running = True
+        started = time.monotonic()
+        try:
+            with self.lock:
+                self.run_cycle()
+            self.cycles += 1
+            print(f"⏱️  本轮耗时 {time.monotonic() - started:.1f}s")
+        except RunLockBusy as e:
+            print(f"⏭️  跳过本轮: {e}")
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            self.failures += 1
+            print(f"❌ 本轮运行失败: {e}")
+            traceback.print_exc()
+        finally:
+            self._running = False
+
+    def run(self, run_immediately: bool = True):
+        """
+        主循环，直到收到停止信号
+
+        Args:
+            run_immediately: 启动后立即运行一轮（Cron 模式下忽略，按表达式等待）
+        """
+        mode = f"cron '{self.cron.expr}'" if self.cron else f"每 {self.interval} 运行"
+        print(f"🛰️  App Radar 常驻模式启动 (pid {os.getpid()}): {mode}, 抖动 ≤ {self.jitter_seconds:.0f}s")
+
+        # 以计划时间（不含抖动）推算下一轮，抖动不会累积
+        last_base: Optional[datetime] = None
+        first = run_immediately and not self.cron
+        while not self._stop.is_set():
+            now = datetime.now()
+            if first:
+                base = target = now
+                first = False
+            else:
+                base = self.next_run(last_base or now, now)
+                target = base + timedelta(seconds=random.uniform(0, self.jitter_seconds))
+                print(f"💤 下一轮: {target.strftime('%Y-%m-%d %H:%M:%S')}")
+
+            # 分段等待，系统时间调整时也能及时醒来
+            while not self._stop.is_set():
+                remaining = (target - datetime.now()).total_seconds()
+                if remaining <= 0:
+                    break
+                self._stop.wait(min(remaining, 60))
+            if self._stop.is_set():
+                break
+
+            last_base = base
+            self._run_once()
+
+        print(f"👋 常驻模式退出: 完成 {self.cycles} 轮, 失败 {self.failures} 轮")
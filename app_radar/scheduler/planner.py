@@ -0,0 +1,94 @@
+"""
+App Radar Agent - 采集计划
+合并所有关注列表的应用：每轮每款应用只采集一次，采集结果再分发到各列表的报告
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from app_radar.config.settings import settings
+from app_radar.config.watchlists import DEFAULT_WATCHLIST, Watchlist, load_watchlists
+from app_radar.models.snapshot import AppSnapshot
+from app_radar.storage.watchlist import tracked_app_terms
+
+
+def normalize_term(term: str) -> str:
+    """同一应用在不同列表中的写法可能只差大小写或空白"""
+    return ' '.join(term.split()).casefold()
+
+
+def unique_snapshots(snapshots: Iterable[AppSnapshot]) -> List[AppSnapshot]:
+    """按 trackId 去重（不同的搜索词可能命中同一款应用），保持顺序"""
+    seen = set()
+    unique = []
+    for snapshot in snapshots:
+        if snapshot.track_id not in seen:
+            seen.add(snapshot.track_id)
+            unique.append(snapshot)
+    return unique
+
+
+@dataclass
+class FetchPlan:
+    """
+    一轮采集计划
+
+    terms 为去重后的采集列表（保留第一次出现时的写法），lists 为参与本轮报告的关注列表
+    """
+    lists: List[Watchlist]
+    terms: List[str] = field(default_factory=list)
+    _canonical: Dict[str, str] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, watchlists: List[Watchlist]) -> 'FetchPlan':
+        plan = cls(lists=watchlists)
+        for watchlist in watchlists:
+            for term in watchlist.apps:
+                key = normalize_term(term)
+                if key not in plan._canonical:
+                    plan._canonical[key] = term
+                    plan.terms.append(term)
+        return plan
+
+    @property
+    def requested(self) -> int:
+        """各列表应用数之和（去重前）"""
+        return sum(len(watchlist.apps) for watchlist in self.lists)
+
+    def snapshots_for(self, watchlist: Watchlist,
+                      fetched: Dict[str, AppSnapshot]) -> List[AppSnapshot]:
+        """
+        从本轮共享的采集结果中取出某个列表的应用
+
+        Args:
+            watchlist: 关注列表
+            fetched: 采集标识 -> 应用快照（fetch 阶段的结果）
+
+        Returns:
+            List[AppSnapshot]: 该列表中采集成功的应用，按列表顺序
+        """
+        snapshots = (fetched.get(self._canonical[normalize_term(term)]) for term in watchlist.apps)
+        return unique_snapshots(snapshot for snapshot in snapshots if snapshot is not None)
+
+    def summary(self) -> str:
+        return (f"{len(self.lists)} 个关注列表, 共 {self.requested} 项, "
+                f"去重后采集 {len(self.terms)} 款")
+
+
+def build_fetch_plan(db, target_apps: Optional[List[str]] = None) -> FetchPlan:
+    """
+    生成本轮采集计划
+
+    Args:
+        db: 数据库会话
+        target_apps: 自定义应用列表；提供时只有这一个列表（不读取关注列表文件）
+
+    Returns:
+        FetchPlan: 默认列表（target_apps + 关注列表，报告发往 SLACK_WEBHOOK_URL）
+        和关注列表文件中的命名列表
+    """
+    if target_apps is not None:
+        return FetchPlan.build([Watchlist(DEFAULT_WATCHLIST, list(target_apps),
+                                          settings.slack_webhook_url)])
+
+    default = Watchlist(DEFAULT_WATCHLIST, tracked_app_terms(db), settings.slack_webhook_url)
+    return FetchPlan.build([default, *load_watchlists()])
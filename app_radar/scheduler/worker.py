@@ -0,0 +1,173 @@
+"""
+App Radar Agent - 采集 worker
+从 fetch_jobs 表领取任务并采集；可在一台或多台机器上（共享数据库）启动任意多个
+"""
+import os
+import socket
+import threading
+import time
+from typing import Optional
+
+from app_radar.config.settings import settings
+from app_radar.data_sources.base import BaseDataSource
+from app_radar.data_sources.itunes import ITunesDataSource
+from app_radar.storage.database import get_db_session, save_app_snapshot
+from app_radar.storage.jobs import (
+    claim_job, complete_duplicate, complete_job, fail_job, heartbeat, requeue_expired
+)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident() % 10000}"
+
+
+class _Heartbeat(threading.Thread):
+    """任务执行期间定期续约；续约失败说明租约已丢失"""
+
+    def __init__(self, job_id: int, token: str, lease_seconds: int):
+        super().__init__(name=f'heartbeat-{job_id}', daemon=True)
+        self.job_id = job_id
+        self.token = token
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._done = threading.Event()
+
+    def run(self):
+        interval = max(self.lease_seconds / 3, 1)
+        while not self._done.wait(interval):
+            db = get_db_session()
+            try:
+                if not heartbeat(db, self.job_id, self.token, self.lease_seconds):
+                    self.lost = True
+                    return
+            except Exception as e:
+                # 数据库暂时不可用：下次再试，租约未过期前仍然有效
+                db.rollback()
+                print(f"⚠️  Heartbeat failed for job {self.job_id}: {e}")
+            finally:
+                db.close()
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class FetchWorker:
+    """
+    采集 worker
+
+    用法：
+        worker = FetchWorker()
+        worker.run()                 # 常驻，直到 stop()
+        worker.run(until_idle=True)  # 队列为空时退出
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, source: Optional[BaseDataSource] = None,
+                 lease_seconds: Optional[int] = None, cycle_id: Optional[str] = None,
+                 request_interval: Optional[float] = None, verbose: bool = True):
+        self.worker_id = worker_id or default_worker_id()
+        self.source = source or ITunesDataSource()
+        self.lease_seconds = lease_seconds or settings.job_lease_seconds
+        self.cycle_id = cycle_id
+        self.request_interval = settings.fetch_interval if request_interval is None else request_interval
+        self.verbose = verbose
+        self.completed = 0
+        self.failed = 0
+        self.lost = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _log(self, message: str):
+        if self.verbose:
+            print(message)
+
+    def process_one(self) -> bool:
+        """
+        领取并处理一个任务
+
+        Returns:
+            bool: 是否领取到任务
+        """
+        db = get_db_session()
+        try:
+            job = claim_job(db, self.worker_id, self.lease_seconds, cycle_id=self.cycle_id)
+            if job is None:
+                return False
+            job_id, token, app_name = job.id, job.lease_token, job.app_name
+        finally:
+            db.close()
+
+        beat = _Heartbeat(job_id, token, self.lease_seconds)
+        beat.start()
+        try:
+            result = self.source.fetch_with_retry(app_name)
+        except Exception as e:
+            beat.stop()
+            db = get_db_session()
+            try:
+                fail_job(db, job_id, token, str(e))
+            finally:
+                db.close()
+            self.failed += 1
+            self._log(f"❌ [{self.worker_id}] {app_name}: {e}")
+            return True
+        beat.stop()
+
+        # 数据写入与任务完成在同一事务中，租约已丢失时整体回滚
+        db = get_db_session()
+        try:
+            app = save_app_snapshot(db, result.app_identifier, result.data, source=result.source)
+            if not beat.lost and complete_job(db, job_id, token, app.id, result.data.to_dict()):
+                db.commit()
+                self.completed += 1
+                self._log(f"✅ [{self.worker_id}] {app_name}")
+            else:
+                db.rollback()
+                if not beat.lost and complete_duplicate(db, job_id, token, result.app_identifier):
+                    # 另一个搜索词已在本轮写入同一应用，不重复写入指标
+                    self.completed += 1
+                    self._log(f"↩️  [{self.worker_id}] {app_name}: same app as another job, reused")
+                else:
+                    self.lost += 1
+                    self._log(f"⚠️  [{self.worker_id}] {app_name}: lease lost, result discarded")
+        except Exception as e:
+            db.rollback()
+            fail_job(db, job_id, token, f"Write failed: {e}")
+            self.failed += 1
+            self._log(f"❌ [{self.worker_id}] {app_name}: write failed: {e}")
+        finally:
+            db.close()
+        return True
+
+    def run(self, until_idle: bool = False, max_jobs: Optional[int] = None):
+        """
+        循环领取任务
+
+        Args:
+            until_idle: 队列为空时退出
+            max_jobs: 最多处理的任务数
+        """
+        processed = 0
+        last_reap = 0.0
+        while not self._stop.is_set():
+            # 定期回收过期租约（领取时也会接手过期任务，这里主要处理超过重试次数的任务）
+            if time.monotonic() - last_reap > self.lease_seconds:
+                db = get_db_session()
+                try:
+                    requeue_expired(db)
+                finally:
+                    db.close()
+                last_reap = time.monotonic()
+
+            if self.process_one():
+                processed += 1
+                if max_jobs and processed >= max_jobs:
+                    break
+                self._stop.wait(self.request_interval)
+                continue
+
+            if until_idle:
+                break
+            self._stop.wait(settings.worker_poll_interval)
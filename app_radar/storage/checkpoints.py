@@ -0,0 +1,149 @@
+"""
+App Radar Agent - 流程检查点
+记录每次运行的参数和各阶段进度（按应用 / 阶段），中断后可继续而无需重新采集
+"""
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app_radar.config.settings import settings
+from app_radar.storage.database import PipelineRun, RunCheckpoint
+
+
+STAGE_RANKED = 'ranked'
+STAGE_FETCHED = 'fetched'
+STAGE_WRITTEN = 'written'
+STAGE_CHARTED = 'charted'
+STAGE_REPORTED = 'reported'
+PIPELINE_STAGES = (STAGE_RANKED, STAGE_FETCHED, STAGE_WRITTEN, STAGE_CHARTED, STAGE_REPORTED)
+
+# 整轮阶段（非按应用）的 key
+RUN_KEY = '*'
+
+RUN_RUNNING = 'running'
+RUN_COMPLETED = 'completed'
+RUN_FAILED = 'failed'
+RUN_INTERRUPTED = 'interrupted'
+RUN_EXPIRED = 'expired'  # 未完成但检查点已过期清理，不能再继续
+
+
+def new_run_id(now: Optional[datetime] = None) -> str:
+    now = now or datetime.utcnow()
+    return f"run-{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def start_run(db, params: Dict[str, Any]) -> PipelineRun:
+    """创建运行记录（函数内提交）"""
+    run = PipelineRun(id=new_run_id(), status=RUN_RUNNING,
+                      params=json.dumps(params, ensure_ascii=False))
+    db.add(run)
+    db.commit()
+    return run
+
+
+def find_resumable_run(db, run_id: Optional[str] = None) -> Optional[PipelineRun]:
+    """
+    查找可继续的运行
+
+    Args:
+        db: 数据库会话
+        run_id: 指定的 run id；为空时取最近一次未完成的运行
+
+    Returns:
+        Optional[PipelineRun]: 运行记录，不存在或已完成时返回 None
+    """
+    query = db.query(PipelineRun).filter(PipelineRun.status.notin_([RUN_COMPLETED, RUN_EXPIRED]))
+    if run_id:
+        return query.filter(PipelineRun.id == run_id).first()
+    return query.order_by(PipelineRun.started_at.desc()).first()
+
+
+def reopen_run(db, run: PipelineRun):
+    """继续运行前重置状态（函数内提交）"""
+    run.status = RUN_RUNNING
+    run.error = None
+    run.finished_at = None
+    db.commit()
+
+
+def finish_run(db, run_id: str, status: str, error: Optional[str] = None):
+    """
+    记录运行结束状态（函数内提交）
+
+    完成的运行不会再继续，删除其检查点（包含每个应用的完整采集数据）；
+    同时清理过期的未完成运行。
+    """
+    run = db.get(PipelineRun, run_id)
+    if run is None:
+        return
+    run.status = status
+    run.error = error
+    run.finished_at = datetime.utcnow()
+    if status == RUN_COMPLETED:
+        db.execute(delete(RunCheckpoint).where(RunCheckpoint.run_id == run_id))
+    prune_runs(db)
+    db.commit()
+
+
+def prune_runs(db, retention_days: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """
+    删除超过保留期的未完成运行的检查点，并将这些运行标记为 expired（调用方负责 commit）
+
+    Args:
+        db: 数据库会话
+        retention_days: 保留天数，默认 run_checkpoint_retention_days
+        now: 当前时间
+
+    Returns:
+        int: 标记为过期的运行数
+    """
+    retention_days = settings.run_checkpoint_retention_days if retention_days is None else retention_days
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    stale = select(PipelineRun.id).where(
+        PipelineRun.status.notin_([RUN_COMPLETED, RUN_EXPIRED]),
+        PipelineRun.started_at < cutoff,
+    )
+    db.execute(delete(RunCheckpoint).where(RunCheckpoint.run_id.in_(stale)))
+    return db.execute(
+        update(PipelineRun)
+        .where(PipelineRun.id.in_(stale))
+        .values(status=RUN_EXPIRED)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def save_checkpoint(db, run_id: str, stage: str, key: str = RUN_KEY, data: Any = None):
+    """
+    写入检查点（已存在时覆盖数据；不提交，可与业务写入放在同一事务中）
+
+    Args:
+        db: 数据库会话
+        run_id: run id
+        stage: 阶段
+        key: 应用名称，整轮阶段为 RUN_KEY
+        data: 可 JSON 序列化的数据
+    """
+    payload = json.dumps(data, ensure_ascii=False, default=str) if data is not None else None
+    stmt = sqlite_insert(RunCheckpoint).values(
+        run_id=run_id, stage=stage, key=key, data=payload, created_at=datetime.utcnow()
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=['run_id', 'stage', 'key'],
+        set_={'data': stmt.excluded.data, 'created_at': stmt.excluded.created_at},
+    ))
+    db.query(PipelineRun).filter(PipelineRun.id == run_id).update(
+        {PipelineRun.last_stage: stage}, synchronize_session=False
+    )
+
+
+def load_checkpoints(db, run_id: str, stage: str) -> Dict[str, Any]:
+    """读取某阶段的所有检查点：key -> data"""
+    rows = db.execute(
+        select(RunCheckpoint.key, RunCheckpoint.data)
+        .where(RunCheckpoint.run_id == run_id, RunCheckpoint.stage == stage)
+    ).all()
+    return {key: json.loads(data) if data else None for key, data in rows}
@@ -2,11 +2,18 @@
 App Radar Agent - 数据库模型
 使用 SQLAlchemy ORM 实现数据持久化
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, ForeignKey
+from sqlalchemy import (
+    create_engine, inspect, text, Boolean, Column, Integer, String, Float, DateTime, Text,
+    ForeignKey, Index, UniqueConstraint
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
+from typing import Optional
+import hashlib
 from app_radar.config.settings import settings
+from app_radar.models.snapshot import AppSnapshot
+from app_radar.utils import monitoring
 
 Base = declarative_base()
 
@@ -22,11 +29,13 @@ class App(Base):
     developer = Column(String)
     category = Column(String)
     url = Column(String)
+    company_id = Column(Integer, ForeignKey('company_info.id'), index=True)
     first_tracked_at = Column(DateTime, default=datetime.utcnow)
     last_updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     metrics = relationship("Metric", back_populates="app", cascade="all, delete-orphan")
+    company = relationship("CompanyInfo", back_populates="apps")
 
     def __repr__(self):
         return f"<App(id={self.id}, name='{self.name}', platform='{self.platform}')>"
@@ -35,6 +44,9 @@ class App(Base):
 class Metric(Base):
     """应用指标历史记录表"""
     __tablename__ = "metrics"
+    __table_args__ = (
+        Index('ix_metrics_app_timestamp', 'app_id', 'timestamp'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     app_id = Column(Integer, ForeignKey('apps.id'), nullable=False, index=True)
@@ -64,6 +76,37 @@ class Metric(Base):
         return f"<Metric(app_id={self.app_id}, rating={self.rating}, timestamp={self.timestamp})>"
 
 
+class AppDescription(Base):
+    """应用最新描述表（全文检索的数据源）"""
+    __tablename__ = "app_descriptions"
+
+    app_id = Column(Integer, ForeignKey('apps.id'), primary_key=True)
+    description = Column(Text, default='')
+    content_hash = Column(String)  # 描述内容的哈希，用于判断是否变化
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AppDescription(app_id={self.app_id}, hash='{self.content_hash}')>"
+
+
+class AppVersion(Base):
+    """应用版本历史表 - 仅在版本变化时写入"""
+    __tablename__ = "app_versions"
+    __table_args__ = (
+        UniqueConstraint('app_id', 'version', name='uq_app_versions_app_version'),
+        Index('ix_app_versions_app_released', 'app_id', 'released_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    app_id = Column(Integer, ForeignKey('apps.id'), nullable=False)
+    version = Column(String, nullable=False)
+    released_at = Column(DateTime)  # currentVersionReleaseDate
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AppVersion(app_id={self.app_id}, version='{self.version}', released_at={self.released_at})>"
+
+
 class CompanyInfo(Base):
     """公司信息表"""
     __tablename__ = "company_info"
@@ -77,12 +120,224 @@ class CompanyInfo(Base):
     last_funding_date = Column(DateTime)
     headquarters = Column(String)
     founded_year = Column(Integer)
+    source = Column(String)  # 数据来源，查无结果时为空记录（作为负缓存）
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Relationships
+    apps = relationship("App", back_populates="company")
+
     def __repr__(self):
         return f"<CompanyInfo(name='{self.company_name}', funding=${self.funding_total})>"
 
 
+class InsightCache(Base):
+    """LLM 洞察缓存表 - 以输入快照哈希为主键"""
+    __tablename__ = "insights"
+
+    snapshot_hash = Column(String, primary_key=True)
+    app_identifier = Column(String, index=True)
+    model = Column(String)
+    content = Column(Text, nullable=False)
+    input_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<InsightCache(app='{self.app_identifier}', model='{self.model}')>"
+
+
+class OutboxMessage(Base):
+    """待投递消息表 - 报告先持久化，再由后台投递器发送"""
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(String, nullable=False, default='slack_webhook')
+    target = Column(String, nullable=False)  # Webhook URL 等投递目标
+    dedupe_key = Column(String, nullable=False, unique=True)
+    payload = Column(Text, nullable=False)  # JSON 消息列表，按顺序发送
+    progress = Column(Integer, default=0)  # 已送达的消息数，重试时从此处继续
+    status = Column(String, default='pending')  # pending / sending / delivered / dead
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    lease_token = Column(String)  # 领取本条记录的投递器本次领取的标识
+    lease_expires_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+        Index('ix_outbox_target_status', 'target', 'status'),
+    )
+
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, channel='{self.channel}', status='{self.status}')>"
+
+
+class FetchJob(Base):
+    """采集任务表 - 每轮采集按应用拆分，多个 worker 通过租约领取"""
+    __tablename__ = "fetch_jobs"
+    __table_args__ = (
+        UniqueConstraint('cycle_id', 'app_name', name='uq_fetch_jobs_cycle_app'),
+        Index('ix_fetch_jobs_status_lease', 'status', 'lease_expires_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cycle_id = Column(String, nullable=False, index=True)
+    app_name = Column(String, nullable=False)  # 搜索词
+    status = Column(String, nullable=False, default='queued')  # queued / leased / done / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_owner = Column(String)
+    lease_token = Column(String)  # 每次领取生成新值，只有持有者能续约和提交
+    lease_expires_at = Column(DateTime)
+    app_id = Column(Integer, ForeignKey('apps.id'))
+    result = Column(Text)  # 采集到的应用数据 JSON，供发起方汇总
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<FetchJob(cycle='{self.cycle_id}', app='{self.app_name}', status='{self.status}')>"
+
+
+class PipelineRun(Base):
+    """流程运行记录 - 中断后可按 run id 继续"""
+    __tablename__ = "pipeline_runs"
+
+    id = Column(String, primary_key=True)
+    status = Column(String, nullable=False, default='running')  # running / completed / failed / interrupted / expired
+    params = Column(Text)  # JSON：top_n / target_apps / delta / formats / distributed
+    last_stage = Column(String)
+    error = Column(Text)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<PipelineRun(id='{self.id}', status='{self.status}')>"
+
+
+class RunCheckpoint(Base):
+    """流程检查点 - 每个应用 / 阶段完成后写入一条"""
+    __tablename__ = "run_checkpoints"
+    __table_args__ = (
+        UniqueConstraint('run_id', 'stage', 'key', name='uq_run_checkpoints_run_stage_key'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String, ForeignKey('pipeline_runs.id'), nullable=False, index=True)
+    stage = Column(String, nullable=False)  # ranked / fetched / written / charted / reported
+    key = Column(String, nullable=False)  # 应用名称；整轮阶段为 '*'
+    data = Column(Text)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<RunCheckpoint(run='{self.run_id}', stage='{self.stage}', key='{self.key}')>"
+
+
+class ChartUpload(Base):
+    """已上传到 Slack 的图表 - 以图片内容哈希去重"""
+    __tablename__ = "chart_uploads"
+
+    content_hash = Column(String, primary_key=True)
+    file_id = Column(String, nullable=False)
+    filename = Column(String)
+    size = Column(Integer)
+    uploaded_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ChartUpload(file_id='{self.file_id}', filename='{self.filename}')>"
+
+
+class ReportSnapshot(Base):
+    """已发送报告所基于的指标快照 - 增量报告以上一次快照为基线"""
+    __tablename__ = "report_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    report_type = Column(String, nullable=False)  # full / delta
+    snapshot_at = Column(DateTime, nullable=False, index=True)  # 报告使用的最新指标时间
+    top_n = Column(Integer)
+    change_count = Column(Integer)
+    outbox_id = Column(Integer, ForeignKey('outbox.id'))
+    watchlist = Column(String, index=True)  # 关注列表名称，默认列表为 NULL
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ReportSnapshot(type='{self.report_type}', snapshot_at={self.snapshot_at})>"
+
+
+class ChartRank(Base):
+    """榜单排名表 - 每次抓取榜单为一个快照，按 (国家, 榜单, 类别, 名次) 写入"""
+    __tablename__ = "chart_ranks"
+    __table_args__ = (
+        UniqueConstraint('snapshot_at', 'country', 'chart', 'genre', 'rank',
+                         name='uq_chart_ranks_snapshot_position'),
+        Index('ix_chart_ranks_app_snapshot', 'app_id', 'snapshot_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    snapshot_at = Column(DateTime, nullable=False, index=True)
+    country = Column(String, nullable=False)
+    chart = Column(String, nullable=False)  # topfreeapplications / toppaidapplications / ...
+    genre = Column(String, nullable=False)  # 类别名称，总榜为 'all'
+    rank = Column(Integer, nullable=False)
+    app_id = Column(Integer, ForeignKey('apps.id'), nullable=False)
+
+    def __repr__(self):
+        return f"<ChartRank({self.country}/{self.chart}/{self.genre} #{self.rank}, app_id={self.app_id})>"
+
+
+class Review(Base):
+    """用户评论表 - 主键为 App Store 评论 ID，重复抓取时覆盖（评论可被编辑）"""
+    __tablename__ = "reviews"
+    __table_args__ = (
+        Index('ix_reviews_app_updated', 'app_id', 'updated_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # App Store 评论 ID
+    app_id = Column(Integer, ForeignKey('apps.id'), nullable=False)
+    country = Column(String, nullable=False)
+    rating = Column(Integer)
+    title = Column(String)
+    content = Column(Text)
+    author = Column(String)
+    version = Column(String)  # 评论时的应用版本
+    vote_count = Column(Integer, default=0)
+    updated_at = Column(DateTime)  # 评论发布或最后编辑时间
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Review(id={self.id}, app_id={self.app_id}, rating={self.rating})>"
+
+
+class ReviewCursor(Base):
+    """评论增量游标 - 每个应用 / 国家已写入的最新评论 (时间, ID)，翻页遇到不晚于它的评论即停止"""
+    __tablename__ = "review_cursors"
+
+    app_id = Column(Integer, ForeignKey('apps.id'), primary_key=True)
+    country = Column(String, primary_key=True)
+    last_review_at = Column(DateTime)
+    last_review_id = Column(Integer)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ReviewCursor(app_id={self.app_id}, country='{self.country}', last_review_at={self.last_review_at})>"
+
+
+class WatchlistEntry(Base):
+    """关注列表 - 除配置中的 target_apps 外额外采集的应用（如榜单自动发现）"""
+    __tablename__ = "watchlist"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    app_id = Column(Integer, ForeignKey('apps.id'), nullable=False, unique=True)
+    source = Column(String, nullable=False, default='charts')  # 加入方式
+    reason = Column(String)  # 如 "us/topfreeapplications/Games #3"
+    active = Column(Boolean, nullable=False, default=True)
+    added_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<WatchlistEntry(app_id={self.app_id}, source='{self.source}', active={self.active})>"
+
+
 # === 数据库引擎和会话 ===
 engine = create_engine(
     settings.database_url,
@@ -93,9 +348,46 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def upgrade_schema(bind=engine) -> list:
+    """
+    为已存在的表补齐新增的可空列和索引（create_all 不会修改已有表）
+
+    Returns:
+        list: 新增的 "表.列" / 索引名列表
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+                added.append(f"{table.name}.{column.name}")
+
+            existing_indexes = {ix['name'] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    added.append(index.name)
+
+    return added
+
+
 def init_db():
     """初始化数据库 - 创建所有表"""
+    from app_radar.storage.search import init_search_index
+
     Base.metadata.create_all(engine)
+    for name in upgrade_schema(engine):
+        print(f"🔧 数据库升级: 新增 {name}")
+    init_search_index(engine)
     print("✅ Database initialized successfully")
 
 
@@ -111,3 +403,116 @@ def get_db():
 def get_db_session():
     """获取数据库会话 - 直接返回"""
     return SessionLocal()
+
+
+def upsert_app_description(db, app_id: int, description: str) -> bool:
+    """
+    写入应用最新描述（内容未变化时不写库，避免无谓的全文索引更新）
+
+    Args:
+        db: 数据库会话
+        app_id: apps 表主键
+        description: 应用描述
+
+    Returns:
+        bool: 是否发生了写入
+    """
+    description = description or ''
+    content_hash = hashlib.sha1(description.encode('utf-8')).hexdigest()
+
+    record = db.get(AppDescription, app_id)
+    if record is None:
+        db.add(AppDescription(app_id=app_id, description=description, content_hash=content_hash))
+        db.flush()
+        return True
+    if record.content_hash == content_hash:
+        return False
+
+    record.description = description
+    record.content_hash = content_hash
+    return True
+
+
+def parse_store_datetime(value: Optional[str]) -> Optional[datetime]:
+    """解析 App Store 的 ISO 8601 时间（如 2024-05-01T07:00:00Z），失败时返回 None"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def record_app_version(db, app_id: int, version: str, released_at: Optional[datetime]) -> bool:
+    """
+    记录应用版本（版本已存在时不写库）
+
+    Args:
+        db: 数据库会话
+        app_id: apps 表主键
+        version: 版本号
+        released_at: 版本发布时间
+
+    Returns:
+        bool: 是否新增了版本记录
+    """
+    if not version:
+        return False
+
+    exists = db.query(AppVersion.id).filter_by(app_id=app_id, version=version).first()
+    if exists:
+        return False
+
+    db.add(AppVersion(app_id=app_id, version=version, released_at=released_at))
+    db.flush()
+    return True
+
+
+def save_app_snapshot(db, app_identifier: str, data: AppSnapshot, source: str = 'itunes') -> App:
+    """
+    保存一次采集结果：应用信息、指标、描述和版本历史（调用方负责 commit）
+
+    Args:
+        db: 数据库会话
+        app_identifier: 应用标识符（trackId）
+        data: 数据源返回的应用快照
+        source: 数据来源
+
+    Returns:
+        App: 应用记录
+    """
+    with monitoring.timed('app_radar_db_write_seconds', op='app_snapshot'):
+        app_record = db.query(App).filter_by(app_identifier=app_identifier).first()
+
+        if not app_record:
+            # 创建新记录
+            app_record = App(
+                app_identifier=app_identifier,
+                name=data.name,
+                platform='ios',
+                developer=data.developer,
+                category=data.category,
+                url=data.url
+            )
+            db.add(app_record)
+            db.flush()
+
+        # 添加指标记录
+        db.add(Metric(
+            app_id=app_record.id,
+            rating=data.rating,
+            rating_count=data.rating_count,
+            version=data.version,
+            source=source
+        ))
+
+        # 更新描述（触发器同步全文索引）
+        upsert_app_description(db, app_record.id, data.description)
+
+        # 版本变化时记录版本历史
+        record_app_version(
+            db, app_record.id, data.version,
+            parse_store_datetime(data.current_version_release_date)
+        )
+
+    return app_record
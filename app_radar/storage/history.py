@@ -0,0 +1,69 @@
+"""
+App Radar Agent - 指标历史查询
+按时间范围从 metrics 表读取多个应用的时间序列
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app_radar.storage.database import get_db_session, App, Metric
+
+
+HISTORY_FIELDS = ('rating_count', 'rating')
+
+
+def load_metric_history(app_identifiers: Iterable[str], start: datetime,
+                        end: Optional[datetime] = None,
+                        field: str = 'rating_count') -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    读取多个应用在时间范围内的指标序列（单次查询，走 (app_id, timestamp) 索引）
+
+    按应用标识（trackId）而不是名称查询：同名的不同应用各自是一条序列。
+
+    Args:
+        app_identifiers: 应用标识（trackId）
+        start: 起始时间（含）
+        end: 结束时间（含），默认为当前时间
+        field: 指标字段，rating_count 或 rating
+
+    Returns:
+        Dict[str, Tuple[np.ndarray, np.ndarray]]: 应用标识 -> (epoch 秒, 指标值)，按时间升序
+    """
+    if field not in HISTORY_FIELDS:
+        raise ValueError(f"Unsupported history field: {field}")
+
+    app_identifiers = [str(identifier) for identifier in app_identifiers]
+    if not app_identifiers:
+        return {}
+
+    column = getattr(Metric, field)
+    stmt = (
+        select(App.app_identifier, Metric.timestamp, column)
+        .join(App, App.id == Metric.app_id)
+        .where(App.app_identifier.in_(app_identifiers))
+        .where(Metric.timestamp >= start)
+        .where(column.isnot(None))
+        .order_by(Metric.app_id, Metric.timestamp)
+    )
+    if end is not None:
+        stmt = stmt.where(Metric.timestamp <= end)
+
+    db = get_db_session()
+    try:
+        rows = db.execute(stmt).all()
+    finally:
+        db.close()
+
+    grouped: Dict[str, Tuple[list, list]] = {}
+    for identifier, timestamp, value in rows:
+        xs, ys = grouped.setdefault(identifier, ([], []))
+        xs.append(timestamp)
+        ys.append(value)
+
+    return {
+        identifier: (np.array(xs, dtype='datetime64[s]').astype(np.int64).astype(np.float64),
+                     np.array(ys, dtype=np.float64))
+        for identifier, (xs, ys) in grouped.items()
+    }
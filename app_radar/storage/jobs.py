@@ -0,0 +1,341 @@
+"""
+App Radar Agent - 采集任务队列
+每轮采集按应用拆分为任务，worker 以有时限的租约领取、心跳续约，过期任务自动重新入队；
+提交结果时校验租约令牌，与数据写入在同一事务中，保证每轮每个应用只成功写入一次
+（不同搜索词解析到同一 trackId 时也只写入一次）
+"""
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+
+from app_radar.config.settings import settings
+from app_radar.models.snapshot import AppSnapshot
+from app_radar.storage.database import App, FetchJob
+
+
+STATUS_QUEUED = 'queued'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+def new_cycle_id(now: Optional[datetime] = None) -> str:
+    """生成采集轮次 ID（时间前缀便于排序和排查）"""
+    now = now or datetime.utcnow()
+    return f"{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def _insert_new_jobs(db, rows: List[Dict]) -> int:
+    """
+    插入任务，(cycle_id, app_name) 已存在的跳过（多台主机共用数据库时不限于 SQLite）
+
+    Returns:
+        int: 新插入的任务数
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert_stmt = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        return db.execute(
+            insert_stmt(FetchJob).values(rows).on_conflict_do_nothing(
+                index_elements=['cycle_id', 'app_name']
+            )
+        ).rowcount
+
+    # 其他数据库：先查已有任务再插入（同一轮只由发起方入队）
+    existing = set(db.execute(
+        select(FetchJob.app_name).where(
+            FetchJob.cycle_id == rows[0]['cycle_id'],
+            FetchJob.app_name.in_([row['app_name'] for row in rows]),
+        )
+    ).scalars())
+    rows = [row for row in rows if row['app_name'] not in existing]
+    if rows:
+        db.execute(insert(FetchJob), rows)
+    return len(rows)
+
+
+def enqueue_cycle(db, app_names: Iterable[str], cycle_id: Optional[str] = None) -> Tuple[str, int]:
+    """
+    为一轮采集创建任务（同一轮内重复的应用只入队一次，调用方负责 commit）
+
+    新建轮次时顺带清理较早轮次中已结束的任务（见 prune_cycles）。
+
+    Args:
+        db: 数据库会话
+        app_names: 应用名称（搜索词）
+        cycle_id: 轮次 ID，默认新建
+
+    Returns:
+        Tuple[str, int]: (轮次 ID, 新建任务数)
+    """
+    if cycle_id is None:
+        cycle_id = new_cycle_id()
+        prune_cycles(db, keep=max(settings.job_retention_cycles - 1, 0))
+    rows = [{'cycle_id': cycle_id, 'app_name': name, 'status': STATUS_QUEUED, 'attempts': 0,
+             'created_at': datetime.utcnow()}
+            for name in dict.fromkeys(app_names)]
+    if not rows:
+        return cycle_id, 0
+    return cycle_id, _insert_new_jobs(db, rows)
+
+
+def prune_cycles(db, keep: Optional[int] = None) -> int:
+    """
+    删除最近 keep 轮之外已结束（done / failed）的任务，调用方负责 commit
+
+    仍在排队或处理中的任务保留；继续运行时被清理的轮次会重新入队采集。
+
+    Args:
+        db: 数据库会话
+        keep: 保留的最近轮次数，默认 job_retention_cycles
+
+    Returns:
+        int: 删除的任务数
+    """
+    keep = settings.job_retention_cycles if keep is None else keep
+    recent = (
+        select(FetchJob.cycle_id)
+        .group_by(FetchJob.cycle_id)
+        .order_by(func.max(FetchJob.id).desc())
+        .limit(keep)
+    )
+    return db.execute(
+        delete(FetchJob).where(
+            FetchJob.cycle_id.notin_(recent),
+            FetchJob.status.in_([STATUS_DONE, STATUS_FAILED]),
+        )
+    ).rowcount
+
+
+def _claimable(now: datetime):
+    """可领取：排队中，或租约已过期的处理中任务"""
+    return and_(
+        or_(
+            FetchJob.status == STATUS_QUEUED,
+            and_(FetchJob.status == STATUS_LEASED, FetchJob.lease_expires_at < now),
+        ),
+        FetchJob.attempts < settings.job_max_attempts,
+    )
+
+
+def claim_job(db, worker_id: str, lease_seconds: Optional[int] = None,
+              cycle_id: Optional[str] = None) -> Optional[FetchJob]:
+    """
+    领取一个任务（比较并交换：只有条件仍成立时 UPDATE 才生效，多个 worker 竞争同一任务时只有一个成功）
+
+    Args:
+        db: 数据库会话（函数内提交）
+        worker_id: worker 标识
+        lease_seconds: 租约时长
+        cycle_id: 只领取指定轮次的任务
+
+    Returns:
+        Optional[FetchJob]: 领取到的任务，队列为空时返回 None
+    """
+    lease_seconds = lease_seconds or settings.job_lease_seconds
+
+    for _ in range(5):
+        now = datetime.utcnow()
+        candidates = select(FetchJob.id).where(_claimable(now))
+        if cycle_id:
+            candidates = candidates.where(FetchJob.cycle_id == cycle_id)
+        job_id = db.execute(candidates.order_by(FetchJob.id).limit(1)).scalar()
+        if job_id is None:
+            return None
+
+        token = uuid.uuid4().hex
+        claimed = db.execute(
+            update(FetchJob)
+            .where(FetchJob.id == job_id, _claimable(now))
+            .values(
+                status=STATUS_LEASED,
+                lease_owner=worker_id,
+                lease_token=token,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=FetchJob.attempts + 1,
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(FetchJob, job_id, populate_existing=True)
+        # 被其他 worker 抢先，换下一个
+    return None
+
+
+def heartbeat(db, job_id: int, token: str, lease_seconds: Optional[int] = None) -> bool:
+    """
+    续约（函数内提交）
+
+    Returns:
+        bool: 是否仍持有租约；False 表示租约已过期并被他人领取
+    """
+    lease_seconds = lease_seconds or settings.job_lease_seconds
+    renewed = db.execute(
+        update(FetchJob)
+        .where(FetchJob.id == job_id, FetchJob.lease_token == token,
+               FetchJob.status == STATUS_LEASED)
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+    ).rowcount
+    db.commit()
+    return bool(renewed)
+
+
+def _done_in_cycle(job_id: int, app_id: int):
+    """同一轮中已有其他任务写入了同一应用（不同搜索词解析到同一 trackId）"""
+    other = aliased(FetchJob)
+    return select(other.id).where(
+        other.cycle_id == FetchJob.cycle_id,
+        other.app_id == app_id,
+        other.status == STATUS_DONE,
+        other.id != job_id,
+    ).exists()
+
+
+def complete_job(db, job_id: int, token: str, app_id: int, data: Dict) -> bool:
+    """
+    标记任务完成（不提交，需与数据写入处于同一事务）
+
+    调用方在返回 False 时必须回滚，这样租约丢失后的迟到写入、以及同一轮中
+    另一个搜索词已写入同一应用时的重复写入都不会落库（重复时再调用 complete_duplicate）。
+
+    Returns:
+        bool: 是否仍持有租约、不是重复应用并成功标记
+    """
+    done = db.execute(
+        update(FetchJob)
+        .where(FetchJob.id == job_id, FetchJob.lease_token == token,
+               FetchJob.status == STATUS_LEASED, ~_done_in_cycle(job_id, app_id))
+        .values(
+            status=STATUS_DONE,
+            app_id=app_id,
+            result=json.dumps(data, ensure_ascii=False, default=str),
+            finished_at=datetime.utcnow(),
+            lease_token=None,
+            last_error=None,
+        )
+    ).rowcount
+    return bool(done)
+
+
+def complete_duplicate(db, job_id: int, token: str, app_identifier: str) -> bool:
+    """
+    同一轮中另一个搜索词已写入同一应用时，标记本任务完成并沿用其结果（不重复写入指标，函数内提交）
+
+    Returns:
+        bool: 是否确为重复且仍持有租约
+    """
+    app_id = db.execute(select(App.id).where(App.app_identifier == app_identifier)).scalar()
+    job = db.get(FetchJob, job_id, populate_existing=True)
+    if app_id is None or job is None:
+        db.rollback()
+        return False
+
+    result = db.execute(
+        select(FetchJob.result)
+        .where(FetchJob.cycle_id == job.cycle_id, FetchJob.app_id == app_id,
+               FetchJob.status == STATUS_DONE, FetchJob.id != job_id)
+        .order_by(FetchJob.id)
+        .limit(1)
+    ).first()
+    if result is None:
+        db.rollback()
+        return False
+
+    done = db.execute(
+        update(FetchJob)
+        .where(FetchJob.id == job_id, FetchJob.lease_token == token,
+               FetchJob.status == STATUS_LEASED)
+        .values(
+            status=STATUS_DONE,
+            app_id=app_id,
+            result=result[0],
+            finished_at=datetime.utcnow(),
+            lease_token=None,
+            last_error=None,
+        )
+    ).rowcount
+    db.commit()
+    return bool(done)
+
+
+def fail_job(db, job_id: int, token: str, error: str) -> bool:
+    """
+    记录失败：未超过最大次数时重新排队，否则标记为 failed（函数内提交）
+
+    Returns:
+        bool: 是否仍持有租约
+    """
+    job = db.get(FetchJob, job_id, populate_existing=True)
+    if job is None or job.lease_token != token or job.status != STATUS_LEASED:
+        db.rollback()
+        return False
+
+    exhausted = job.attempts >= settings.job_max_attempts
+    updated = db.execute(
+        update(FetchJob)
+        .where(FetchJob.id == job_id, FetchJob.lease_token == token)
+        .values(
+            status=STATUS_FAILED if exhausted else STATUS_QUEUED,
+            lease_owner=None,
+            lease_token=None,
+            lease_expires_at=None,
+            last_error=error[:2000],
+            finished_at=datetime.utcnow() if exhausted else None,
+        )
+    ).rowcount
+    db.commit()
+    return bool(updated)
+
+
+def requeue_expired(db, now: Optional[datetime] = None) -> int:
+    """
+    将租约过期的任务重新排队（超过最大次数的标记为 failed），函数内提交
+
+    Returns:
+        int: 处理的任务数
+    """
+    now = now or datetime.utcnow()
+    expired = and_(FetchJob.status == STATUS_LEASED, FetchJob.lease_expires_at < now)
+    failed = db.execute(
+        update(FetchJob)
+        .where(expired, FetchJob.attempts >= settings.job_max_attempts)
+        .values(status=STATUS_FAILED, lease_token=None, finished_at=now,
+                last_error='Lease expired too many times')
+    ).rowcount
+    requeued = db.execute(
+        update(FetchJob)
+        .where(expired)
+        .values(status=STATUS_QUEUED, lease_owner=None, lease_token=None, lease_expires_at=None)
+    ).rowcount
+    db.commit()
+    return failed + requeued
+
+
+def cycle_counts(db, cycle_id: str) -> Dict[str, int]:
+    """按状态统计某一轮的任务数"""
+    rows = db.execute(
+        select(FetchJob.status, func.count())
+        .where(FetchJob.cycle_id == cycle_id)
+        .group_by(FetchJob.status)
+    ).all()
+    return {status: count for status, count in rows}
+
+
+def cycle_results(db, cycle_id: str) -> Dict[str, AppSnapshot]:
+    """某一轮已完成任务的采集数据：应用名称 -> 应用数据（按入队顺序）"""
+    rows = db.execute(
+        select(FetchJob.app_name, FetchJob.result)
+        .where(FetchJob.cycle_id == cycle_id, FetchJob.status == STATUS_DONE)
+        .order_by(FetchJob.id)
+    ).all()
+    return {name: AppSnapshot.from_dict(json.loads(r)) for name, r in rows if r}
+
+
+def latest_cycle_id(db) -> Optional[str]:
+    return db.execute(select(FetchJob.cycle_id).order_by(FetchJob.id.desc()).limit(1)).scalar()
@@ -0,0 +1,251 @@
+"""
+App Radar Agent - 投递队列 (outbox)
+报告渲染后先写入数据库，再由后台投递器发送；投递失败不会丢失报告，也不需要重新采集
+"""
+import hashlib
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import aliased
+
+from app_radar.config.settings import settings
+from app_radar.storage.database import OutboxMessage
+
+
+STATUS_PENDING = 'pending'
+STATUS_SENDING = 'sending'
+STATUS_DELIVERED = 'delivered'
+STATUS_DEAD = 'dead'
+
+
+def make_dedupe_key(channel: str, target: str, messages: List[Dict]) -> str:
+    """按投递目标和消息内容计算去重键（同一份报告重复入队只保留一条）"""
+    payload = json.dumps([channel, target, messages], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def enqueue(db, target: str, messages: List[Dict], channel: str = 'slack_webhook',
+            dedupe_key: Optional[str] = None) -> OutboxMessage:
+    """
+    将消息写入投递队列（调用方负责 commit）
+
+    Args:
+        db: 数据库会话
+        target: 投递目标（如 Webhook URL）
+        messages: 按顺序发送的消息列表
+        channel: 投递渠道
+        dedupe_key: 去重键，默认由目标和内容计算
+
+    Returns:
+        OutboxMessage: 新建的记录；去重键已存在时返回已有记录
+    """
+    dedupe_key = dedupe_key or make_dedupe_key(channel, target, messages)
+    existing = db.query(OutboxMessage).filter(OutboxMessage.dedupe_key == dedupe_key).first()
+    if existing:
+        return existing
+
+    entry = OutboxMessage(
+        channel=channel,
+        target=target,
+        dedupe_key=dedupe_key,
+        payload=json.dumps(messages, ensure_ascii=False),
+        status=STATUS_PENDING,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(entry)
+    db.flush()
+    return entry
+
+
+def _claimable(now: datetime):
+    """
+    可领取：已到重试时间的待投递记录，或租约已过期的投递中记录（投递器中途退出）
+
+    同一目标只领取最早的未完成记录：前一份报告仍在退避或投递中时，后面的报告不会抢先发出。
+    """
+    earlier = aliased(OutboxMessage)
+    return and_(
+        or_(
+            and_(OutboxMessage.status == STATUS_PENDING, OutboxMessage.next_attempt_at <= now),
+            and_(OutboxMessage.status == STATUS_SENDING, OutboxMessage.lease_expires_at < now),
+        ),
+        ~select(earlier.id).where(
+            earlier.target == OutboxMessage.target,
+            earlier.id < OutboxMessage.id,
+            earlier.status.in_([STATUS_PENDING, STATUS_SENDING]),
+        ).exists(),
+    )
+
+
+def claim_due(db, now: Optional[datetime] = None, limit: int = 20,
+              lease_seconds: Optional[int] = None) -> List[OutboxMessage]:
+    """
+    领取已到期的记录（条件 UPDATE：多个投递器同时领取时每条记录只归一个投递器）
+
+    Args:
+        db: 数据库会话（函数内提交）
+        now: 当前时间
+        limit: 最多领取的记录数
+        lease_seconds: 租约时长，默认 outbox_lease_seconds
+
+    Returns:
+        List[OutboxMessage]: 本次领取到的记录（状态为 sending），按入队顺序
+    """
+    now = now or datetime.utcnow()
+    lease_seconds = lease_seconds or settings.outbox_lease_seconds
+    ids = db.execute(
+        select(OutboxMessage.id).where(_claimable(now)).order_by(OutboxMessage.id).limit(limit)
+    ).scalars().all()
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    db.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(ids), _claimable(now))
+        .values(status=STATUS_SENDING, lease_token=token,
+                lease_expires_at=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return (
+        db.query(OutboxMessage)
+        .filter(OutboxMessage.lease_token == token)
+        .order_by(OutboxMessage.id)
+        .populate_existing()
+        .all()
+    )
+
+
+def _clear_lease(entry: OutboxMessage):
+    entry.lease_token = None
+    entry.lease_expires_at = None
+
+
+def renew_lease(db, token: str, lease_seconds: Optional[int] = None) -> int:
+    """
+    续约本次领取中仍在投递的记录（函数内提交）
+
+    Returns:
+        int: 续约的记录数；租约已过期并被他人接手的记录不再续约
+    """
+    lease_seconds = lease_seconds or settings.outbox_lease_seconds
+    renewed = db.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.lease_token == token, OutboxMessage.status == STATUS_SENDING)
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return renewed
+
+
+# 投递结果写回时更新的字段
+SETTLED_FIELDS = ('status', 'progress', 'attempts', 'last_error', 'next_attempt_at', 'delivered_at')
+
+
+def commit_settled(db, entry: OutboxMessage, token: str) -> bool:
+    """
+    按租约令牌写回一条记录的投递结果（比较并交换，函数内提交）
+
+    先用 record_progress / mark_delivered / mark_failed 更新 entry，再调用本函数；
+    租约已过期并被其他投递器接手时不覆盖对方的状态，entry 上的修改被丢弃。
+
+    Returns:
+        bool: 是否仍持有租约并成功写回
+    """
+    values = {field: getattr(entry, field) for field in SETTLED_FIELDS}
+    with db.no_autoflush:
+        settled = db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id == entry.id, OutboxMessage.lease_token == token,
+                   OutboxMessage.status == STATUS_SENDING)
+            .values(**values, lease_token=None, lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    # 数据库中的状态为准，丢弃 entry 上未写回的修改
+    db.expire(entry)
+    db.commit()
+    return bool(settled)
+
+
+def release_claimed(db, token: str) -> int:
+    """本次领取中未尝试投递的记录退回待投递（不计失败次数；租约已被他人接手的不动，函数内提交）"""
+    released = db.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.lease_token == token, OutboxMessage.status == STATUS_SENDING)
+        .values(status=STATUS_PENDING, lease_token=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return released
+
+
+def backoff_seconds(attempts: int) -> float:
+    """第 attempts 次失败后的等待时间（指数退避，带 ±20% 抖动）"""
+    delay = min(settings.outbox_backoff_base * 2 ** (attempts - 1), settings.outbox_backoff_max)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def record_progress(entry: OutboxMessage, sent: int):
+    """记录本次投递中已送达的消息数"""
+    entry.progress = (entry.progress or 0) + sent
+
+
+def mark_delivered(entry: OutboxMessage, now: Optional[datetime] = None):
+    entry.status = STATUS_DELIVERED
+    entry.delivered_at = now or datetime.utcnow()
+    entry.last_error = None
+    _clear_lease(entry)
+
+
+def mark_failed(entry: OutboxMessage, error: str, retryable: bool = True,
+                now: Optional[datetime] = None):
+    """
+    记录一次失败；不可重试或超过最大次数时标记为 dead
+
+    Args:
+        entry: 队列记录
+        error: 错误信息
+        retryable: 是否值得重试（如 4xx 请求错误不重试）
+        now: 当前时间
+    """
+    now = now or datetime.utcnow()
+    entry.attempts = (entry.attempts or 0) + 1
+    entry.last_error = error
+    _clear_lease(entry)
+    if not retryable or entry.attempts >= settings.outbox_max_attempts:
+        entry.status = STATUS_DEAD
+    else:
+        entry.status = STATUS_PENDING
+        entry.next_attempt_at = now + timedelta(seconds=backoff_seconds(entry.attempts))
+
+
+def pending_messages(entry: OutboxMessage) -> List[Dict]:
+    """尚未送达的消息（跳过之前已发送的分片）"""
+    return json.loads(entry.payload)[entry.progress or 0:]
+
+
+def outbox_counts(db) -> Dict[str, int]:
+    """按状态统计队列记录数"""
+    rows = db.execute(
+        select(OutboxMessage.status, func.count()).group_by(OutboxMessage.status)
+    ).all()
+    return {status: count for status, count in rows}
+
+
+def requeue_dead(db) -> int:
+    """将 dead 记录重新置为待投递（人工修复目标后使用）"""
+    return (
+        db.query(OutboxMessage)
+        .filter(OutboxMessage.status == STATUS_DEAD)
+        .update({
+            OutboxMessage.status: STATUS_PENDING,
+            OutboxMessage.attempts: 0,
+            OutboxMessage.next_attempt_at: datetime.utcnow(),
+        }, synchronize_session=False)
+    )
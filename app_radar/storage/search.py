@@ -0,0 +1,159 @@
+"""
+App Radar Agent - 全文检索
+基于 SQLite FTS5 虚拟表，对应用名称、开发者、类别和最新描述建立索引
+"""
+import re
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app_radar.storage.database import engine as default_engine
+
+
+FTS_TABLE = "apps_fts"
+
+# 虚拟表 rowid 与 apps.id 一一对应，由触发器保持同步
+FTS_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, developer, category, description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS apps_fts_ai AFTER INSERT ON apps BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, developer, category, description)
+        VALUES (
+            new.id, new.name, coalesce(new.developer, ''), coalesce(new.category, ''),
+            coalesce((SELECT description FROM app_descriptions WHERE app_id = new.id), '')
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS apps_fts_au AFTER UPDATE OF name, developer, category ON apps BEGIN
+        UPDATE {FTS_TABLE}
+        SET name = new.name,
+            developer = coalesce(new.developer, ''),
+            category = coalesce(new.category, '')
+        WHERE rowid = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS apps_fts_ad AFTER DELETE ON apps BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS app_descriptions_fts_ai AFTER INSERT ON app_descriptions BEGIN
+        UPDATE {FTS_TABLE} SET description = coalesce(new.description, '') WHERE rowid = new.app_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS app_descriptions_fts_au AFTER UPDATE OF description ON app_descriptions BEGIN
+        UPDATE {FTS_TABLE} SET description = coalesce(new.description, '') WHERE rowid = new.app_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS app_descriptions_fts_ad AFTER DELETE ON app_descriptions BEGIN
+        UPDATE {FTS_TABLE} SET description = '' WHERE rowid = old.app_id;
+    END
+    """,
+]
+
+# 列权重: name, developer, category, description（bm25 越小越相关）
+BM25_WEIGHTS = (10.0, 2.0, 2.0, 1.0)
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def init_search_index(engine: Engine = default_engine) -> bool:
+    """
+    创建 FTS5 虚拟表和同步触发器，并在索引与 apps 表不一致时重建
+
+    Returns:
+        bool: 是否启用了全文检索（非 SQLite 或未编译 FTS5 时返回 False）
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+
+    with engine.begin() as conn:
+        try:
+            for statement in FTS_SCHEMA:
+                conn.execute(text(statement))
+        except Exception as e:
+            print(f"⚠️  全文检索不可用 (FTS5): {e}")
+            return False
+
+        indexed = conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+        total = conn.execute(text("SELECT count(*) FROM apps")).scalar()
+        if indexed != total:
+            rebuild_search_index(conn)
+
+    return True
+
+
+def rebuild_search_index(conn) -> int:
+    """
+    从 apps / app_descriptions 全量重建索引
+
+    Returns:
+        int: 索引中的应用数量
+    """
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    result = conn.execute(text(f"""
+        INSERT INTO {FTS_TABLE}(rowid, name, developer, category, description)
+        SELECT a.id, a.name, coalesce(a.developer, ''), coalesce(a.category, ''),
+               coalesce(d.description, '')
+        FROM apps a LEFT JOIN app_descriptions d ON d.app_id = a.id
+    """))
+    return result.rowcount
+
+
+def build_match_query(query: str) -> str:
+    """
+    将用户输入转换为安全的 FTS5 MATCH 表达式
+
+    每个词加引号避免语法错误（如 "Character.AI"），词之间为 AND 关系，
+    最后一个词做前缀匹配（"journal" 可命中 "journaling"）
+    """
+    terms = TERM_PATTERN.findall(query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_apps(query: str, limit: int = 20, engine: Engine = default_engine) -> List[Dict[str, Any]]:
+    """
+    全文检索应用
+
+    Args:
+        query: 检索词，如 "AI journaling"
+        limit: 返回数量
+        engine: 数据库引擎
+
+    Returns:
+        List[Dict]: 按相关度排序的结果，包含应用信息、摘要片段和得分
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    sql = text(f"""
+        SELECT a.id, a.app_identifier, a.name, a.developer, a.category, a.url,
+               snippet({FTS_TABLE}, 3, '*', '*', '…', 16) AS snippet,
+               bm25({FTS_TABLE}, {weights}) AS score
+        FROM {FTS_TABLE}
+        JOIN apps a ON a.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH :match
+        ORDER BY score
+        LIMIT :limit
+    """)
+
+    with engine.connect() as conn:
+        rows = conn.execute(sql, {"match": match, "limit": limit}).mappings().all()
+
+    return [dict(row) for row in rows]
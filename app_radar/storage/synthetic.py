@@ -0,0 +1,360 @@
+"""
+App Radar Agent - 合成数据集
+为存储、分析和报告的压测生成大规模数据：应用、公司信息、按固定间隔采集的指标历史和版本记录
+
+数据特征：
+- 类别占比接近 App Store（游戏最多），评论数呈重尾分布，少数公司拥有大量应用
+- 评论数按泊松过程增长，带周内波动、新应用上线后的热度衰减和偶发的爆发
+- 评分为逐期新增评论的加权平均，质量随时间缓慢漂移
+- 每个应用有各自的发版节奏，指标中的版本号与版本历史一致
+
+指标使用 numpy 按批向量化生成，通过 executemany 批量写入；
+写入期间临时删除 metrics 的二级索引，结束后重建。所有记录的 source 为 'synthetic'。
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+
+from app_radar.storage.database import Metric, engine as default_engine
+
+
+SOURCE = 'synthetic'
+
+# SQLAlchemy 在 SQLite 中保存 DateTime 的格式
+SQLITE_DATETIME = '%Y-%m-%d %H:%M:%S.%f'
+
+# 类别 -> (占比, 热度系数, 评分偏移)
+CATEGORIES: Dict[str, tuple] = {
+    'Games': (0.22, 1.4, -0.15),
+    'Business': (0.10, 0.5, 0.05),
+    'Education': (0.09, 0.7, 0.10),
+    'Lifestyle': (0.08, 0.8, 0.0),
+    'Utilities': (0.07, 0.6, -0.05),
+    'Entertainment': (0.06, 1.2, -0.05),
+    'Productivity': (0.05, 0.9, 0.10),
+    'Health & Fitness': (0.05, 0.9, 0.10),
+    'Food & Drink': (0.04, 0.8, -0.10),
+    'Shopping': (0.04, 1.3, -0.05),
+    'Finance': (0.04, 1.0, 0.05),
+    'Travel': (0.03, 0.8, 0.0),
+    'Social Networking': (0.03, 2.0, -0.20),
+    'Photo & Video': (0.03, 1.6, 0.0),
+    'Music': (0.02, 1.3, 0.05),
+    'Medical': (0.02, 0.4, 0.0),
+    'Sports': (0.02, 0.9, -0.10),
+    'News': (0.01, 0.7, -0.25),
+}
+
+ADJECTIVES = [
+    'Pixel', 'Zen', 'Swift', 'Bright', 'Nova', 'Lumen', 'Echo', 'Atlas', 'Orbit', 'Maple',
+    'Cobalt', 'Fable', 'Quartz', 'Pocket', 'Daily', 'Smart', 'Happy', 'Tiny', 'Bold', 'Clear',
+    'Lucky', 'Hyper', 'Neon', 'Calm', 'Wild', 'Prime', 'Sunny', 'Urban', 'Mellow', 'Rapid',
+]
+NOUNS = {
+    'Games': ['Quest', 'Blocks', 'Legends', 'Puzzle', 'Racer', 'Tycoon', 'Merge', 'Arena', 'Heroes', 'Solitaire'],
+    'Business': ['Invoice', 'CRM', 'Meetings', 'Payroll', 'Desk', 'Scanner', 'Leads'],
+    'Education': ['Lingo', 'Math', 'Flashcards', 'Tutor', 'Academy', 'Reader', 'Kids'],
+    'Lifestyle': ['Home', 'Style', 'Journal', 'Habits', 'Astro', 'Garden', 'Closet'],
+    'Utilities': ['VPN', 'Cleaner', 'Widgets', 'Keyboard', 'Battery', 'Files', 'Scanner'],
+    'Entertainment': ['Stream', 'Stories', 'Comics', 'Fan', 'Clips', 'TV', 'Quiz'],
+    'Productivity': ['Notes', 'Tasks', 'Calendar', 'Focus', 'Docs', 'Planner', 'Mail'],
+    'Health & Fitness': ['Fit', 'Steps', 'Yoga', 'Sleep', 'Diet', 'Run', 'Breathe'],
+    'Food & Drink': ['Eats', 'Recipes', 'Delivery', 'Coffee', 'Menu', 'Grocer'],
+    'Shopping': ['Deals', 'Cart', 'Market', 'Outlet', 'Thrift', 'Coupons'],
+    'Finance': ['Budget', 'Wallet', 'Invest', 'Pay', 'Crypto', 'Bank', 'Taxes'],
+    'Travel': ['Trips', 'Maps', 'Flights', 'Stays', 'Transit', 'Guide'],
+    'Social Networking': ['Chat', 'Circles', 'Moments', 'Friends', 'Voices', 'Feed'],
+    'Photo & Video': ['Cam', 'Edit', 'Filters', 'Reels', 'Collage', 'Studio'],
+    'Music': ['Beats', 'Tuner', 'Radio', 'Karaoke', 'Piano', 'Mixer'],
+    'Medical': ['Care', 'Dose', 'Clinic', 'Symptoms', 'Health Records'],
+    'Sports': ['Scores', 'League', 'Fantasy', 'Golf', 'Coach'],
+    'News': ['Daily', 'Headlines', 'Brief', 'Times', 'Digest'],
+}
+SUFFIXES = ['', '', '', '', ' Pro', ' Lite', ' Plus', ' 2', ' HD', ' AI']
+
+COMPANY_WORDS = ['Labs', 'Studios', 'Inc.', 'Technologies', 'Software', 'Games', 'Apps', 'Digital', 'Media', 'Ltd']
+COMPANY_SIZES = [(1, 10), (11, 50), (51, 200), (201, 500), (501, 1000), (1001, 5000), (5001, 10000)]
+COMPANY_SIZE_WEIGHTS = [0.38, 0.27, 0.16, 0.09, 0.05, 0.04, 0.01]
+FUNDING_STAGES = ['Bootstrapped', 'Seed', 'Series A', 'Series B', 'Series C', 'Series D+', 'Public']
+HEADQUARTERS = [
+    'San Francisco, CA', 'New York, NY', 'Seattle, WA', 'Austin, TX', 'Los Angeles, CA', 'London, UK',
+    'Berlin, Germany', 'Paris, France', 'Stockholm, Sweden', 'Helsinki, Finland', 'Tel Aviv, Israel',
+    'Singapore', 'Tokyo, Japan', 'Seoul, South Korea', 'Beijing, China', 'Shenzhen, China',
+    'Bangalore, India', 'Toronto, Canada', 'Sydney, Australia', 'São Paulo, Brazil',
+]
+
+# 发版间隔（天）
+RELEASE_INTERVALS = np.array([7, 10, 14, 21, 30, 45, 60, 90, 180])
+RELEASE_WEIGHTS = np.array([0.08, 0.07, 0.2, 0.15, 0.2, 0.12, 0.1, 0.05, 0.03])
+
+
+@dataclass
+class GenerationStats:
+    """生成结果统计"""
+    apps: int = 0
+    companies: int = 0
+    metrics: int = 0
+    versions: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> str:
+        rate = self.metrics / self.elapsed if self.elapsed else 0
+        return (f"{self.apps:,} 款应用, {self.companies:,} 家公司, {self.metrics:,} 条指标, "
+                f"{self.versions:,} 条版本记录, 耗时 {self.elapsed:.0f}s ({rate:,.0f} 条指标/秒)")
+
+
+def _fmt(dt: datetime) -> str:
+    return dt.strftime(SQLITE_DATETIME)
+
+
+def _max_id(conn, table: str) -> int:
+    return conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {table}")).scalar()
+
+
+def _generate_companies(conn, rng: np.random.Generator, count: int, now: datetime) -> List[int]:
+    """写入公司信息，返回公司 ID 列表"""
+    base_id = _max_id(conn, 'company_info')
+    sizes = rng.choice(len(COMPANY_SIZES), size=count, p=COMPANY_SIZE_WEIGHTS)
+    # 规模越大，融资阶段越靠后
+    stages = np.clip(sizes + rng.integers(-1, 2, size=count), 0, len(FUNDING_STAGES) - 1)
+    funding = np.where(stages == 0, 0, np.round(10 ** rng.normal(5.5 + stages * 0.45, 0.4), -3))
+    founded = np.clip(now.year - rng.gamma(2.0, 4.0 + sizes * 2, size=count).astype(int), 1990, now.year)
+    funding_days = rng.integers(30, 1500, size=count)
+    words = rng.integers(0, len(COMPANY_WORDS), size=count)
+    adjectives = rng.integers(0, len(ADJECTIVES), size=count)
+    cities = rng.integers(0, len(HEADQUARTERS), size=count)
+
+    rows = []
+    for i in range(count):
+        low, high = COMPANY_SIZES[sizes[i]]
+        stage = int(stages[i])
+        company_id = base_id + i + 1
+        rows.append((
+            company_id,
+            f"{ADJECTIVES[adjectives[i]]} {COMPANY_WORDS[words[i]]} {company_id}",
+            low, high,
+            float(funding[i]) or None,
+            FUNDING_STAGES[stage],
+            _fmt(now - timedelta(days=int(funding_days[i]))) if stage else None,
+            HEADQUARTERS[cities[i]],
+            int(founded[i]),
+            SOURCE,
+            _fmt(now),
+        ))
+    conn.exec_driver_sql(
+        "INSERT INTO company_info (id, company_name, employee_count_min, employee_count_max, "
+        "funding_total, funding_stage, last_funding_date, headquarters, founded_year, source, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    return [row[0] for row in rows]
+
+
+def _version_strings(major: int, releases: int) -> List[str]:
+    """第 0..releases 次发版的版本号（每 10 次发版升次版本号，每 40 次升主版本号）"""
+    return [f"{major + k // 40}.{k // 10 % 4}.{k % 10}" for k in range(releases + 1)]
+
+
+def generate_dataset(apps: int = 100_000, days: int = 365, interval_hours: int = 8,
+                     seed: int = 7, batch_size: int = 500, bind=None,
+                     progress: Optional[Callable[[GenerationStats], None]] = None) -> GenerationStats:
+    """
+    生成合成数据集
+
+    Args:
+        apps: 应用数量
+        days: 指标历史天数（截止到当前时间）
+        interval_hours: 采集间隔（小时）
+        seed: 随机种子，相同参数生成相同数据
+        batch_size: 每批生成和提交的应用数
+        bind: 数据库引擎，默认使用全局引擎
+        progress: 每批完成后的回调
+
+    Returns:
+        GenerationStats: 生成统计
+    """
+    bind = bind or default_engine
+    rng = np.random.default_rng(seed)
+    started = time.monotonic()
+    stats = GenerationStats()
+
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    steps = days * 24 // interval_hours
+    step_days = interval_hours / 24
+    start = now - timedelta(hours=interval_hours * (steps - 1))
+    step_times = np.array([_fmt(start + timedelta(hours=interval_hours * t)) for t in range(steps)],
+                          dtype=object)
+    weekday = np.array([(start + timedelta(hours=interval_hours * t)).weekday() for t in range(steps)])
+    # 周末评论更多
+    seasonality = np.where(weekday >= 5, 1.2, 1.0) * (1 + 0.1 * np.sin(np.arange(steps) * 2 * np.pi / (7 / step_days)))
+
+    names = list(CATEGORIES)
+    shares = np.array([CATEGORIES[c][0] for c in names])
+    popularity = np.array([CATEGORIES[c][1] for c in names])
+    rating_bias = np.array([CATEGORIES[c][2] for c in names])
+
+    secondary_indexes = [index for index in Metric.__table__.indexes]
+
+    with bind.connect() as conn:
+        conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        conn.exec_driver_sql("PRAGMA cache_size = -200000")
+
+        company_count = max(1, apps // 3)
+        company_ids = _generate_companies(conn, rng, company_count, now)
+        company_names = dict(conn.execute(
+            text("SELECT id, company_name FROM company_info WHERE source = :source"),
+            {'source': SOURCE},
+        ).all())
+        stats.companies = company_count
+        # 批量写入时删除二级索引，结束后统一重建
+        for index in secondary_indexes:
+            index.drop(conn, checkfirst=True)
+        conn.commit()
+
+        # 少数公司拥有大量应用（Zipf 分布，头部平滑）
+        company_weights = 1 / (np.arange(1, company_count + 1) + 20.0)
+        company_weights /= company_weights.sum()
+
+        app_base_id = _max_id(conn, 'apps')
+        metric_sql = (
+            "INSERT INTO metrics (app_id, timestamp, rating, rating_count, version, estimated_dau, "
+            f"estimated_mau, source, confidence) VALUES (?, ?, ?, ?, ?, ?, ?, '{SOURCE}', 1.0)"
+        )
+
+        try:
+            for offset in range(0, apps, batch_size):
+                n = min(batch_size, apps - offset)
+                ids = np.arange(app_base_id + offset + 1, app_base_id + offset + n + 1)
+                category = rng.choice(len(names), size=n, p=shares)
+
+                # 上线时间：80% 在历史开始前已上线，其余在期间内上线
+                launched = rng.random(n) < 0.2
+                launch_step = np.where(launched, rng.integers(0, int(steps * 0.95), size=n), 0)
+
+                # 初始评论数（重尾）和增长率
+                initial = np.where(
+                    launched,
+                    rng.integers(1, 20, size=n),
+                    np.clip(10 ** rng.normal(2.6, 1.1, size=n) * popularity[category], 1, 3e7),
+                ).astype(np.int64)
+                daily_growth = np.exp(rng.normal(np.log(0.0015), 0.8, size=n))
+                daily_base = np.maximum(initial * daily_growth, 0.05 * popularity[category])
+                # 新上线应用的热度：上线初期评论多，随后衰减
+                hype = np.where(launched, 10 ** rng.uniform(0.5, 2.5, size=n), 0.0)
+                hype_decay = rng.uniform(5, 40, size=n) / step_days
+                # 5% 的应用在某个时刻爆发
+                spike = rng.random(n) < 0.05
+                spike_step = rng.integers(0, steps, size=n)
+                spike_size = np.where(spike, rng.uniform(10, 60, size=n), 0.0)
+
+                t = np.arange(steps)[None, :]
+                since_launch = t - launch_step[:, None]
+                active = since_launch >= 0
+                since_spike = t - spike_step[:, None]
+                rate = (daily_base[:, None] * step_days * seasonality[None, :]
+                        * (1 + hype[:, None] * np.exp(-np.maximum(since_launch, 0) / hype_decay[:, None]))
+                        * (1 + spike_size[:, None] * np.where(since_spike >= 0,
+                                                              np.exp(-np.maximum(since_spike, 0) * step_days / 10),
+                                                              0)))
+                new_reviews = np.where(active, rng.poisson(rate), 0)
+                counts = initial[:, None] + np.cumsum(new_reviews, axis=1)
+
+                # 评分：初始评分 + 新评论均值随质量缓慢漂移
+                quality = np.clip(rng.normal(4.35, 0.45, size=n) + rating_bias[category], 1.5, 4.95)
+                drift = np.cumsum(rng.normal(0, 0.01, size=(n, steps)), axis=1)
+                new_mean = np.clip(quality[:, None] + drift, 1.0, 5.0)
+                weighted = initial[:, None] * quality[:, None] + np.cumsum(new_reviews * new_mean, axis=1)
+                ratings = np.round(weighted / np.maximum(counts, 1), 5)
+
+                # 发版节奏
+                interval = rng.choice(RELEASE_INTERVALS, size=n, p=RELEASE_WEIGHTS)
+                phase = rng.uniform(0, interval)
+                release = np.floor((np.arange(steps)[None, :] * step_days + phase[:, None]) / interval[:, None]).astype(int)
+                release -= release[np.arange(n), launch_step][:, None]
+                major = rng.integers(1, 8, size=n)
+                major[launched] = 1
+
+                dau_ratio = np.exp(rng.normal(np.log(0.8), 0.7, size=n))
+                dau = (counts * dau_ratio[:, None]).astype(np.int64)
+                mau = (dau * rng.uniform(2.5, 6, size=n)[:, None]).astype(np.int64)
+
+                owner = rng.choice(company_count, size=n, p=company_weights)
+                adjective = rng.integers(0, len(ADJECTIVES), size=n)
+                noun_pick = rng.integers(0, 1000, size=n)
+                suffix = rng.integers(0, len(SUFFIXES), size=n)
+
+                app_rows, description_rows, version_rows, metric_versions = [], [], [], []
+                for i in range(n):
+                    cat = names[category[i]]
+                    nouns = NOUNS[cat]
+                    name = f"{ADJECTIVES[adjective[i]]} {nouns[noun_pick[i] % len(nouns)]}{SUFFIXES[suffix[i]]}"
+                    developer = company_names[company_ids[owner[i]]]
+                    first_seen = step_times[launch_step[i]]
+                    app_rows.append((
+                        int(ids[i]), str(7_000_000_000 + ids[i]), name, 'ios', developer, cat,
+                        f"https://apps.apple.com/us/app/id{7_000_000_000 + ids[i]}",
+                        company_ids[owner[i]], first_seen, step_times[-1],
+                    ))
+                    description = (f"{name} is a {cat.lower()} app by {developer}. "
+                                   f"{' '.join(nouns)} and more for {cat.lower()} fans.")
+                    description_rows.append((int(ids[i]), description,
+                                             hashlib.sha1(description.encode('utf-8')).hexdigest(),
+                                             step_times[-1]))
+
+                    app_release = release[i, launch_step[i]:]
+                    versions = np.array(_version_strings(int(major[i]), int(app_release[-1])), dtype=object)
+                    metric_versions.append(versions[app_release])
+                    changed = np.flatnonzero(np.diff(app_release, prepend=-1))
+                    for k in changed:
+                        seen = step_times[launch_step[i] + k]
+                        version_rows.append((int(ids[i]), versions[app_release[k]], seen, seen))
+
+                conn.exec_driver_sql(
+                    "INSERT INTO apps (id, app_identifier, name, platform, developer, category, url, "
+                    "company_id, first_tracked_at, last_updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    app_rows,
+                )
+                conn.exec_driver_sql(
+                    "INSERT INTO app_descriptions (app_id, description, content_hash, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    description_rows,
+                )
+                conn.exec_driver_sql(
+                    "INSERT INTO app_versions (app_id, version, released_at, first_seen_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    version_rows,
+                )
+
+                # 只写上线后的时间点（按应用、时间顺序展开）
+                app_col = np.broadcast_to(ids[:, None], (n, steps))[active].tolist()
+                time_col = np.broadcast_to(step_times[None, :], (n, steps))[active].tolist()
+                rows = zip(
+                    app_col, time_col, ratings[active].tolist(), counts[active].tolist(),
+                    np.concatenate(metric_versions).tolist(),
+                    dau[active].tolist(), mau[active].tolist(),
+                )
+                conn.exec_driver_sql(metric_sql, list(rows))
+                conn.commit()
+
+                stats.apps += n
+                stats.metrics += len(app_col)
+                stats.versions += len(version_rows)
+                stats.elapsed = time.monotonic() - started
+                if progress:
+                    progress(stats)
+        finally:
+            # 出错时回滚未提交的批次，已提交的数据保留并重建索引
+            conn.rollback()
+            for index in secondary_indexes:
+                index.create(conn, checkfirst=True)
+            conn.commit()
+            conn.exec_driver_sql("ANALYZE")
+            conn.commit()
+
+    stats.elapsed = time.monotonic() - started
+    return stats
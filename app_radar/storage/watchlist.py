@@ -0,0 +1,66 @@
+"""
+App Radar Agent - 关注列表
+配置中的 target_apps 之外额外采集的应用（如榜单自动发现），按 trackId 精确采集；
+停用的条目不再采集，也不会被重新发现
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app_radar.config.settings import settings
+from app_radar.data_sources.itunes import lookup_term
+from app_radar.storage.database import App, WatchlistEntry
+
+
+def add_watchlist_entries(db, entries: List[Dict]) -> int:
+    """
+    批量加入关注列表（已存在的应用保持不变，包括已停用的；不提交）
+
+    Args:
+        db: 数据库会话
+        entries: app_id / source / reason
+
+    Returns:
+        int: 新加入的数量
+    """
+    if not entries:
+        return 0
+    existing = set(db.scalars(
+        select(WatchlistEntry.app_id).where(WatchlistEntry.app_id.in_([e['app_id'] for e in entries]))
+    ))
+    now = datetime.utcnow()
+    rows = [
+        {'active': True, 'added_at': now, **entry}
+        for entry in entries if entry['app_id'] not in existing
+    ]
+    if rows:
+        db.execute(sqlite_insert(WatchlistEntry).on_conflict_do_nothing(index_elements=['app_id']), rows)
+    return len(rows)
+
+
+def watchlist_terms(db, exclude_names: Iterable[str] = ()) -> List[str]:
+    """
+    启用中的关注列表条目对应的采集标识（id<trackId>），按加入顺序
+
+    Args:
+        db: 数据库会话
+        exclude_names: 已按名称采集的应用（不重复采集）
+
+    Returns:
+        List[str]: 采集标识列表
+    """
+    excluded = {name.lower() for name in exclude_names}
+    rows = db.execute(
+        select(App.app_identifier, App.name)
+        .join(WatchlistEntry, WatchlistEntry.app_id == App.id)
+        .where(WatchlistEntry.active.is_(True))
+        .order_by(WatchlistEntry.added_at, WatchlistEntry.id)
+    )
+    return [lookup_term(identifier) for identifier, name in rows if name.lower() not in excluded]
+
+
+def tracked_app_terms(db) -> List[str]:
+    """默认采集列表：配置中的 target_apps + 关注列表"""
+    return list(settings.target_apps) + watchlist_terms(db, exclude_names=settings.target_apps)
@@ -0,0 +1,385 @@
+"""
+App Radar Agent - 运行指标
+进程内的计数器和直方图，导出为 Prometheus 文本格式（textfile / 本地 HTTP 端点）和 JSON 运行摘要
+
+未启用时所有记录函数在第一行直接返回，计时器返回共享的空上下文，
+热路径上只多一次函数调用，可以在生产环境中常开埋点。
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app_radar.config.settings import settings
+
+
+# 秒；覆盖 API 请求、数据库写入和图表渲染的常见耗时
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 指标定义：名称 -> (类型, 说明)
+METRICS = {
+    'app_radar_stage_seconds': ('histogram', 'Duration of pipeline stages'),
+    'app_radar_fetch_seconds': ('histogram', 'Latency of a single data source fetch'),
+    'app_radar_fetch_total': ('counter', 'Data source fetches by outcome'),
+    'app_radar_fetch_retries_total': ('counter', 'Data source fetch retries'),
+    'app_radar_http_responses_total': ('counter', 'Upstream HTTP responses by status code'),
+    'app_radar_db_write_seconds': ('histogram', 'Duration of database writes'),
+    'app_radar_chart_render_seconds': ('histogram', 'Duration of uncached chart render batches'),
+    'app_radar_charts_rendered_total': ('counter', 'Charts rendered with matplotlib'),
+    'app_radar_cache_total': ('counter', 'Cache lookups by cache and result'),
+    'app_radar_slack_send_seconds': ('histogram', 'Latency of a single Slack webhook POST'),
+    'app_radar_slack_messages_total': ('counter', 'Slack webhook messages by outcome'),
+    'app_radar_slack_retries_total': ('counter', 'Slack webhook retries by reason'),
+    'app_radar_api_requests_total': ('counter', 'Query API requests by endpoint and status'),
+    'app_radar_api_request_seconds': ('histogram', 'Query API request latency'),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)  # 最后一格为 +Inf
+        self.total = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """
+    线程安全的指标存储
+
+    用法：
+        registry = MetricsRegistry()
+        registry.inc('app_radar_fetch_total', outcome='ok')
+        registry.observe('app_radar_fetch_seconds', 0.12, source='itunes')
+        registry.render()  # Prometheus 文本格式
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(len(self.buckets))
+            hist.counts[index] += 1
+            hist.total += value
+            hist.count += 1
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self) -> str:
+        """Prometheus 文本格式（exposition format 0.0.4）"""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(set(self.counters) | set(self.histograms)):
+                kind, description = METRICS.get(
+                    name, ('histogram' if name in self.histograms else 'counter', name)
+                )
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self.counters.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+                for key, hist in sorted(self.histograms.get(name, {}).items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {hist.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist.total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+        return '\n'.join(lines) + '\n'
+
+    def mark(self) -> Tuple[Dict, Dict]:
+        """当前状态的副本，作为 snapshot(since=...) 的基线（常驻进程中按轮次统计）"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self.counters.items()}
+            histograms = {
+                name: {key: (list(h.counts), h.total, h.count) for key, h in series.items()}
+                for name, series in self.histograms.items()
+            }
+        return counters, histograms
+
+    def _quantile(self, counts: List[int], total: int, q: float) -> Optional[float]:
+        """按桶上界估计分位数（落在 +Inf 桶时返回 None）"""
+        rank = q * total
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return None
+
+    def snapshot(self, since: Optional[Tuple[Dict, Dict]] = None) -> Dict:
+        """
+        JSON 友好的指标快照：计数器取值，直方图取次数 / 总和 / 估计 p50 / p95
+
+        Args:
+            since: mark() 返回的基线，提供时只统计基线之后的增量
+        """
+        def series_name(key: Labels) -> str:
+            return ','.join(f"{k}={v}" for k, v in key) or 'all'
+
+        base_counters, base_histograms = since or ({}, {})
+        counters: Dict[str, Dict] = {}
+        histograms: Dict[str, Dict] = {}
+        with self._lock:
+            for name, series in self.counters.items():
+                base = base_counters.get(name, {})
+                values = {series_name(key): value - base.get(key, 0.0)
+                          for key, value in series.items()}
+                values = {k: v for k, v in values.items() if v}
+                if values:
+                    counters[name] = values
+
+            for name, series in self.histograms.items():
+                base = base_histograms.get(name, {})
+                values = {}
+                for key, hist in series.items():
+                    base_counts, base_total, base_count = base.get(
+                        key, ([0] * len(hist.counts), 0.0, 0)
+                    )
+                    count = hist.count - base_count
+                    if not count:
+                        continue
+                    counts = [c - b for c, b in zip(hist.counts, base_counts)]
+                    values[series_name(key)] = {
+                        'count': count,
+                        'sum': round(hist.total - base_total, 6),
+                        'p50': self._quantile(counts, count, 0.5),
+                        'p95': self._quantile(counts, count, 0.95),
+                    }
+                if values:
+                    histograms[name] = values
+        return {'counters': counters, 'histograms': histograms}
+
+
+REGISTRY = MetricsRegistry()
+
+_enabled = settings.metrics_enabled
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True):
+    """开启或关闭指标记录（关闭不会清空已有数据）"""
+    global _enabled
+    _enabled = on
+
+
+def inc(name: str, value: float = 1.0, **labels):
+    """计数器加一（未启用时为空操作）"""
+    if not _enabled:
+        return
+    REGISTRY.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    """记录一次直方图观测值（未启用时为空操作）"""
+    if not _enabled:
+        return
+    REGISTRY.observe(name, value, **labels)
+
+
+class _Timer:
+    __slots__ = ('name', 'labels', 'started', 'elapsed')
+
+    def __init__(self, name: str, labels: Dict):
+        self.name = name
+        self.labels = labels
+        self.elapsed = 0.0
+
+    def __enter__(self) -> '_Timer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        REGISTRY.observe(self.name, self.elapsed, **self.labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+    elapsed = 0.0
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(name: str, **labels):
+    """
+    计时上下文，退出时把耗时记入直方图（未启用时返回共享的空上下文）
+
+    用法：
+        with monitoring.timed('app_radar_db_write_seconds', op='snapshot'):
+            save_app_snapshot(...)
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+
+def stage(name: str):
+    """流程阶段计时"""
+    return timed('app_radar_stage_seconds', stage=name)
+
+
+def _atomic_write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding='utf-8')
+    tmp.replace(path)
+
+
+def write_textfile(path: Optional[Path] = None) -> Optional[Path]:
+    """
+    写出 Prometheus textfile（node_exporter textfile collector 读取），原子替换
+
+    Returns:
+        Optional[Path]: 写出的文件路径，未启用时返回 None
+    """
+    if not _enabled:
+        return None
+    path = Path(path or settings.metrics_dir / "app_radar.prom")
+    _atomic_write(path, REGISTRY.render())
+    return path
+
+
+def write_run_summary(run_id: str, status: str, started_at: float,
+                      since: Optional[Tuple[Dict, Dict]] = None,
+                      path: Optional[Path] = None) -> Optional[Path]:
+    """
+    写出 JSON 运行摘要（各阶段耗时与指标快照）
+
+    Args:
+        run_id: 运行 ID
+        status: 运行结果
+        started_at: 开始时间（time.time()）
+        since: 本轮开始时 REGISTRY.mark() 的结果，只统计本轮
+        path: 输出路径，默认 metrics_dir/runs/<run_id>.json
+
+    Returns:
+        Optional[Path]: 写出的文件路径，未启用时返回 None
+    """
+    if not _enabled:
+        return None
+    snapshot = REGISTRY.snapshot(since=since)
+    summary = {
+        'run_id': run_id,
+        'status': status,
+        'started_at': datetime.fromtimestamp(started_at).isoformat(timespec='seconds'),
+        'duration_seconds': round(time.time() - started_at, 3),
+        'stages': {
+            series.split('=', 1)[-1]: values['sum']
+            for series, values in snapshot['histograms'].get('app_radar_stage_seconds', {}).items()
+        },
+        **snapshot,
+    }
+    path = Path(path or settings.metrics_dir / "runs" / f"{run_id}.json")
+    _atomic_write(path, json.dumps(summary, ensure_ascii=False, indent=2))
+    return path
+
+
+class MetricsServer:
+    """
+    本地 HTTP 指标端点（GET /metrics），供 Prometheus 直接抓取常驻进程
+
+    用法：
+        with MetricsServer(port=9464):
+            ...
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or REGISTRY
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def _make_handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'MetricsServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='metrics-server',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'MetricsServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
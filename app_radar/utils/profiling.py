@@ -0,0 +1,239 @@
+"""
+App Radar Agent - 流程性能剖析
+--profile 模式下按阶段运行 cProfile 和 tracemalloc，写出 .prof 文件和内存分配报告，
+结束时按自身耗时汇总热点（网络等待 / SQLAlchemy / pydantic / matplotlib / 本项目代码）
+
+cProfile 只记录调用它的线程；线程池中的工作（如 LLM 洞察、公司查询、后台投递）
+在主线程中体现为等待时间，归入 "waiting" 类别。
+"""
+import cProfile
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app_radar.config.settings import settings
+
+
+# 按文件路径 / 内置函数名归类，先匹配先得
+CATEGORIES: List[Tuple[str, Tuple[str, ...]]] = [
+    ('network', ('requests', 'urllib3', 'http/client', 'socket', 'ssl', 'selectors')),
+    ('database', ('sqlalchemy', 'sqlite3')),
+    ('pydantic', ('pydantic',)),
+    ('matplotlib', ('matplotlib', 'PIL', 'Imaging')),
+    ('waiting', ('threading.py', 'concurrent/futures', "'acquire' of '_thread", 'time.sleep')),
+    ('app_radar', ('app_radar',)),
+]
+
+# 内存分配报告中忽略的帧（剖析工具自身）
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+FuncKey = Tuple[str, int, str]
+
+
+def categorize(func: FuncKey) -> str:
+    """按函数所在文件判断类别"""
+    filename, _, name = func
+    location = f"{filename.replace(chr(92), '/')} {name}"
+    for category, patterns in CATEGORIES:
+        if any(pattern in location for pattern in patterns):
+            return category
+    return 'other'
+
+
+def describe(func: FuncKey) -> str:
+    filename, lineno, name = func
+    if filename == '~':
+        return name
+    parts = Path(filename).parts
+    return f"{'/'.join(parts[-2:])}:{lineno}({name})"
+
+
+@dataclass
+class StageProfile:
+    """单个阶段的剖析结果"""
+    name: str
+    wall: float
+    peak_bytes: int
+    net_bytes: int
+    prof_path: Path
+    alloc_path: Path
+    # 函数 -> 自身耗时（秒）
+    self_time: Dict[FuncKey, float] = field(default_factory=dict)
+
+
+class StageProfiler:
+    """
+    按阶段剖析流程
+
+    用法：
+        profiler = StageProfiler(output_dir)
+        with profiler.stage('fetch'):
+            ...
+        print(profiler.summary())
+    """
+
+    def __init__(self, output_dir: Path, top: int = 15, frames: int = 10):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.top = top
+        self.stages: List[StageProfile] = []
+        self._started_tracing = False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._started_tracing = True
+
+    @contextmanager
+    def stage(self, name: str):
+        """剖析一个阶段（阶段不可嵌套，cProfile 同一时间只能有一个在运行）"""
+        before = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            wall = time.perf_counter() - started
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+            self._record(name, wall, profiler, before, after, peak - baseline, current - baseline)
+
+    def _record(self, name: str, wall: float, profiler: cProfile.Profile,
+                before: tracemalloc.Snapshot, after: tracemalloc.Snapshot,
+                peak_bytes: int, net_bytes: int):
+        prefix = f"{len(self.stages) + 1:02d}_{name}"
+        prof_path = self.output_dir / f"{prefix}.prof"
+        alloc_path = self.output_dir / f"{prefix}.alloc.txt"
+
+        profiler.dump_stats(str(prof_path))
+        stats = pstats.Stats(profiler)
+        self_time = {func: row[2] for func, row in stats.stats.items() if row[2] > 0}
+
+        diff = after.compare_to(before, 'lineno')
+        diff.sort(key=lambda d: d.size_diff, reverse=True)
+        lines = [
+            f"# {name}: 耗时 {wall:.2f}s, 峰值 {peak_bytes / 1e6:.1f}MB, 净增 {net_bytes / 1e6:+.1f}MB",
+            f"# 新增分配 TOP {self.top}（按行）",
+        ]
+        for entry in diff[:self.top]:
+            if entry.size_diff <= 0:
+                break
+            frame = entry.traceback[0]
+            lines.append(f"{entry.size_diff / 1024:>10.1f} KiB  {entry.count_diff:>+8} blocks  "
+                         f"{frame.filename}:{frame.lineno}")
+        alloc_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+        self.stages.append(StageProfile(name, wall, peak_bytes, net_bytes,
+                                        prof_path, alloc_path, self_time))
+
+    def hot_spots(self) -> List[Tuple[float, FuncKey, str]]:
+        """所有阶段合并后按自身耗时排序：(秒, 函数, 阶段)"""
+        rows = [
+            (seconds, func, profile.name)
+            for profile in self.stages
+            for func, seconds in profile.self_time.items()
+        ]
+        rows.sort(key=lambda row: row[0], reverse=True)
+        return rows
+
+    def category_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for profile in self.stages:
+            for func, seconds in profile.self_time.items():
+                category = categorize(func)
+                totals[category] = totals.get(category, 0.0) + seconds
+        return dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True))
+
+    def summary(self) -> str:
+        """排序后的热点摘要（同时写入 output_dir/summary.txt）"""
+        lines = [f"🔥 性能剖析摘要 → {self.output_dir}", ""]
+        if not self.stages:
+            lines.append("(没有剖析任何阶段)")
+            return '\n'.join(lines)
+
+        # 中文表头按双倍宽度手工对齐
+        lines.append("阶段" + " " * 12 + " " * 6 + "耗时" + " " * 5 + "峰值内存" + " " * 5 + "净增内存")
+        for profile in sorted(self.stages, key=lambda p: p.wall, reverse=True):
+            lines.append(f"{profile.name:<16}{profile.wall:>9.2f}s"
+                         f"{profile.peak_bytes / 1e6:>11.1f}MB{profile.net_bytes / 1e6:>+11.1f}MB")
+
+        totals = self.category_totals()
+        profiled = sum(totals.values()) or 1.0
+        lines += ["", "按类别（自身耗时）:"]
+        for category, seconds in totals.items():
+            lines.append(f"  {category:<12}{seconds:>8.2f}s  {seconds / profiled:>6.1%}")
+
+        lines += ["", f"热点函数 TOP {self.top}（自身耗时）:"]
+        for rank, (seconds, func, stage) in enumerate(self.hot_spots()[:self.top], 1):
+            lines.append(f"  {rank:>2}. {seconds:>7.3f}s {seconds / profiled:>6.1%}  "
+                         f"[{categorize(func)}] {describe(func)}  ({stage})")
+
+        lines += ["", "查看详情: python -m pstats <stage>.prof  /  snakeviz <stage>.prof"]
+        text = '\n'.join(lines)
+        (self.output_dir / "summary.txt").write_text(text + '\n', encoding='utf-8')
+        return text
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+_profiler: Optional[StageProfiler] = None
+
+
+def enable(output_dir: Optional[Path] = None, top: int = 15) -> StageProfiler:
+    """
+    开启按阶段剖析
+
+    Args:
+        output_dir: 输出目录，默认 profiles_dir/<时间戳>
+        top: 摘要和内存报告中的条目数
+
+    Returns:
+        StageProfiler: 剖析器
+    """
+    global _profiler
+    output_dir = output_dir or settings.profiles_dir / datetime.now().strftime('%Y%m%dT%H%M%S')
+    _profiler = StageProfiler(output_dir, top=top)
+    return _profiler
+
+
+def active() -> Optional[StageProfiler]:
+    return _profiler
+
+
+def stage(name: str):
+    """剖析一个流程阶段（未开启时为空上下文）"""
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.stage(name)
+
+
+def finish() -> Optional[str]:
+    """
+    结束剖析并返回摘要
+
+    Returns:
+        Optional[str]: 热点摘要，未开启时返回 None
+    """
+    global _profiler
+    if _profiler is None:
+        return None
+    profiler, _profiler = _profiler, None
+    try:
+        return profiler.summary()
+    finally:
+        profiler.close()
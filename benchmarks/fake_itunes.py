@@ -0,0 +1,181 @@
+"""
+App Radar Agent - 本地 iTunes Search API 模拟服务
+回放录制的 search / lookup 响应，可配置延迟、5xx 错误率和 429 限流，用于不联网的基准测试
+"""
+import copy
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+FIXTURE_PATH = Path(__file__).parent / "fixtures" / "itunes_search.json"
+
+
+def load_templates(fixture_path: Path = FIXTURE_PATH) -> List[Dict]:
+    """读取录制的 search 响应"""
+    return json.loads(Path(fixture_path).read_text(encoding='utf-8'))['results']
+
+
+def make_app(templates: List[Dict], term: str, fetches: int = 0) -> Dict:
+    """
+    以录制的结果为模板，按搜索词确定性地生成一个应用
+
+    Args:
+        templates: 录制的结果
+        term: 搜索词（作为应用名称，trackId 和类别由其哈希决定）
+        fetches: 该搜索词已被请求的次数，评论数随之增长
+
+    Returns:
+        Dict: iTunes results 中的一项
+    """
+    digest = zlib.crc32(term.encode('utf-8'))
+    app = copy.deepcopy(templates[digest % len(templates)])
+    track_id = 1_000_000_000 + digest % 900_000_000
+    app.update({
+        'trackId': track_id,
+        'trackName': term,
+        'trackCensoredName': term,
+        'bundleId': f"com.example.app{track_id}",
+        'trackViewUrl': f"https://apps.apple.com/us/app/id{track_id}?uo=4",
+        'userRatingCount': 1_000 + digest % 500_000 + fetches * 37,
+        'averageUserRating': round(3.5 + (digest % 150) / 100, 2),
+    })
+    return app
+
+
+class FakeITunesServer:
+    """
+    本地 iTunes 服务
+
+    - GET /search?term=X：以录制的响应为模板，按搜索词确定性地生成一个应用
+      （同一搜索词每次返回相同的 trackId，评论数随请求次数增长，模拟多轮采集）
+    - GET /lookup?id=N：返回 /search 生成过的应用
+    - latency / jitter：每个请求的响应延迟（秒）
+    - error_rate：按固定随机种子返回 503 的比例
+    - rate_limit_every：每第 N 个请求返回 429 和 Retry-After
+    - not_found：返回空结果的搜索词
+
+    用法：
+        with FakeITunesServer(latency=0.02) as itunes:
+            source = ITunesDataSource({'api_base': itunes.base_url})
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, rate_limit_every: int = 0,
+                 retry_after: int = 1, not_found: Optional[List[str]] = None,
+                 fixture_path: Path = FIXTURE_PATH, seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.not_found = set(not_found or [])
+        self.templates = load_templates(fixture_path)
+        self.apps: Dict[int, Dict] = {}
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._fetches: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def make_app(self, term: str) -> Dict:
+        """生成搜索词对应的应用，并记录供 /lookup 查询"""
+        with self._lock:
+            fetches = self._fetches.get(term, 0)
+            self._fetches[term] = fetches + 1
+        app = make_app(self.templates, term, fetches)
+        with self._lock:
+            self.apps[app['trackId']] = app
+        return app
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # 头和正文分两次写出，不关闭 Nagle 时 keep-alive 连接会多出 ~40ms 的延迟确认等待
+            disable_nagle_algorithm = True
+
+            def _send(self, status: int, body: Dict, headers: Optional[Dict] = None):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/javascript; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+                with server._lock:
+                    server.requests += 1
+                    count = server.requests
+                    failed = server.error_rate and server._random.random() < server.error_rate
+                    delay = server.latency + server._random.uniform(0, server.jitter)
+                if delay:
+                    time.sleep(delay)
+
+                if server.rate_limit_every and count % server.rate_limit_every == 0:
+                    with server._lock:
+                        server.rate_limited += 1
+                    self._send(429, {'errorMessage': 'Rate limit exceeded'},
+                               {'Retry-After': str(server.retry_after)})
+                    return
+                if failed:
+                    with server._lock:
+                        server.errors += 1
+                    self._send(503, {'errorMessage': 'Service Unavailable'})
+                    return
+
+                if url.path == '/search':
+                    term = query.get('term', '')
+                    results = [] if not term or term in server.not_found else [server.make_app(term)]
+                elif url.path == '/lookup':
+                    track_id = query.get('id', '')
+                    app = server.apps.get(int(track_id)) if track_id.isdigit() else None
+                    results = [app] if app else []
+                else:
+                    self._send(404, {'errorMessage': 'Invalid request'})
+                    return
+                self._send(200, {'resultCount': len(results), 'results': results})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FakeITunesServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-itunes',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeITunesServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
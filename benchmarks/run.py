@@ -0,0 +1,345 @@
+"""
+App Radar Agent - 基准测试
+在本地模拟的 iTunes / Slack 服务和临时数据库上测量采集、写库、Slack 消息构建和图表渲染的吞吐，
+结果写入 JSON，便于在不同提交之间对比
+
+用法:
+    python benchmarks/run.py                               # 运行全部基准
+    python benchmarks/run.py fetch db_insert -n 500        # 只运行部分基准
+    python benchmarks/run.py snapshot_memory               # 应用快照的内存占用
+    python benchmarks/run.py --compare data/benchmarks/BASE.json            # 运行并与基线对比
+    python benchmarks/run.py --compare data/benchmarks/A.json data/benchmarks/B.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_itunes import FakeITunesServer, load_templates, make_app  # noqa: E402
+
+
+# 基准名称 -> (函数, 指标单位, 数值越大越好)
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, unit: str, higher_is_better: bool = True):
+    """注册基准函数：函数返回 (数值, 附加信息)"""
+    def decorator(func: Callable):
+        BENCHMARKS[name] = (func, unit, higher_is_better)
+        return func
+    return decorator
+
+
+def synthetic_apps(n: int, prefix: str = 'Bench App') -> List:
+    """用录制的响应生成 n 个应用快照（与 ITunesDataSource 解析结果一致）"""
+    from app_radar.data_sources.itunes import ITunesDataSource
+
+    templates = load_templates()
+    return [ITunesDataSource.parse_result(make_app(templates, f"{prefix} {i}")) for i in range(n)]
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽被测代码的进度输出"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@benchmark('fetch', 'apps/s')
+def bench_fetch(args, run: int):
+    """fetch_all_apps 端到端：HTTP 请求 + 解析 + 写库（无请求间隔）"""
+    from app_radar.cli import fetch_all_apps
+    from app_radar.config.settings import settings
+    from app_radar.data_sources.itunes import ITunesDataSource
+
+    names = [f"Fetch {run}-{i}" for i in range(args.n)]
+    with FakeITunesServer(latency=args.latency) as itunes:
+        settings.fetch_interval = 0
+        source = ITunesDataSource({'api_base': itunes.base_url})
+        started = time.perf_counter()
+        with quiet():
+            apps = fetch_all_apps(names, source=source)
+        elapsed = time.perf_counter() - started
+    return len(apps) / elapsed, {'apps': len(apps), 'seconds': round(elapsed, 3)}
+
+
+@benchmark('fetch_faults', 'apps/s')
+def bench_fetch_faults(args, run: int):
+    """带 503 和 429 的采集（包含 fetch_with_retry 的退避等待）"""
+    from app_radar.cli import fetch_all_apps
+    from app_radar.config.settings import settings
+    from app_radar.data_sources.itunes import ITunesDataSource
+
+    names = [f"Faults {run}-{i}" for i in range(args.n // 4 or 1)]
+    with FakeITunesServer(latency=args.latency, error_rate=0.02, rate_limit_every=50) as itunes:
+        settings.fetch_interval = 0
+        source = ITunesDataSource({'api_base': itunes.base_url})
+        started = time.perf_counter()
+        with quiet():
+            apps = fetch_all_apps(names, source=source)
+        elapsed = time.perf_counter() - started
+        extra = {'apps': len(apps), 'seconds': round(elapsed, 3),
+                 'errors': itunes.errors, 'rate_limited': itunes.rate_limited}
+    return len(apps) / elapsed, extra
+
+
+@benchmark('db_insert', 'rows/s')
+def bench_db_insert(args, run: int):
+    """save_app_snapshot + 逐条提交（与 CLI 采集路径一致），按实际写入的行数计（应用、指标、描述、版本）"""
+    from sqlalchemy import func, select
+    from app_radar.storage.database import (
+        App, AppDescription, AppVersion, Metric, get_db_session, save_app_snapshot
+    )
+
+    def count_rows(db) -> int:
+        return sum(db.scalar(select(func.count()).select_from(model))
+                   for model in (App, Metric, AppDescription, AppVersion))
+
+    apps = synthetic_apps(args.n, prefix=f"Insert {run}")
+    db = get_db_session()
+    try:
+        before = count_rows(db)
+        started = time.perf_counter()
+        for data in apps:
+            save_app_snapshot(db, str(data.track_id), data)
+            db.commit()
+        elapsed = time.perf_counter() - started
+        rows = count_rows(db) - before
+    finally:
+        db.close()
+    return rows / elapsed, {'apps': len(apps), 'rows': rows, 'seconds': round(elapsed, 3)}
+
+
+@benchmark('snapshot_memory', 'bytes/app', higher_is_better=False)
+def bench_snapshot_memory(args, run: int):
+    """解析后每个应用快照占用的内存（tracemalloc，原始响应中的字符串不计入），附 dict 对照"""
+    from app_radar.data_sources.itunes import ITunesDataSource
+
+    templates = load_templates()
+    raw = [make_app(templates, f"Memory {run}-{i}") for i in range(args.n * 10)]
+
+    def measure(parse: Callable) -> tuple:
+        tracemalloc.start()
+        try:
+            started = time.perf_counter()
+            kept = [parse(app) for app in raw]
+            elapsed = time.perf_counter() - started
+            allocated, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del kept
+        return allocated / len(raw), elapsed / len(raw) * 1e6
+
+    snapshot_bytes, snapshot_us = measure(ITunesDataSource.parse_result)
+    dict_bytes, dict_us = measure(lambda app: ITunesDataSource.parse_result(app).to_dict())
+    return snapshot_bytes, {'apps': len(raw), 'dict_bytes_per_app': round(dict_bytes),
+                            'parse_us_per_app': round(snapshot_us, 2),
+                            'dict_parse_us_per_app': round(dict_us, 2)}
+
+
+@benchmark('slack_payload', 'ms', higher_is_better=False)
+def bench_slack_payload(args, run: int):
+    """构建完整 Slack 报告（TOP 10 + 全量 KPI）并按 Block Kit 限制拆分"""
+    from app_radar.integrations.slack_webhook import chunk_message
+    from app_radar.reporting.slack import SlackReporter
+
+    apps = synthetic_apps(args.n)
+    reporter = SlackReporter('http://127.0.0.1/unused')
+    loops = 20
+    started = time.perf_counter()
+    for _ in range(loops):
+        chunks = chunk_message(reporter.create_message(apps, top_n=10))
+    elapsed = (time.perf_counter() - started) / loops
+    return elapsed * 1000, {'apps': len(apps), 'chunks': len(chunks)}
+
+
+@benchmark('slack_delivery', 'messages/s')
+def bench_slack_delivery(args, run: int):
+    """按顺序投递拆分后的消息到本地 Webhook（不限速）"""
+    from app_radar.integrations.local_slack import LocalSlackServer
+    from app_radar.integrations.slack_webhook import WebhookDelivery, chunk_message
+    from app_radar.reporting.slack import SlackReporter
+
+    message = SlackReporter('http://127.0.0.1/unused').create_message(synthetic_apps(50), top_n=50)
+    chunks = chunk_message(message) * 5
+    with LocalSlackServer() as slack:
+        delivery = WebhookDelivery(min_interval=0)
+        started = time.perf_counter()
+        result = asyncio.run(delivery.deliver(slack.webhook_url, chunks))
+        elapsed = time.perf_counter() - started
+    return result.sent / elapsed, {'messages': result.sent, 'seconds': round(elapsed, 3)}
+
+
+@benchmark('insights', 'apps/s')
+def bench_insights(args, run: int):
+    """并发生成 LLM 洞察（桩客户端，每次调用模拟 --latency 的延迟；每轮使用新应用，不命中缓存）"""
+    from app_radar.analytics.insights import InsightGenerator, default_insight_client
+    from app_radar.config.settings import settings
+
+    settings.insight_client = 'stub'
+    settings.insight_stub_latency = args.latency
+    apps = synthetic_apps(min(args.n, 200), prefix=f"Insight {run}")
+    generator = InsightGenerator(default_insight_client())
+    started = time.perf_counter()
+    with quiet():
+        insights = generator.generate(apps)
+    elapsed = time.perf_counter() - started
+    return len(insights) / elapsed, {'apps': len(apps), 'calls': generator.stats.calls,
+                                     'cache_hits': generator.stats.cache_hits,
+                                     'seconds': round(elapsed, 3)}
+
+
+@benchmark('chart_render', 's/chart', higher_is_better=False)
+def bench_chart_render(args, run: int):
+    """渲染全部图表（不使用缓存），按配置的进程数"""
+    from app_radar.config.settings import settings
+    from app_radar.reporting.charts import build_chart_jobs, render_charts
+
+    apps = synthetic_apps(min(args.n, 200))
+    jobs = build_chart_jobs(apps, per_category=True)
+    with tempfile.TemporaryDirectory() as output_dir:
+        started = time.perf_counter()
+        paths = render_charts(jobs, Path(output_dir), cache=None)
+        elapsed = time.perf_counter() - started
+    return elapsed / len(paths), {'charts': len(paths), 'seconds': round(elapsed, 3),
+                                  'workers': settings.chart_workers or os.cpu_count()}
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(names: List[str], args) -> Dict:
+    """运行基准，每项取 repeat 次的中位数"""
+    from app_radar.config.settings import settings
+    from app_radar.storage.database import init_db
+
+    # 图表缓存会让渲染基准失真
+    settings.chart_cache_enabled = False
+    with quiet():
+        init_db()
+
+    results = {}
+    for name in names:
+        func, unit, higher_is_better = BENCHMARKS[name]
+        values, extras = [], []
+        print(f"⏱️  {name} ...", end=" ", flush=True)
+        for run in range(args.repeat):
+            value, extra = func(args, run)
+            values.append(value)
+            extras.append(extra)
+        median = statistics.median(values)
+        results[name] = {
+            'unit': unit,
+            'higher_is_better': higher_is_better,
+            'value': round(median, 4),
+            'runs': [round(v, 4) for v in values],
+            'detail': extras[values.index(min(values, key=lambda v: abs(v - median)))],
+        }
+        print(f"{median:,.2f} {unit}")
+
+    return {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': {'n': args.n, 'repeat': args.repeat, 'latency': args.latency},
+        'results': results,
+    }
+
+
+def compare(base: Dict, new: Dict, threshold: float) -> bool:
+    """
+    打印两次结果的对比
+
+    Returns:
+        bool: 是否存在超过阈值的退化
+    """
+    print(f"\n📊 {base.get('commit')} ({base.get('created_at')}) → "
+          f"{new.get('commit')} ({new.get('created_at')})")
+    if base.get('params') != new.get('params'):
+        print(f"⚠️  参数不同: {base.get('params')} vs {new.get('params')}")
+
+    regressed = False
+    for name, result in new['results'].items():
+        old = base['results'].get(name)
+        if old is None or not old['value']:
+            print(f"   {name:<16}{result['value']:>12,.2f} {result['unit']:<11}(无基线)")
+            continue
+        change = (result['value'] - old['value']) / old['value']
+        better = change > 0 if result['higher_is_better'] else change < 0
+        worse = abs(change) > threshold and not better
+        regressed |= worse
+        marker = '❌' if worse else ('✅' if better and abs(change) > threshold else '  ')
+        print(f"{marker} {name:<16}{old['value']:>12,.2f} → {result['value']:>12,.2f} "
+              f"{result['unit']:<11}{change:>+8.1%}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='App Radar benchmarks')
+    parser.add_argument('benchmarks', nargs='*', help=f"Subset to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument('-n', type=int, default=200, help='Apps per benchmark (default: 200)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark (default: 3)')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='Fake iTunes / stub LLM response latency in seconds (default: 0.005)')
+    parser.add_argument('--output', type=str, help='Result file (default: data/benchmarks/<time>-<commit>.json)')
+    parser.add_argument('--compare', nargs='+', metavar='RESULT',
+                        help='Compare with a baseline result; with two files, compare them without running')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative change treated as a regression (default: 0.10)')
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        base, new = (json.loads(Path(p).read_text(encoding='utf-8')) for p in args.compare)
+        sys.exit(1 if compare(base, new, args.threshold) else 0)
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 在导入 app_radar 之前指定临时数据库（配置在导入时读取）
+        os.environ['DATABASE_URL'] = f"sqlite:///{tmp}/bench.db"
+        result = run_suite(args.benchmarks or list(BENCHMARKS), args)
+
+    from app_radar.config.settings import settings
+
+    output = Path(args.output) if args.output else (
+        settings.data_dir / "benchmarks" /
+        f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{result['commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\n💾 结果 → {output}")
+
+    if args.compare:
+        base = json.loads(Path(args.compare[0]).read_text(encoding='utf-8'))
+        sys.exit(1 if compare(base, result, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
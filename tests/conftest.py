@@ -0,0 +1,17 @@
+"""
+测试公共配置：使用临时 SQLite 数据库，不触碰 data/ 下的真实数据
+"""
+import os
+import tempfile
+
+# 必须在导入 app_radar 之前设置，数据库引擎在模块加载时创建
+os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp(prefix='app_radar_test_')}/test.db"
+
+import pytest
+
+from app_radar.storage.database import init_db
+
+
+@pytest.fixture(scope='session', autouse=True)
+def database():
+    init_db()
@@ -0,0 +1,83 @@
+"""
+Slack 图表上传测试（本地模拟服务的 Web API 上传流程）
+"""
+import asyncio
+
+import pytest
+
+from app_radar.config.settings import settings
+from app_radar.integrations.local_slack import LocalSlackServer
+from app_radar.integrations.slack_webhook import WebhookDelivery
+from app_radar.reporting.slack import SlackReporter
+from app_radar.storage.database import get_db_session, ChartUpload
+
+
+@pytest.fixture
+def slack(monkeypatch):
+    db = get_db_session()
+    db.query(ChartUpload).delete()
+    db.commit()
+    db.close()
+    with LocalSlackServer() as server:
+        monkeypatch.setattr(settings, 'slack_bot_token', server.bot_token)
+        monkeypatch.setattr(settings, 'slack_api_base', server.api_base)
+        monkeypatch.setattr(settings, 'slack_chart_channel', 'C000')
+        yield server
+
+
+@pytest.fixture
+def charts(tmp_path):
+    paths = {
+        'rating_scatter': tmp_path / 'rating_scatter.png',
+        'category_dist': tmp_path / 'category_dist.png',
+        'copy': tmp_path / 'copy.png',
+    }
+    paths['rating_scatter'].write_bytes(b'\x89PNG scatter')
+    paths['category_dist'].write_bytes(b'\x89PNG category')
+    paths['copy'].write_bytes(b'\x89PNG scatter')
+    return paths
+
+
+def test_upload_flow_and_image_blocks(slack, charts):
+    reporter = SlackReporter(slack.webhook_url)
+    file_ids = reporter.upload_charts(list(charts.values()))
+
+    assert set(file_ids) == {str(p) for p in charts.values()}
+    # 内容相同的图片只上传一次
+    assert len(slack.files) == 2
+    assert file_ids[str(charts['copy'])] == file_ids[str(charts['rating_scatter'])]
+    for path in charts.values():
+        record = slack.files[file_ids[str(path)]]
+        assert record['completed']
+        assert record['received'] == record['length'] == path.stat().st_size
+        assert record['channel_id'] == 'C000'
+
+    blocks = reporter.create_chart_blocks(file_ids)
+    result = asyncio.run(WebhookDelivery(min_interval=0).deliver(
+        slack.webhook_url, [{'text': 'charts', 'blocks': blocks}]))
+    assert result.ok
+
+    images = [b for b in slack.messages[0]['blocks'] if b['type'] == 'image']
+    assert [b['slack_file']['id'] for b in images] == list(file_ids.values())
+
+
+def test_unchanged_charts_reuse_file_ids(slack, charts):
+    reporter = SlackReporter(slack.webhook_url)
+    first = reporter.upload_charts(list(charts.values()))
+    second = reporter.upload_charts(list(charts.values()))
+
+    assert second == first
+    assert len(slack.files) == 2
+
+    # 内容变化后重新上传
+    charts['category_dist'].write_bytes(b'\x89PNG category v2')
+    third = reporter.upload_charts([charts['category_dist']])
+    assert third[str(charts['category_dist'])] != first[str(charts['category_dist'])]
+    assert len(slack.files) == 3
+
+
+def test_missing_chart_is_skipped(slack, charts, tmp_path):
+    reporter = SlackReporter(slack.webhook_url)
+    file_ids = reporter.upload_charts([tmp_path / 'missing.png', charts['category_dist']])
+
+    assert list(file_ids) == [str(charts['category_dist'])]
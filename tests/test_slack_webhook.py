@@ -0,0 +1,122 @@
+"""
+Slack Webhook 投递测试（本地模拟服务，不连接真实 Slack）
+"""
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from app_radar.integrations.local_slack import LocalSlackServer
+from app_radar.integrations.outbox_deliverer import OutboxDeliverer
+from app_radar.integrations.slack_webhook import (
+    MAX_BLOCKS, MAX_FALLBACK_TEXT, MAX_SECTION_TEXT, WebhookDelivery, chunk_message
+)
+from app_radar.storage.database import get_db_session, OutboxMessage
+from app_radar.storage.outbox import STATUS_DELIVERED, STATUS_PENDING, enqueue
+
+
+def section(i: int, text: str = None) -> dict:
+    return {'type': 'section', 'text': {'type': 'mrkdwn', 'text': text or f"block {i}"}}
+
+
+def test_chunk_message_splits_at_block_limit():
+    blocks = [section(i) for i in range(MAX_BLOCKS * 2 + 5)]
+    chunks = chunk_message({'text': 'report', 'blocks': blocks})
+
+    assert len(chunks) == 3
+    assert all(len(c['blocks']) <= MAX_BLOCKS for c in chunks)
+    assert [b for c in chunks for b in c['blocks']] == blocks
+    assert [c['text'] for c in chunks] == ['report (1/3)', 'report (2/3)', 'report (3/3)']
+
+
+def test_chunk_message_breaks_at_divider():
+    blocks = [section(i) for i in range(45)] + [{'type': 'divider'}] + [section(i) for i in range(45, 60)]
+    chunks = chunk_message({'text': 'report', 'blocks': blocks})
+
+    assert len(chunks[0]['blocks']) == 45
+    assert all(b['type'] != 'divider' for c in chunks for b in c['blocks'])
+
+
+def test_chunk_message_truncates_text():
+    message = {'text': 'x' * (MAX_FALLBACK_TEXT * 2), 'blocks': [section(0, 'y' * (MAX_SECTION_TEXT + 100))]}
+    chunk, = chunk_message(message)
+
+    assert len(chunk['blocks'][0]['text']['text']) == MAX_SECTION_TEXT
+    assert len(chunk['text']) <= MAX_FALLBACK_TEXT
+    # 原消息不被修改
+    assert len(message['blocks'][0]['text']['text']) == MAX_SECTION_TEXT + 100
+
+
+def test_chunks_are_accepted_in_order():
+    blocks = [section(i) for i in range(MAX_BLOCKS * 3)]
+    chunks = chunk_message({'text': 'report', 'blocks': blocks})
+    with LocalSlackServer() as slack:
+        result = asyncio.run(WebhookDelivery(min_interval=0).deliver(slack.webhook_url, chunks))
+
+    assert result.ok and result.sent == len(chunks)
+    assert [m['text'] for m in slack.messages] == [c['text'] for c in chunks]
+    assert slack.rejected == []
+
+
+def test_rate_limit_honours_retry_after():
+    with LocalSlackServer(rate_limit_first=1, retry_after=1) as slack:
+        started = time.monotonic()
+        result = asyncio.run(WebhookDelivery(min_interval=0, max_retries=2).deliver(
+            slack.webhook_url, [{'text': 'hello'}]))
+        elapsed = time.monotonic() - started
+
+    assert result.ok
+    assert result.rate_limited == 1 and result.retries == 1
+    assert elapsed >= 1
+    assert slack.rejected == [429]
+    assert [m['text'] for m in slack.messages] == ['hello']
+
+
+def test_client_error_is_not_retried():
+    oversized = {'text': 'too big', 'blocks': [section(i) for i in range(MAX_BLOCKS + 1)]}
+    with LocalSlackServer() as slack:
+        result = asyncio.run(WebhookDelivery(min_interval=0, max_retries=3).deliver(
+            slack.webhook_url, [oversized, {'text': 'after'}]))
+
+    assert not result.ok
+    assert not result.retryable
+    assert result.retries == 0
+    assert result.failed == 2
+    assert slack.requests == 1
+    assert slack.messages == []
+
+
+@pytest.fixture
+def clean_outbox():
+    db = get_db_session()
+    db.query(OutboxMessage).delete()
+    db.commit()
+    yield db
+    db.close()
+
+
+def test_outbox_resumes_from_recorded_progress(clean_outbox):
+    db = clean_outbox
+    messages = [{'text': f"part {i}"} for i in range(3)]
+    with LocalSlackServer(min_interval=60, retry_after=60) as slack:
+        entry = enqueue(db, slack.webhook_url, messages)
+        db.commit()
+        deliverer = OutboxDeliverer(delivery=WebhookDelivery(min_interval=0, max_retries=0))
+
+        # 第二条被限速：只有第一条送达，记录退回待重试
+        assert deliverer.deliver_due() == 1
+        db.refresh(entry)
+        assert entry.status == STATUS_PENDING
+        assert entry.progress == 1
+
+        slack.min_interval = 0
+        entry.next_attempt_at = datetime.utcnow()
+        db.commit()
+        assert deliverer.deliver_due() == 1
+
+    db.refresh(entry)
+    assert entry.status == STATUS_DELIVERED
+    assert entry.progress == 3
+    # 重试时不重复发送已送达的分片
+    assert [m['text'] for m in slack.messages] == ['part 0', 'part 1', 'part 2']